@@ -1,31 +1,159 @@
+import copy
+import os
+import threading
 from typing import TypedDict, List, Optional, Dict
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import InMemorySaver
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from app import schemas
+from app import checkpoint_store, gaps, model_router, resume_sections, schemas, section_extraction
 
 # 1. Define the State
 class AgentState(TypedDict):
-    resume_text: str
+    resume_ref: str  # content-hash ref into checkpoint_store.blobs
     chat_history: List[Dict[str, str]]
     extracted_data: Optional[dict]
     pending_questions: List[str]
     remaining_questions: int
     current_focus_field: str
     is_complete: bool
+    resume_fingerprint: Optional[dict]
+    resume_draft: Optional[dict]
+    current_gap: Optional[dict]
+    closed_gaps: List[str]
+    question_plan: List[dict]
+    planned_total: int
+    unmerged_answers: int
+    finish: bool
+
+# Answers to the model's planned questions are merged in one full call every MERGE_EVERY answers.
+MERGE_EVERY = int(os.getenv("INTERVIEW_MERGE_EVERY", "3"))
+MAX_PLANNED_QUESTIONS = int(os.getenv("INTERVIEW_MAX_PLANNED", "8"))
+
+ENTRY_UPDATE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You update one entry of a candidate's profile with their answer to an interview question.
+    Keep every existing fact. Add only what the answer states: numbers and outcomes go into 'metrics' and into the bullet they belong to.
+    Never invent facts."""),
+    ("user", "Entry:\n{entry}\n\nQuestion:\n{question}\n\nAnswer:\n{answer}"),
+])
+
+# Light turns (see model_router.route_turn): the small model returns only the sections the answer changes.
+LIGHT_TURN_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You update a candidate's profile with their latest interview answer.
+    Return ONLY the sections the answer changes, each in full: every existing fact kept, the new facts added. Leave all other sections null.
+    Never invent facts. If the user asked a clarifying question instead of answering, change nothing and answer it in 'assistant_message'."""),
+    ("user", "Profile sections:\n{sections}\n\nRecent chat:\n{chat_history}"),
+])
+
+# Gap kind -> schema for the targeted update call (the entry is replaced by the result)
+ENTRY_SCHEMAS = {"work_experience": schemas.WorkExperience, "education": schemas.Education}
+
+
+def _apply_answer_with_llm(profile: dict, gap: dict, answer: str) -> dict:
+    """Small structured call scoped to the one entry (or section) the gap is about."""
+    section, index = gap["section"], gap.get("index")
+    if section in ENTRY_SCHEMAS and index is not None and index < len(profile.get(section) or []):
+        entry = profile[section][index]
+        updated = model_router.invoke_structured(
+            model_router.route_entry_update(entry, answer), ENTRY_UPDATE_PROMPT, ENTRY_SCHEMAS[section],
+            {"entry": entry, "question": gap["question"], "answer": answer},
+        )
+        profile[section][index] = updated.model_dump()
+    elif section == "projects":
+        existing = profile.get("projects") or []
+        added = model_router.invoke_structured(
+            model_router.route_entry_update(existing, answer), ENTRY_UPDATE_PROMPT, schemas.ProjectsSection,
+            {"entry": existing, "question": gap["question"], "answer": answer},
+        )
+        profile["projects"] = existing + [p.model_dump() for p in added.items]
+    # Links answered without a URL have nothing to record.
+    return profile
+
+
+def _light_turn(route, profile: dict, gap: Optional[dict], history: List[Dict[str, str]], n_new: int):
+    """Small-model turn scoped to the current gap's section. Returns (updated profile, ProfileDelta)."""
+    section = gap["section"] if gap else None
+    scope = {section: profile.get(section)} if section in schemas.CandidateProfile.model_fields else profile
+    recent = history[-2 * max(1, n_new):]
+    delta = model_router.invoke_structured(
+        route, LIGHT_TURN_PROMPT, schemas.ProfileDelta,
+        {"sections": scope, "chat_history": "".join(f"{m['role'].upper()}: {m['content']}\n" for m in recent)},
+    )
+    profile = copy.deepcopy(profile)
+    for key, value in delta.model_dump(exclude={"assistant_message"}).items():
+        if value is None or key not in scope:
+            continue  # unchanged, or a section the model was not shown
+        if key == "personal_info":
+            value = {**(profile.get(key) or {}), **{k: v for k, v in value.items() if v}}
+        profile[key] = value
+    return profile, delta
+
+
+def _open_queue(profile: dict, closed: List[str], plan: List[dict]) -> List[dict]:
+    queue = gaps.find_gaps(profile, closed) + [q for q in plan if q["id"] not in closed]
+    return sorted(queue, key=lambda g: g["priority"])
+
+
+def _next_turn(profile: dict, closed: List[str], plan: List[dict], planned_total: int, unmerged: int) -> dict:
+    """Serve the next question from the local queue (gaps + planned); complete when it is empty."""
+    queue = _open_queue(profile, closed, plan)
+    gap = queue[0] if queue else None
+    return {
+        "extracted_data": profile,
+        "pending_questions": [gap["question"]] if gap else [],
+        "remaining_questions": len(queue),
+        "current_focus_field": gap["section"] if gap else "Candidate Profile",
+        "is_complete": gap is None,
+        "current_gap": gap,
+        "closed_gaps": closed,
+        "question_plan": [q for q in plan if q["id"] not in closed],
+        "planned_total": planned_total,
+        "unmerged_answers": unmerged,
+        "finish": False,
+        "resume_draft": None,  # only the first turn uses it; don't carry it in later checkpoints
+    }
+
 
 # 2. Define the AI Node
 def process_resume_node(state: AgentState):
-    # Initialize the LLM (Requires OPENAI_API_KEY in your docker-compose environment)
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
-    
-    # Force the LLM to output the exact Pydantic schema we defined
-    structured_llm = llm.with_structured_output(schemas.ExtractionResult)
+    history = state.get("chat_history", [])
+    answer = history[-1]["content"] if history and history[-1]["role"] == "user" else ""
+    gap = state.get("current_gap")
+    closed = list(state.get("closed_gaps") or [])
+    plan = list(state.get("question_plan") or [])
+    planned_total = state.get("planned_total") or 0
+    unmerged = state.get("unmerged_answers") or 0
+    finishing = bool(state.get("finish"))
+    stale = counted = False
+    current = state.get("extracted_data")
 
+    if not finishing and current and gap and answer and not gaps.is_clarifying_question(answer):
+        profile = copy.deepcopy(current)
+        closed.append(gap["id"])
+        if gap["kind"] != "planned":
+            # Structural gap: fold the answer in locally (or with a call scoped to one entry).
+            if gaps.apply_answer(profile, gap, answer) == "needs_llm":
+                profile = _apply_answer_with_llm(profile, gap, answer)
+            if unmerged == 0 or _open_queue(profile, closed, plan):
+                return _next_turn(profile, closed, plan, planned_total, unmerged)
+            # Last question, but earlier planned answers are not merged yet: run the full call on this profile.
+            current = profile
+
+        else:
+            # Planned question: the answer stays in chat_history and is merged later in one full call.
+            if not gaps.is_decline(answer):
+                unmerged += 1
+            counted = True
+            stale = gaps.invalidates_plan(answer)
+            if stale:
+                plan = []
+            if not stale and unmerged < MERGE_EVERY and (unmerged == 0 or _open_queue(profile, closed, plan)):
+                return _next_turn(profile, closed, plan, planned_total, unmerged)
+    
     formatted_history = ""
     for msg in state.get("chat_history", []):
         formatted_history += f"{msg['role'].upper()}: {msg['content']}\n"
+    queued = _open_queue(current, closed, plan) if current else []
+    if queued:
+        formatted_history += "\nAlready queued:\n" + "\n".join(f"- {q['question']}" for q in queued) + "\n"
     
     prompt = ChatPromptTemplate.from_messages([
         ("system", """You are an elite executive recruiter and career coach. Your job is to extract the candidate's resume into the JSON schema AND actively interview them to build a highly competitive, holistic profile.
@@ -46,16 +174,13 @@ def process_resume_node(state: AgentState):
         3. EXTRACURRICULARS & PROJECTS: If their profile is heavy on work but light on passion, ask about hackathons, open-source contributions, or personal side projects.
         4. TECHNICAL DEPTH: If they list a tool without context, ask how they applied it to solve a complex problem.
 
-        If the profile lacks this depth, generate a question in 'assistant_message' and set 'is_complete' to False.
+        If the profile lacks this depth, generate a question in 'assistant_message'.
 
         RULES FOR ASKING QUESTIONS:
         1. ONE QUESTION AT A TIME: NEVER ask multiple questions at once.
         2. STRICT PRIORITIZATION: Ask the most crucial question first. Metrics/Impact on recent work is highest priority. Certifications/Links are lowest priority.
         3. COACHING TONE: Ask engaging, conversational questions. (e.g., "I see you used Python at your last job. What was the most complex problem you solved with it, and what was the result?")
         4. RESPECT NEGATIVES: If the user says they don't have something, DO NOT ask about it again.
-         
-        CRITICAL COUNTING DIRECTIVE:
-        Evaluate the profile and estimate how many total missing gaps/questions remain. Output this exact number in 'remaining_questions_count'.
 
         Incorporate all new information from the chat history into the structured profile."""),
         (
@@ -64,27 +189,72 @@ def process_resume_node(state: AgentState):
         ),
     ])
     
-    chain = prompt | structured_llm
-    
-    # Invoke the LLM with the current state
-    result = chain.invoke({
-        "resume_text": state["resume_text"],
-        "current_profile": state.get("extracted_data") or {},
+    # First turn: send the deterministic pre-parse plus only the sections it could not structure.
+    draft = state.get("resume_draft") if not current else None
+    resume_text = checkpoint_store.resume_text(state)
+    inputs = {
+        "resume_text": resume_sections.format_for_llm(draft) if draft else resume_text,
+        "current_profile": (draft["profile"] if draft else current) or {},
         "chat_history": formatted_history or "No chat yet."
-    })
-    # NEW
-    questions_list = [result.assistant_message] if result.assistant_message else []
-    
-    # MUST RETURN A DICT UPDATING THE STATE KEYS
-    # Using .model_dump() (or .dict() in Pydantic v1) converts the Pydantic object to a dictionary
-    return {
-        "extracted_data": result.profile.model_dump(),
-        "pending_questions": questions_list,
-        "remaining_questions": result.remaining_questions_count,
-        "current_focus_field": result.current_focus_field,
-        "is_complete": result.is_complete
     }
 
+    result = profile = None
+    if section_extraction.should_split(resume_text, draft):
+        # Long resume: extract sections concurrently; any failure falls back to the single call below.
+        try:
+            profile, result = section_extraction.extract_profile(draft, prompt, inputs)
+        except Exception as e:
+            print(f"Section extraction failed, using single call: {e}")
+            result = profile = None
+
+    if profile is None:
+        # Cheap turns (one short answer outside work/education) go to the small model, which returns only
+        # the sections the answer changes instead of regenerating the whole profile.
+        user_answers = [m["content"] for m in history if m["role"] == "user"]
+        n_new = unmerged if counted else unmerged + 1  # answers this call has not seen merged yet
+        route = model_router.route_turn(
+            first_turn=not current,
+            answers=user_answers[-n_new:] if n_new else [],
+            focus_field=gap["section"] if gap else None,
+            stale=stale,
+        )
+        if route[0] == "turn.light":
+            profile, result = _light_turn(route, current, gap, history, n_new)
+        else:
+            # Force the LLM to output the exact Pydantic schema we defined
+            result = model_router.invoke_structured(route, prompt, schemas.ExtractionResult, inputs)
+            # Using .model_dump() (or .dict() in Pydantic v1) converts the Pydantic object to a dictionary
+            profile = result.profile.model_dump()
+            if draft:
+                profile = resume_sections.merge_draft(profile, draft)
+
+    # The call has seen every answer not merged yet (a light turn has at most one), so all are merged now.
+    unmerged = 0
+    new_plan = getattr(result, "question_plan", None) or []
+    room = max(0, MAX_PLANNED_QUESTIONS - planned_total)
+    if room and new_plan:
+        plan = [q for q in plan if q["id"] not in closed] + gaps.planned_questions(new_plan[:room], planned_total)
+        planned_total += len(new_plan[:room])
+
+    if finishing:
+        # Interview stopped by the user: keep the merged profile, ask nothing more.
+        return {**_next_turn(profile, closed, plan, planned_total, unmerged), "pending_questions": [], "is_complete": True}
+
+    if gap and answer and gaps.is_clarifying_question(answer) and result is not None and result.assistant_message:
+        # The user asked for clarification: keep the model's reply and stay on the same gap.
+        queue = _open_queue(profile, closed, plan)
+        return {
+            **_next_turn(profile, closed, plan, planned_total, unmerged),
+            "pending_questions": [result.assistant_message],
+            "remaining_questions": max(1, len(queue)),
+            "current_focus_field": gap["section"],
+            "is_complete": False,
+            "current_gap": gap,
+        }
+
+    # Question planning and completion are decided locally from the queue.
+    return _next_turn(profile, closed, plan, planned_total, unmerged)
+
 # 3. Define the Human Breakpoint Node
 def human_input_node(state: AgentState):
     # LangGraph will pause BEFORE executing this node.
@@ -101,14 +271,30 @@ def should_continue(state: AgentState):
     
     return "human_input"
 
-# 5. Build and Compile the Graph
-workflow = StateGraph(AgentState)
-workflow.add_node("agent", process_resume_node)
-workflow.add_node("human_input", human_input_node)
+# 5. Build and Compile the Graph (on first use, so importing this module stays cheap)
+def build_graph():
+    workflow = StateGraph(AgentState)
+    workflow.add_node("agent", process_resume_node)
+    workflow.add_node("human_input", human_input_node)
+
+    workflow.set_entry_point("agent")
+    workflow.add_conditional_edges("agent", should_continue)
+    workflow.add_edge("human_input", "agent")
+
+    # Keeps only the latest few checkpoints per thread (see checkpoint_store)
+    memory = checkpoint_store.CompactSaver()
+    return workflow.compile(checkpointer=memory, interrupt_before=["human_input"])
+
+
+_compiled_app = None
+_compile_lock = threading.Lock()
 
-workflow.set_entry_point("agent")
-workflow.add_conditional_edges("agent", should_continue)
-workflow.add_edge("human_input", "agent")
 
-memory = InMemorySaver()
-resume_agent_app = workflow.compile(checkpointer=memory, interrupt_before=["human_input"])
+def get_resume_agent_app():
+    """The process-wide compiled graph. Built once: its checkpointer holds every interview."""
+    global _compiled_app
+    if _compiled_app is None:
+        with _compile_lock:
+            if _compiled_app is None:
+                _compiled_app = build_graph()
+    return _compiled_app
@@ -0,0 +1,88 @@
+# app/artifacts.py
+"""
+Per-user artifact store for profile exports.
+
+Request handlers only enqueue the latest profile; a single background writer thread serializes it
+compactly and writes it atomically (temp file in the same directory + os.replace), so readers never
+see a half-written file and concurrent users never share a file. Repeated saves for the same user
+that arrive before the writer gets to them are coalesced into one write. A failed write is logged
+(nobody waits on the writer's futures).
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ARTIFACT_DIR = Path(os.getenv("ARTIFACT_DIR", Path(__file__).resolve().parent / "artifacts"))
+PROFILE_EXPORT_NAME = "master_candidate_profile.json"
+
+
+def _user_key(email: str) -> str:
+    # Hashed so arbitrary emails can never escape the artifact directory.
+    return hashlib.sha256((email or "").strip().lower().encode("utf-8")).hexdigest()[:32]
+
+
+def write_json_atomic(path: Path, payload) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"), ensure_ascii=False, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+class ArtifactStore:
+    def __init__(self, root: Path = ARTIFACT_DIR):
+        self.root = Path(root)
+        # One writer keeps writes for a user in submission order.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifact-writer")
+        self._pending: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def profile_path(self, email: str) -> Path:
+        return self.root / _user_key(email) / PROFILE_EXPORT_NAME
+
+    def enqueue_profile(self, email: str, profile: dict | None):
+        """Schedule an export of `profile` for `email`. Returns immediately."""
+        key = _user_key(email)
+        with self._lock:
+            already_queued = key in self._pending
+            self._pending[key] = {"email": email, "profile": profile or {}}
+        if not already_queued:
+            future = self._executor.submit(self._flush, key)
+            future.add_done_callback(lambda f: self._report(f, key))
+            return future
+        return None
+
+    def _report(self, future, key: str) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Profile export for user {key} failed: {future.exception()!r}")
+
+    def _flush(self, key: str) -> None:
+        with self._lock:
+            item = self._pending.pop(key, None)
+        if item is not None:
+            write_json_atomic(self.profile_path(item["email"]), item["profile"])
+
+    def pending_profile(self, email: str) -> dict | None:
+        with self._lock:
+            item = self._pending.get(_user_key(email))
+        return item["profile"] if item else None
+
+    def wait(self) -> None:
+        """Block until everything queued so far is on disk (shutdown, tests)."""
+        self._executor.submit(lambda: None).result()
+
+
+artifact_store = ArtifactStore()
@@ -0,0 +1,216 @@
+"""
+Micro-benchmarks for the CPU-bound parts of the pipeline.
+
+Cases: text extraction from generated PDF/DOCX resumes, link normalization/dedup, section
+pre-parsing (resume_sections.build_draft, PDF heading spans), job page HTML
+parsing on saved career pages, reduce_tex_spacing and page-count parsing of pdflatex logs, and the
+ReportLab renderer (pdf_renderer) on one-page and must-shrink profiles.
+Fixtures live in bench_fixtures/ (HTML pages, TeX logs); resumes are generated at start-up with
+reportlab and python-docx so no binaries are checked in.
+
+Each case reports ops/sec (best of --rounds, each round running for at least --min-time seconds)
+and peak traced memory of a single call. Results are compared with bench_baselines.json and the run
+fails if a case is slower or uses more memory than the baseline by more than --tolerance. A case
+without a baseline also fails the run (--allow-missing-baseline only warns), so a missing or
+stale baseline file cannot silently turn the gate off.
+
+    python app/benchmarks.py                   # run and compare
+    python app/benchmarks.py --save-baseline   # record the current numbers as the new baseline
+    python app/benchmarks.py -k tex            # only cases whose name contains "tex"
+
+Baselines are machine-specific, so none is committed: record them with --save-baseline on the
+machine that runs the comparison.
+"""
+
+import argparse
+import gc
+import io
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+try:
+    from app import pdf_renderer, resume_builder, resume_sections, utils
+except ImportError:
+    import pdf_renderer
+    import resume_builder
+    import resume_sections
+    import utils
+
+APP_DIR = Path(__file__).resolve().parent
+FIXTURE_DIR = APP_DIR / "bench_fixtures"
+BASELINE_FILE = APP_DIR / "bench_baselines.json"
+
+RESUME_LINES = [
+    "Jordan Example",
+    "Atlanta, GA | jordan@example.com | +1 555-0100 | linkedin.com/in/jordan-example | github.com/jexample",
+    "EDUCATION",
+    "Georgia Institute of Technology - M.S. Analytics (Aug 2025 - Dec 2026)",
+    "EXPERIENCE",
+]
+BULLET = (
+    "Built demand forecasting models in Python and SQL for 40+ markets, cutting inventory waste by 20% "
+    "and presenting results to senior stakeholders; see https://example.com/case-study-{i}"
+)
+
+
+def _resume_text(bullets: int) -> list[str]:
+    lines = list(RESUME_LINES)
+    for i in range(bullets):
+        if i % 6 == 0:
+            lines.append(f"Company {i // 6} - Data Scientist (Jan {2015 + i // 6} - Dec {2016 + i // 6})")
+        lines.append("- " + BULLET.format(i=i))
+    lines += ["SKILLS", "Python, SQL, Spark, Airflow, Tableau, Power BI, PyTorch, scikit-learn"]
+    return lines
+
+
+def make_pdf_resume(bullets: int) -> bytes:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=letter)
+    y = 740
+    for i, line in enumerate(_resume_text(bullets)):
+        if y < 60:
+            c.showPage()
+            y = 740
+        c.setFont("Helvetica", 9)
+        c.drawString(40, y, line[:130])
+        if "linkedin.com" in line:
+            c.linkURL("https://linkedin.com/in/jordan-example", (40, y - 2, 400, y + 9))
+        y -= 13
+    c.save()
+    return buf.getvalue()
+
+
+def make_docx_resume(bullets: int) -> bytes:
+    import docx
+
+    document = docx.Document()
+    for line in _resume_text(bullets):
+        document.add_paragraph(line)
+    buf = io.BytesIO()
+    document.save(buf)
+    return buf.getvalue()
+
+
+def build_cases() -> dict:
+    """name -> zero-arg callable. Fixture loading happens here, outside the timed region."""
+    cases = {}
+
+    for label, bullets in (("1page", 12), ("3page", 90)):
+        pdf = make_pdf_resume(bullets)
+        docx_bytes = make_docx_resume(bullets)
+        cases[f"extract_pdf_{label}"] = lambda b=pdf: utils.extract_text_from_file(b, "resume.pdf")
+        cases[f"extract_docx_{label}"] = lambda b=docx_bytes: utils.extract_text_from_file(b, "resume.docx")
+        cases[f"heading_spans_pdf_{label}"] = lambda b=pdf: utils.extract_heading_lines(b, "resume.pdf")
+        cases[f"build_draft_{label}"] = lambda t="\n".join(_resume_text(bullets)): resume_sections.build_draft(t)
+
+    sample = "\n".join(_resume_text(90))
+    raw_links = utils.URL_PATTERN.findall(sample) * 5 + ["www.Example.com/a.", "HTTPS://GITHUB.COM/JEXAMPLE)"]
+    cases["url_findall"] = lambda: utils.URL_PATTERN.findall(sample)
+    cases["url_dedupe"] = lambda: utils._dedupe_links(raw_links)
+
+    for html_path in sorted(FIXTURE_DIR.glob("*.html")):
+        html = html_path.read_text(encoding="utf-8")
+        cases[f"jd_parse_{html_path.stem}"] = lambda h=html: resume_builder.parse_job_description_html(h)
+
+    for tex_path in (APP_DIR / "tex").glob("*.tex"):
+        tex = tex_path.read_text(encoding="utf-8")
+        cases[f"reduce_tex_spacing_{tex_path.stem}"] = lambda t=tex: resume_builder.reduce_tex_spacing(t)
+
+    profile_path = APP_DIR.parent / "master_candidate_profile.json"
+    if profile_path.exists():
+        profile = json.loads(profile_path.read_text(encoding="utf-8"))
+        long_profile = {**profile, "work_experience": (profile.get("work_experience") or []) * 2}
+        cases["render_pdf_reportlab_1page"] = lambda p=profile: pdf_renderer.render_profile_pdf(p)
+        cases["render_pdf_reportlab_shrink"] = lambda p=long_profile: pdf_renderer.render_profile_pdf(p)
+
+    for log_path in sorted(FIXTURE_DIR.glob("*.log")):
+        cases[f"page_count_{log_path.stem}"] = (
+            lambda stem=log_path.stem: resume_builder.get_pdf_page_count_from_log(FIXTURE_DIR, stem)
+        )
+    return cases
+
+
+def measure(fn, min_time: float, rounds: int) -> dict:
+    fn()  # warm caches and lazy imports
+    best = 0.0
+    for _ in range(rounds):
+        n = 0
+        t0 = time.perf_counter()
+        while True:
+            fn()
+            n += 1
+            elapsed = time.perf_counter() - t0
+            if elapsed >= min_time:
+                break
+        best = max(best, n / elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ops_per_sec": round(best, 2), "peak_kib": round(peak / 1024, 1)}
+
+
+def compare(results: dict, baselines: dict, tolerance: float) -> list[str]:
+    failures = []
+    for name, r in results.items():
+        base = baselines.get(name)
+        if not base:
+            continue
+        if r["ops_per_sec"] < base["ops_per_sec"] * (1 - tolerance):
+            failures.append(f"{name}: {r['ops_per_sec']:.1f} ops/s vs baseline {base['ops_per_sec']:.1f}")
+        if r["peak_kib"] > base["peak_kib"] * (1 + tolerance) + 1:
+            failures.append(f"{name}: peak {r['peak_kib']:.1f} KiB vs baseline {base['peak_kib']:.1f}")
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run micro-benchmarks and compare with stored baselines.")
+    parser.add_argument("-k", dest="pattern", default="", help="Only run cases whose name contains this.")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds per round.")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression, as a fraction.")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--allow-missing-baseline", action="store_true", help="Warn instead of failing for cases without a baseline."
+    )
+    args = parser.parse_args(argv)
+
+    baselines = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+    results = {}
+    print(f"{'case':<44}{'ops/sec':>12}{'peak KiB':>11}{'baseline':>12}")
+    for name, fn in build_cases().items():
+        if args.pattern not in name:
+            continue
+        results[name] = r = measure(fn, args.min_time, args.rounds)
+        base = baselines.get(name, {}).get("ops_per_sec")
+        base_str = f"{base:.1f}" if base else "-"
+        print(f"{name:<44}{r['ops_per_sec']:>12.1f}{r['peak_kib']:>11.1f}{base_str:>12}")
+
+    if args.save_baseline:
+        baselines.update(results)
+        args.baseline.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Saved {len(results)} baseline(s) to {args.baseline}")
+        return 0
+
+    failures = compare(results, baselines, args.tolerance)
+    for name in (n for n in results if not baselines.get(n)):
+        if args.allow_missing_baseline:
+            print(f"WARNING {name}: no baseline (run with --save-baseline)", file=sys.stderr)
+        else:
+            failures.append(f"{name}: no baseline (run with --save-baseline)")
+    for f in failures:
+        print(f"REGRESSION {f}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,4 @@
+import json
 import streamlit as st
 import requests
 from pathlib import Path
@@ -17,8 +18,8 @@ if "thread_id" not in st.session_state:
     st.session_state.thread_id = None
 if "target_job_url" not in st.session_state:
     st.session_state.target_job_url = ""
-if "upskill_agent" not in st.session_state:
-    st.session_state.upskill_agent = None
+if "upskill_session" not in st.session_state:
+    st.session_state.upskill_session = None
 if "tailored_output_name" not in st.session_state:
     st.session_state.tailored_output_name = None
 if "tailored_output_bytes" not in st.session_state:
@@ -47,6 +48,19 @@ def safe_post_json(url, **kwargs):
         return None
 
 
+def safe_get_json(url, **kwargs):
+    try:
+        res = requests.get(url, timeout=30, **kwargs)
+    except requests.RequestException as exc:
+        st.error(f"Request failed: {exc}")
+        return None
+    if res.status_code != 200:
+        st.error(f"⚠️ Backend Error {res.status_code}")
+        st.error(f"Raw backend response: {res.text}")
+        return None
+    return res.json()
+
+
 def normalize_job_url(raw_url: str) -> str:
     """Normalize JD URLs by stripping query params while preserving fragments."""
     u = (raw_url or "").strip()
@@ -106,6 +120,8 @@ elif st.session_state.status == "upload":
                 st.session_state.remaining_questions = response.get("remaining_questions", "?")
                 st.session_state.final_json = response.get("parsed_data", {})
                 st.session_state.focus_field = response.get("focus_field", "Profile Overview")
+                # The server's answer count (non-zero when an interview in progress is resumed)
+                st.session_state.answered = response.get("answered", 0)
                 st.session_state.messages.append({"role": "assistant", "content": first_question})
                 st.session_state.status = "chatting"
                 st.rerun()
@@ -166,7 +182,11 @@ elif st.session_state.status == "chatting":
             
         # Send answer to backend
         with st.spinner("Agent is thinking..."):
-            payload = {"thread_id": st.session_state.thread_id, "answers": prompt}
+            payload = {
+                "thread_id": st.session_state.thread_id,
+                "answers": prompt,
+                "expected_turn": st.session_state.get("answered"),
+            }
             response = safe_post_json(f"{API_URL}/answer-questions/", json=payload)
             if not response:
                 st.stop()
@@ -176,6 +196,7 @@ elif st.session_state.status == "chatting":
                 # Update the remaining count in session state from the backend response
                 st.session_state.remaining_questions = response.get("remaining_questions", "?")
                 st.session_state.focus_field = response.get("focus_field", st.session_state.get("focus_field", "Profile Overview"))
+                st.session_state.answered = response.get("answered")
                 st.session_state.messages.append({"role": "assistant", "content": next_question})
                 st.rerun()
             elif response["status"] == "completed":
@@ -214,7 +235,7 @@ elif st.session_state.status == "dashboard" or st.session_state.status == "compl
                 st.warning("Please enter a job URL first.")
             else:
                 st.session_state.status = "upskilling"
-                st.session_state.upskill_agent = None
+                st.session_state.upskill_session = None
                 st.rerun()
         
     if st.button("Log Out"):
@@ -234,11 +255,23 @@ elif st.session_state.status == "tailoring":
     if job_url:
         st.session_state.target_job_url = job_url
     
+    engine_label = st.radio(
+        "PDF engine:",
+        ["LaTeX (pdflatex)", "ReportLab (fast, no LaTeX)"],
+        horizontal=True,
+        help="ReportLab renders the tailored content directly, skipping the second AI pass and LaTeX compilation.",
+    )
+    engine = "reportlab" if engine_label.startswith("ReportLab") else "latex"
+
     col1, col2 = st.columns([1, 1])
     with col1:
         if st.button("Generate Tailored PDF", type="primary", use_container_width=True):
             if job_url:
-                with st.spinner("Tailoring your resume... This involves 2 AI passes and compiling LaTeX, so it may take a minute!"):
+                spinner_text = (
+                    "Tailoring your resume... This involves 2 AI passes and compiling LaTeX, so it may take a minute!"
+                    if engine == "latex" else "Tailoring your resume... One AI pass, then rendering the PDF directly."
+                )
+                with st.spinner(spinner_text):
                     import json
                     
                     # 1. Set up the exact folder structure your friend's script expects
@@ -257,7 +290,7 @@ elif st.session_state.status == "tailoring":
                         import resume_builder
                         
                         # Run the pipeline! It returns the path to the finished PDF.
-                        pdf_file_path = resume_builder.run(job_url=job_url, info_path=JSON_DIR / "info.json")
+                        pdf_file_path = resume_builder.run(job_url=job_url, info_path=JSON_DIR / "info.json", engine=engine)
                         
                         is_pdf = pdf_file_path.suffix.lower() == ".pdf"
                         if is_pdf:
@@ -285,7 +318,7 @@ elif st.session_state.status == "tailoring":
             )
             if st.button("Next: Build Upskill Plan", use_container_width=True):
                 st.session_state.status = "upskilling"
-                st.session_state.upskill_agent = None
+                st.session_state.upskill_session = None
                 st.rerun()
 
     with col2:
@@ -305,45 +338,66 @@ elif st.session_state.status == "upskilling":
         st.error("No target job URL found. Please go back to dashboard and add one.")
         st.stop()
 
-    if st.session_state.upskill_agent is None:
-        try:
-            import os
-            import resume_builder
-            from upskill_llm import LLMClient
-            from upskill_agent import UpskillAgent
-
-            jd_url = st.session_state.target_job_url
-            jd_text = resume_builder.fetch_job_description(jd_url) if jd_url.startswith("http") else jd_url
-            provider = os.environ.get("UPSKILL_LLM_PROVIDER", "openai")
-            llm = LLMClient(provider=provider)
-            agent = UpskillAgent(llm)
-            agent.start(st.session_state.final_json, jd_text)
-            st.session_state.upskill_agent = agent
-        except Exception as e:
-            st.error(f"Failed to initialize upskill agent: {e}")
+    if st.session_state.upskill_session is None:
+        # The agent runs in the API; a session for this user and job is resumed if one exists.
+        with st.spinner("Preparing your upskill session..."):
+            session = safe_post_json(
+                f"{API_URL}/upskill/sessions",
+                json={"email": st.session_state.thread_id, "job_url": st.session_state.target_job_url},
+            )
+        if session is None:
             st.stop()
+        st.session_state.upskill_session = session
 
-    agent = st.session_state.upskill_agent
-    context = agent.context
-    current_stage = context.get("current_stage", "")
+    session = st.session_state.upskill_session
+    session_url = f"{API_URL}/upskill/sessions/{session['session_id']}"
+    if session.get("resumed"):
+        st.caption("Resumed your saved session for this job.")
 
-    for msg in context.get("conversation", []):
+    for msg in session.get("conversation", []):
         role = "assistant" if msg["speaker"] == "agent" else "user"
         with st.chat_message(role):
             st.markdown(msg["text"])
 
-    if plan := context.get("plan"):
+    if plan := session.get("plan"):
         st.markdown("### Current Plan")
         st.markdown(plan)
 
     if user_msg := st.chat_input("Respond to continue building/refining your plan..."):
-        if current_stage == "target_job_confirmation":
-            agent.handle_user_response(user_msg)
-        elif current_stage == "follow_ups":
-            agent.handle_followup_response(user_msg)
+        with st.chat_message("user"):
+            st.markdown(user_msg)
+        failed = False
+        if session["stage"] == "target_job_confirmation":
+            failed = safe_post_json(f"{session_url}/messages", json={"message": user_msg}) is None
         else:
-            agent.refine_plan(user_msg)
-        st.rerun()
+            # Plans are long: show them as they stream instead of after the whole reply.
+            with st.chat_message("assistant"):
+                placeholder = st.empty()
+                text = ""
+                try:
+                    with requests.post(f"{session_url}/messages/stream", json={"message": user_msg}, stream=True, timeout=300) as res:
+                        if res.status_code != 200:
+                            st.error(f"⚠️ Backend Error {res.status_code}: {res.text}")
+                            failed = True
+                        else:
+                            for line in res.iter_lines(decode_unicode=True):
+                                if not line:
+                                    continue
+                                frame = json.loads(line)
+                                if "error" in frame:
+                                    st.error(f"⚠️ Backend Error {frame.get('status')}: {frame['error']}")
+                                    failed = True
+                                    break
+                                text += frame.get("delta", "")
+                                placeholder.markdown(text + "▌")
+                except requests.RequestException as exc:
+                    st.error(f"Request failed: {exc}")
+                    failed = True
+        refreshed = safe_get_json(session_url)
+        if refreshed is not None:
+            st.session_state.upskill_session = refreshed
+        if not failed:  # keep the error on screen; the next message redraws the saved conversation
+            st.rerun()
 
     col1, col2 = st.columns(2)
     with col1:
@@ -358,7 +412,7 @@ elif st.session_state.status == "upskilling":
                 )
                 safe = re.sub(r"[^\w\s-]", "", str(name)).replace(" ", "_")
                 out_path = Path.cwd() / f"upskill_plan_{safe}.md"
-                out_path.write_text(context.get("plan", ""), encoding="utf-8")
+                out_path.write_text(session.get("plan", ""), encoding="utf-8")
                 st.success(f"Saved to {out_path.name}")
             except Exception as e:
                 st.error(f"Could not save plan: {e}")
@@ -0,0 +1,184 @@
+# app/checkpoint_store.py
+"""
+Compact in-memory checkpoints for the interview graph.
+
+InMemorySaver keeps every checkpoint of every thread, plus a new serialized copy of each channel
+(chat_history, extracted_data, ...) whenever it changes, so memory grows with turns x profile size.
+Two things keep a thread small:
+
+  - Large immutable inputs (the resume text) live once in a content-addressed BlobStore; the graph
+    state carries only the "sha256:..." ref. Identical resumes across threads share one copy.
+  - CompactSaver keeps only the latest CHECKPOINT_KEEP checkpoints per thread, together with their
+    pending writes and the channel versions they reference; older ones are dropped on every put.
+
+footprint() / report() account for what each thread holds (see GET /metrics/checkpoints).
+
+    CHECKPOINT_KEEP   checkpoints kept per thread (default 4; the graph needs only the latest)
+"""
+import hashlib
+import os
+import threading
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+KEEP_CHECKPOINTS = max(1, int(os.getenv("CHECKPOINT_KEEP", "4")))
+
+
+class BlobStore:
+    """Content-addressed text blobs. Each owner (thread) holds at most one resume at a time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blobs: dict[str, str] = {}
+        self._holders: dict[str, set[str]] = {}  # ref -> owners
+        self._owned: dict[str, str] = {}  # owner -> ref
+
+    @staticmethod
+    def ref_for(text: str) -> str:
+        return "sha256:" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def put(self, text: str, owner: str) -> str:
+        """Store `text` for `owner` (replacing what it held before) and return its ref."""
+        ref = self.ref_for(text)
+        with self._lock:
+            self._blobs.setdefault(ref, text)
+            previous = self._owned.get(owner)
+            if previous != ref:
+                self._owned[owner] = ref
+                self._holders.setdefault(ref, set()).add(owner)
+                if previous:
+                    self._drop(previous, owner)
+        return ref
+
+    def get(self, ref: str) -> str:
+        return self._blobs[ref]
+
+    def release(self, owner: str) -> None:
+        with self._lock:
+            ref = self._owned.pop(owner, None)
+            if ref:
+                self._drop(ref, owner)
+
+    def _drop(self, ref: str, owner: str) -> None:
+        holders = self._holders.get(ref, set())
+        holders.discard(owner)
+        if not holders:
+            self._holders.pop(ref, None)
+            self._blobs.pop(ref, None)
+
+    def owned_by(self, owner: str) -> str | None:
+        return self._owned.get(owner)
+
+    def size(self, ref: str | None) -> int:
+        return len(self._blobs.get(ref, "").encode("utf-8")) if ref else 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stored = sum(len(t.encode("utf-8")) for t in self._blobs.values())
+            referenced = sum(self.size(ref) * len(holders) for ref, holders in self._holders.items())
+            return {"blobs": len(self._blobs), "owners": len(self._owned), "bytes": stored, "bytes_saved_by_dedup": referenced - stored}
+
+
+blobs = BlobStore()
+
+
+def resume_text(state: dict) -> str:
+    """The resume text behind the state's ref (older states may still carry the text itself)."""
+    ref = state.get("resume_ref")
+    return blobs.get(ref) if ref else state.get("resume_text") or ""
+
+
+def _nbytes(value) -> int:
+    """Serialized size of a stored entry (nested tuples of serde (type, bytes) pairs and strings)."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(v) for v in value)
+    return 0
+
+
+class CompactSaver(InMemorySaver):
+    """InMemorySaver that prunes each thread to its latest `keep` checkpoints."""
+
+    def __init__(self, keep: int = KEEP_CHECKPOINTS, blob_store: BlobStore = blobs, **kwargs):
+        super().__init__(**kwargs)
+        self.keep = keep
+        self.blob_store = blob_store
+        self._lock = threading.Lock()
+        self.pruned = {"checkpoints": 0, "writes": 0, "blob_versions": 0}
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        self.prune(config["configurable"]["thread_id"], config["configurable"].get("checkpoint_ns", ""))
+        return next_config
+
+    def _channel_versions(self, saved) -> set:
+        return set(self.serde.loads_typed(saved[0]).get("channel_versions", {}).items())
+
+    def prune(self, thread_id: str, checkpoint_ns: str = "") -> int:
+        """Drop all but the latest `keep` checkpoints of a thread and the blobs only they reference."""
+        with self._lock:
+            checkpoints = self.storage.get(thread_id, {}).get(checkpoint_ns)
+            if not checkpoints or len(checkpoints) <= self.keep:
+                return 0
+            # Checkpoint ids are time-ordered (uuid6), as InMemorySaver itself relies on.
+            ids = sorted(checkpoints)
+            dropped, kept = ids[: -self.keep], ids[-self.keep :]
+            live = set().union(*(self._channel_versions(checkpoints[cid]) for cid in kept))
+            stale = set()
+            for cid in dropped:
+                stale |= self._channel_versions(checkpoints.pop(cid))
+                if self.writes.pop((thread_id, checkpoint_ns, cid), None) is not None:
+                    self.pruned["writes"] += 1
+            for channel, version in stale - live:
+                if self.blobs.pop((thread_id, checkpoint_ns, channel, version), None) is not None:
+                    self.pruned["blob_versions"] += 1
+            self.pruned["checkpoints"] += len(dropped)
+            return len(dropped)
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        self.blob_store.release(thread_id)
+
+    def footprint(self, thread_id: str) -> dict:
+        """Approximate serialized bytes held for one thread."""
+        namespaces = self.storage.get(thread_id, {})
+        checkpoints = sum(len(c) for c in namespaces.values())
+        checkpoint_bytes = sum(_nbytes(saved) for c in namespaces.values() for saved in c.values())
+        writes = [w for key, w in list(self.writes.items()) if key[0] == thread_id]
+        channels: dict[str, int] = {}
+        versions = 0
+        for (tid, _, channel, _), value in list(self.blobs.items()):
+            if tid == thread_id:
+                versions += 1
+                channels[channel] = channels.get(channel, 0) + _nbytes(value)
+        resume_ref = self.blob_store.owned_by(thread_id)
+        return {
+            "thread_id": thread_id,
+            "checkpoints": checkpoints,
+            "checkpoint_bytes": checkpoint_bytes,
+            "pending_writes": sum(len(w) for w in writes),
+            "writes_bytes": sum(_nbytes(v) for w in writes for v in w.values()),
+            "channel_versions": versions,
+            "channel_bytes": dict(sorted(channels.items(), key=lambda kv: -kv[1])),
+            "resume_ref": resume_ref,
+            "resume_bytes": self.blob_store.size(resume_ref),
+            "total_bytes": checkpoint_bytes + sum(channels.values()) + sum(_nbytes(v) for w in writes for v in w.values()),
+        }
+
+    def report(self, top: int = 20) -> dict:
+        threads = [self.footprint(t) for t in list(self.storage)]
+        threads.sort(key=lambda f: -f["total_bytes"])
+        total = sum(f["total_bytes"] for f in threads)
+        return {
+            "keep_per_thread": self.keep,
+            "threads": len(threads),
+            "checkpoints": sum(f["checkpoints"] for f in threads),
+            "total_bytes": total,
+            "mean_bytes_per_thread": round(total / len(threads)) if threads else 0,
+            "pruned": dict(self.pruned),
+            "resume_blobs": self.blob_store.snapshot(),
+            "largest_threads": threads[:top],
+        }
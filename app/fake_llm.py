@@ -0,0 +1,310 @@
+"""
+Deterministic, offline stand-in for the OpenAI chat completions API.
+
+Point every client in this repo at it with environment variables, no code changes needed:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8099/v1 OPENAI_API_KEY=fake uvicorn app.main:app
+
+`ChatOpenAI` (app/agent.py), the `OpenAI` client in resume_builder.py and `LLMClient` in
+upskill_llm.py all read OPENAI_BASE_URL. Responses are derived from a hash of the request, so the
+same prompt always yields the same reply:
+
+- structured output (tool calls or `response_format: json_schema`) is generated from the JSON schema
+  in the request, so `ExtractionResult` payloads validate; interview turns stop asking questions once
+  the chat history holds `complete_after` user answers.
+- the tailoring prompts get the input info.json echoed back (step 1) or a minimal .tex (step 2).
+- anything else gets filler prose.
+
+Latency is `latency_ms` before the first token plus `completion_tokens / tokens_per_sec`; with
+`stream: true` the tokens are sent as SSE chunks at that rate, followed by a chunk with `usage` and no
+choices when the request sets `stream_options: {"include_usage": true}`.
+
+Run: python app/fake_llm.py --port 8099 --latency-ms 400 --tokens-per-sec 80
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "data pipeline model analytics python sql dashboard stakeholder latency revenue forecast "
+    "customer platform experiment launch insight team metric cloud research product"
+).split()
+
+MINIMAL_TEX = (
+    "\\documentclass[letterpaper,11pt]{article}\n\\begin{document}\n"
+    "\\section{Experience}\nGenerated offline by fake_llm.\n\\end{document}\n"
+)
+
+
+class FakeLLMConfig:
+    def __init__(self, latency_ms: float = 300.0, tokens_per_sec: float = 100.0, complete_after: int = 3):
+        self.latency_ms = latency_ms
+        self.tokens_per_sec = tokens_per_sec
+        self.complete_after = complete_after
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _fake_string(key: str, rng: random.Random) -> str:
+    k = key.lower()
+    if "email" in k:
+        return "candidate@example.com"
+    if "phone" in k:
+        return "+1 555-0100"
+    if k in {"linkedin", "github", "portfolio", "link"}:
+        return f"https://example.com/{k}"
+    if "date" in k:
+        return f"{rng.choice(['Jan', 'Jun', 'Sep'])} {rng.randint(2015, 2024)}"
+    n = 6 if k in {"description", "experience_context"} or k.endswith("s") else 3
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize()
+
+
+def fake_from_schema(schema: dict, rng: random.Random, defs: dict | None = None, key: str = ""):
+    """Build a deterministic instance that validates against a (pydantic-generated) JSON schema."""
+    defs = defs if defs is not None else schema.get("$defs", schema.get("definitions", {}))
+    if "$ref" in schema:
+        return fake_from_schema(defs[schema["$ref"].split("/")[-1]], rng, defs, key)
+    for combiner in ("anyOf", "oneOf"):
+        if combiner in schema:
+            options = [o for o in schema[combiner] if o.get("type") != "null"] or schema[combiner]
+            return fake_from_schema(options[0], rng, defs, key)
+    if "allOf" in schema:
+        return fake_from_schema(schema["allOf"][0], rng, defs, key)
+    if "enum" in schema:
+        return schema["enum"][0]
+
+    t = schema.get("type")
+    if isinstance(t, list):
+        t = next((x for x in t if x != "null"), "null")
+    if t == "object" or "properties" in schema:
+        props = schema.get("properties")
+        if props:
+            return {name: fake_from_schema(sub, rng, defs, name) for name, sub in props.items()}
+        extra = schema.get("additionalProperties")
+        return {"value": fake_from_schema(extra, rng, defs, key)} if isinstance(extra, dict) else {}
+    if t == "array":
+        return [fake_from_schema(schema.get("items", {}), rng, defs, key) for _ in range(rng.randint(1, 2))]
+    if t == "integer":
+        return rng.randint(0, 5)
+    if t == "number":
+        return round(rng.uniform(0, 5), 2)
+    if t == "boolean":
+        return False
+    if t == "null":
+        return None
+    return _fake_string(key, rng)
+
+
+def _structured_reply(schema: dict, prompt: str, rng: random.Random, cfg: FakeLLMConfig) -> dict:
+    payload = fake_from_schema(schema, rng)
+    props = schema.get("properties", {})
+    if "question_plan" in props and "assistant_message" in props:
+        # Interview turns: count answered questions in the formatted chat history.
+        answered = len(re.findall(r"^USER:", prompt, flags=re.MULTILINE))
+        remaining = max(0, cfg.complete_after - answered)
+        payload["assistant_message"] = (
+            None if remaining == 0 else f"Thanks! Question {answered + 1}: what measurable impact did that work have?"
+        )
+        if remaining == 0:
+            payload["question_plan"] = []
+    return payload
+
+
+def _text_reply(prompt: str, rng: random.Random) -> str:
+    if "INFO.JSON" in prompt:
+        body = prompt.split("INFO.JSON", 1)[1]
+        start = body.find("{")
+        try:
+            return json.dumps(json.loads(body[start:].strip()))
+        except (ValueError, json.JSONDecodeError):
+            return "{}"
+    if "\\documentclass" in prompt:
+        return MINIMAL_TEX
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))).capitalize() + "."
+
+
+def build_completion(request: dict, cfg: FakeLLMConfig) -> dict:
+    """Return {"content"| "tool_call", "prompt_tokens", "completion_tokens"} for a chat request."""
+    messages = request.get("messages") or []
+    prompt = "\n".join(str(m.get("content") or "") for m in messages)
+    seed = hashlib.sha256(json.dumps(messages, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    rng = random.Random(seed)
+
+    tool_call = None
+    content = None
+    tools = request.get("tools") or []
+    response_format = request.get("response_format") or {}
+    if tools:
+        fn = tools[0].get("function", {})
+        args = _structured_reply(fn.get("parameters", {}), prompt, rng, cfg)
+        tool_call = {"name": fn.get("name", "tool"), "arguments": json.dumps(args)}
+        out_text = tool_call["arguments"]
+    elif response_format.get("type") == "json_schema":
+        schema = (response_format.get("json_schema") or {}).get("schema", {})
+        content = json.dumps(_structured_reply(schema, prompt, rng, cfg))
+        out_text = content
+    else:
+        content = _text_reply(prompt, rng)
+        out_text = content
+    return {
+        "content": content,
+        "tool_call": tool_call,
+        "prompt_tokens": _estimate_tokens(prompt),
+        "completion_tokens": _estimate_tokens(out_text),
+    }
+
+
+def _usage(result: dict) -> dict:
+    return {
+        "prompt_tokens": result["prompt_tokens"],
+        "completion_tokens": result["completion_tokens"],
+        "total_tokens": result["prompt_tokens"] + result["completion_tokens"],
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    cfg: FakeLLMConfig = FakeLLMConfig()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - keep the load test output quiet
+        pass
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "fake", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "invalid JSON body"}})
+            return
+
+        cfg = self.cfg
+        result = build_completion(request, cfg)
+        model = request.get("model", "fake")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        time.sleep(cfg.latency_ms / 1000.0)
+        per_token = 1.0 / cfg.tokens_per_sec if cfg.tokens_per_sec > 0 else 0.0
+
+        if request.get("stream"):
+            include_usage = bool((request.get("stream_options") or {}).get("include_usage"))
+            self._stream(completion_id, model, result, per_token, include_usage)
+            return
+
+        time.sleep(result["completion_tokens"] * per_token)
+        message = {"role": "assistant", "content": result["content"]}
+        finish_reason = "stop"
+        if result["tool_call"]:
+            message["tool_calls"] = [{
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": result["tool_call"],
+            }]
+            finish_reason = "tool_calls"
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": _usage(result),
+        })
+
+    def _stream(self, completion_id: str, model: str, result: dict, per_token: float, include_usage: bool = False) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def send(delta: dict | None, finish_reason=None, usage=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [] if delta is None else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if include_usage:
+                # As the API does: null on every chunk but the last, which carries the totals.
+                chunk["usage"] = usage
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        send({"role": "assistant", "content": ""})
+        if result["tool_call"]:
+            time.sleep(result["completion_tokens"] * per_token)
+            send({"tool_calls": [{
+                "index": 0,
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": result["tool_call"],
+            }]})
+            send({}, "tool_calls")
+        else:
+            text = result["content"] or ""
+            # ~4 characters per token, matching _estimate_tokens.
+            for i in range(0, len(text), 4):
+                send({"content": text[i:i + 4]})
+                time.sleep(per_token)
+            send({}, "stop")
+        if include_usage:
+            send(None, usage=_usage(result))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def start_server(host: str = "127.0.0.1", port: int = 8099, cfg: FakeLLMConfig | None = None) -> ThreadingHTTPServer:
+    """Start the stand-in on a daemon thread and return the server (call .shutdown() to stop)."""
+    handler = type("FakeLLMHandler", (_Handler,), {"cfg": cfg or FakeLLMConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible stand-in for load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Delay before the first token.")
+    parser.add_argument("--tokens-per-sec", type=float, default=100.0, help="Decode rate; 0 disables it.")
+    parser.add_argument("--complete-after", type=int, default=3, help="Interview answers before the interview stops planning questions.")
+    args = parser.parse_args(argv)
+
+    cfg = FakeLLMConfig(args.latency_ms, args.tokens_per_sec, args.complete_after)
+    server = start_server(args.host, args.port, cfg)
+    print(f"Fake LLM listening on http://{args.host}:{args.port}/v1 (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# app/gaps.py
+"""
+Rule-based gap analysis of a CandidateProfile, used to plan the interview and decide completion.
+
+find_gaps() returns a prioritized queue (most important first):
+  metrics   - a job whose bullets carry no numbers / percentages / amounts and has no metrics listed
+  dates     - a job or education entry missing its start or end date
+  skills    - a job without skills_used
+  projects  - no projects at all
+  links     - no LinkedIn; no GitHub/portfolio for a technical profile
+
+Each gap carries a ready-to-ask question, so the agent can serve the queue without an LLM call.
+The model's batched follow-ups (planned_questions) are queued in the same shape.
+apply_answer() folds an answer in locally where that is reliable (declines, links, dates, short
+list-shaped skill replies such as "Python, SQL and Tableau") and otherwise reports that the model is
+needed. Gaps that were asked once are "closed" by
+the caller and never asked again, even if the answer did not fill them.
+"""
+import re
+
+try:
+    from app.resume_sections import BARE_PROFILE_URL, DATE_RANGE_PATTERN, parse_skills
+    from app.utils import URL_PATTERN
+except ImportError:
+    from resume_sections import BARE_PROFILE_URL, DATE_RANGE_PATTERN, parse_skills
+    from utils import URL_PATTERN
+
+METRIC_PATTERN = re.compile(
+    r"[$€£¥]\s?\d"
+    r"|\d+(?:[.,]\d+)?\s?(?:%|percent\b|x\b|k\b|m\b|mm\b|bn?\b|\+)"
+    r"|\b(?!(?:19|20)\d{2}\b)\d{2,}(?:,\d{3})*\b"
+    r"|\b\d+(?:\.\d+)?\s*(?:users|customers|clients|people|engineers|members|teams|countries|markets|hours|days"
+    r"|weeks|months|ms|seconds|requests|transactions|records|stores|sites)\b",
+    re.IGNORECASE,
+)
+DECLINE_PATTERN = re.compile(
+    r"^\s*(?:no|nope|none|nothing|n/?a|not really|not applicable|pass|next|i don'?t|i do not|don'?t have|"
+    r"dont have|i have no|i haven'?t|no idea|not sure|can'?t share|cannot share|rather not)\b",
+    re.IGNORECASE,
+)
+MAX_DECLINE_WORDS = 12
+
+# Corrections that make queued questions stale ("actually I left Acme in 2021", "that's wrong").
+INVALIDATION_PATTERN = re.compile(
+    r"\b(?:actually|correction|that'?s (?:not right|wrong|incorrect)|not correct|i never|never worked|"
+    r"no longer|i left|remove|delete|instead of)\b",
+    re.IGNORECASE,
+)
+
+# Skill answers are only taken locally as a bare list: short items separated by commas, "and" or "&".
+SKILL_LIST_SPLIT = re.compile(r"\s*(?:,|;|&|\band\b)\s*", re.IGNORECASE)
+SKILL_ITEM = re.compile(r"^[\w+#./\- ]+$")
+MAX_SKILL_ITEM_WORDS = 3
+# Pronouns, verbs and fillers that mark a sentence rather than a list ("I used Python, SQL mostly").
+PROSE_WORDS = frozenset(
+    "i me my we our us you they it he she this that used use using worked work working built build did do does "
+    "have has had was were is am are been mostly mainly some plus also lots lot bit little like with "
+    "primarily usually sometimes etc".split()
+)
+
+# "planned" are the model's batched questions (see planned_questions), served between the
+# structural gaps and the low-priority ones.
+PRIORITY = {"metrics": 0, "dates": 10, "skills": 20, "education_dates": 30, "planned": 35, "projects": 40, "links": 50}
+
+
+def has_metric(text: str) -> bool:
+    return bool(METRIC_PATTERN.search(text or ""))
+
+
+def _shorten(text: str, limit: int = 110) -> str:
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[: limit - 1].rsplit(" ", 1)[0] + "…"
+
+
+def _job_label(job: dict) -> str:
+    role, company = job.get("role") or "", job.get("company") or ""
+    if role and company:
+        return f"your role as {role} at {company}"
+    return f"your time at {company}" if company else f"your role as {role}" if role else "that role"
+
+
+def find_gaps(profile: dict | None, closed: list[str] | set[str] = ()) -> list[dict]:
+    """Prioritized gap queue for `profile`, skipping gap ids in `closed`."""
+    data = profile or {}
+    closed = set(closed or ())
+    queue = []
+
+    def add(gap_id, kind, section, index, rank, question):
+        if gap_id not in closed:
+            queue.append({
+                "id": gap_id, "kind": kind, "section": section, "index": index,
+                "priority": PRIORITY[kind] + rank, "question": question,
+            })
+
+    # Work experience is assumed most-recent-first, so earlier entries rank higher.
+    for i, job in enumerate(data.get("work_experience") or []):
+        bullets = [b for b in job.get("bullets") or [] if b]
+        weak = [b for b in bullets if not has_metric(b)]
+        if weak and not job.get("metrics") and not any(has_metric(b) for b in bullets):
+            add(f"work_experience.{i}.metrics", "metrics", "work_experience", i, i,
+                f"For {_job_label(job)}, you wrote \"{_shorten(weak[0])}\". What was the measurable result? "
+                "For example: how many users it reached, time or money saved, or the % improvement.")
+        if not job.get("start_date") or not job.get("end_date"):
+            add(f"work_experience.{i}.dates", "dates", "work_experience", i, i,
+                f"When did you start and finish {_job_label(job)}? Month and year is perfect (or \"Present\").")
+        if not job.get("skills_used"):
+            add(f"work_experience.{i}.skills", "skills", "work_experience", i, i,
+                f"Which tools and technologies did you use day to day in {_job_label(job)}?")
+
+    for i, edu in enumerate(data.get("education") or []):
+        if not edu.get("start_date") or not edu.get("end_date"):
+            school = edu.get("institution") or "that program"
+            add(f"education.{i}.dates", "education_dates", "education", i, i,
+                f"When did you start and finish (or expect to finish) your studies at {school}?")
+
+    if not data.get("projects"):
+        add("projects", "projects", "projects", None, 0,
+            "Do you have a side project, hackathon entry or open-source contribution you're proud of? "
+            "What did you build and what came of it?")
+
+    personal = data.get("personal_info") or {}
+    technical = (data.get("skills") or {}).get("technical") or []
+    if not personal.get("linkedin"):
+        add("personal_info.linkedin", "links", "personal_info", None, 0,
+            "Could you share your LinkedIn profile URL so we can include it?")
+    if technical and not personal.get("github") and not personal.get("portfolio"):
+        add("personal_info.github", "links", "personal_info", None, 1,
+            "Do you have a GitHub profile or portfolio site that shows your work? Please share the link.")
+
+    queue.sort(key=lambda g: g["priority"])
+    return queue
+
+
+def planned_questions(plan, start: int) -> list[dict]:
+    """Gap-shaped queue items for the model's question plan, numbered from `start`."""
+    items = []
+    for i, item in enumerate(plan):
+        question = item.get("question") if isinstance(item, dict) else item.question
+        field = item.get("target_field") if isinstance(item, dict) else item.target_field
+        if question and question.strip():
+            items.append({
+                "id": f"plan.{start + len(items)}", "kind": "planned", "section": field or "Candidate Profile",
+                "index": None, "priority": PRIORITY["planned"] + i / 100, "question": question.strip(),
+            })
+    return items
+
+
+def invalidates_plan(answer: str) -> bool:
+    return bool(INVALIDATION_PATTERN.search(answer or ""))
+
+
+def is_decline(answer: str) -> bool:
+    return bool(DECLINE_PATTERN.match(answer or "")) and len((answer or "").split()) <= MAX_DECLINE_WORDS
+
+
+def is_clarifying_question(answer: str) -> bool:
+    return (answer or "").strip().endswith("?")
+
+
+def skill_list(answer: str) -> list[str] | None:
+    """The items of a list-shaped skills answer, or None if it reads like prose."""
+    text = (answer or "").strip().rstrip(".")
+    items = [item for item in SKILL_LIST_SPLIT.split(text) if item]
+    if not items:
+        return None
+    for item in items:
+        words = item.lower().split()
+        if len(words) > MAX_SKILL_ITEM_WORDS or not SKILL_ITEM.match(item) or PROSE_WORDS.intersection(words):
+            return None
+    return items
+
+
+def apply_answer(profile: dict, gap: dict, answer: str) -> str:
+    """
+    Fold `answer` to `gap` into `profile` in place where it can be done without a model.
+    Returns "declined", "applied" or "needs_llm".
+    """
+    if is_decline(answer):
+        return "declined"
+
+    kind, index = gap["kind"], gap.get("index")
+    if kind == "links":
+        found = URL_PATTERN.findall(answer) + BARE_PROFILE_URL.findall(answer)
+        if not found:
+            return "needs_llm"
+        personal = profile.setdefault("personal_info", {}) or {}
+        for url in found:
+            url = url.rstrip(".,;)")
+            url = url if "://" in url else f"https://{url}"
+            low = url.lower()
+            key = "linkedin" if "linkedin.com/" in low else "github" if "github.com/" in low else "portfolio"
+            if not personal.get(key):
+                personal[key] = url
+        profile["personal_info"] = personal
+        return "applied"
+
+    if kind in ("dates", "education_dates"):
+        match = DATE_RANGE_PATTERN.search(answer)
+        entries = profile.get(gap["section"]) or []
+        if not match or index is None or index >= len(entries):
+            return "needs_llm"
+        end = match.group("end")
+        entries[index]["start_date"] = entries[index].get("start_date") or match.group("start")
+        entries[index]["end_date"] = entries[index].get("end_date") or (
+            "Present" if end.lower() in ("present", "current", "now", "ongoing", "today") else end
+        )
+        return "applied"
+
+    if kind == "skills":
+        items = skill_list(answer)
+        parsed = parse_skills([", ".join(items)]) if items else None
+        entries = profile.get("work_experience") or []
+        if not parsed or index is None or index >= len(entries):
+            return "needs_llm"
+        skills = [s for group in parsed.values() for s in group]
+        entries[index]["skills_used"] = list(dict.fromkeys((entries[index].get("skills_used") or []) + skills))
+        return "applied"
+
+    return "needs_llm"
@@ -0,0 +1,112 @@
+"""
+Import-time profile of the API worker.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter (nothing is cached in this
+process), then prints the wall time of the import, the packages that cost the most (self time summed
+per top-level package) and the slowest individual imports (cumulative time). Heavy dependencies that
+should only load on first use (langgraph, langchain_openai, fitz, docx) are flagged if they show up.
+
+    python app/importtime_report.py                          # profile app.main from the repo root
+    python app/importtime_report.py --json > before.json     # keep a run...
+    python app/importtime_report.py --baseline before.json   # ...and show the per-package change
+
+Run it from the repository root (the directory that contains app/).
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+LAZY_PACKAGES = ("langgraph", "langchain_openai", "langchain_core", "openai", "fitz", "pymupdf", "docx", "reportlab")
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_imports(module: str = "app.main") -> dict:
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_DIR, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.strip().splitlines()[-5:])
+        raise RuntimeError(f"import {module} failed:\n{tail}")
+
+    modules = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            modules.append({
+                "module": m.group(4),
+                "self_ms": int(m.group(1)) / 1000,
+                "cumulative_ms": int(m.group(2)) / 1000,
+                "depth": len(m.group(3)) // 2,
+            })
+    packages: dict[str, float] = {}
+    for entry in modules:
+        top = entry["module"].split(".")[0]
+        packages[top] = packages.get(top, 0.0) + entry["self_ms"]
+    target = next((e for e in modules if e["module"] == module), None)
+    return {
+        "module": module,
+        "interpreter_wall_ms": round(wall * 1000, 1),
+        "import_ms": round(target["cumulative_ms"], 1) if target else None,
+        "modules_loaded": len(modules),
+        "packages": {k: round(v, 1) for k, v in sorted(packages.items(), key=lambda kv: -kv[1])},
+        "slowest": sorted(modules, key=lambda e: -e["cumulative_ms"]),
+        "eager_heavy": sorted({p for p in packages if p in LAZY_PACKAGES}),
+    }
+
+
+def format_report(report: dict, top: int = 15, baseline: dict | None = None) -> str:
+    lines = [
+        f"import {report['module']}: {report['import_ms']} ms "
+        f"({report['modules_loaded']} modules; {report['interpreter_wall_ms']} ms including interpreter start)",
+    ]
+    if baseline:
+        lines[0] += f"  [baseline {baseline.get('import_ms')} ms]"
+    lines += ["", f"{'Package (self time)':<34}{'ms':>10}" + (f"{'change':>10}" if baseline else ""), "-" * (54 if baseline else 44)]
+    for name, ms in list(report["packages"].items())[:top]:
+        row = f"{name:<34}{ms:>10.1f}"
+        if baseline:
+            row += f"{ms - baseline.get('packages', {}).get(name, 0.0):>+10.1f}"
+        lines.append(row)
+    if baseline:
+        gone = [p for p in baseline.get("packages", {}) if p not in report["packages"]]
+        if gone:
+            lines.append(f"no longer imported: {', '.join(gone)}")
+    lines += ["", f"{'Slowest imports (cumulative)':<54}{'ms':>10}", "-" * 64]
+    for entry in report["slowest"][:top]:
+        lines.append(f"{'  ' * min(entry['depth'], 4) + entry['module']:<54}{entry['cumulative_ms']:>10.1f}")
+    lines.append("")
+    if report["eager_heavy"]:
+        lines.append(f"loaded eagerly (should be lazy): {', '.join(report['eager_heavy'])}")
+    else:
+        lines.append("no heavy dependencies loaded at import time")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time profile of the API worker.")
+    parser.add_argument("--module", default="app.main", help="Module to import (default app.main).")
+    parser.add_argument("--top", type=int, default=15, help="Rows per table.")
+    parser.add_argument("--json", action="store_true", help="Print the raw report as JSON.")
+    parser.add_argument("--baseline", type=Path, help="A previous --json report to compare against.")
+    args = parser.parse_args(argv)
+
+    report = profile_imports(args.module)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else None
+        print(format_report(report, args.top, baseline))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Incremental parsing of a streamed JSON object, one top-level member at a time.
+
+The tailoring LLM returns one large object ({"personal_info": {...}, "education": [...], ...}).
+SectionStream is fed the raw text as tokens arrive and hands back each top-level (key, value) as
+soon as its closing bracket (or the following comma) is seen, so later stages can start on a
+section while the rest of the object is still being generated. A leading markdown fence is ignored.
+"""
+
+import json
+
+
+class SectionStream:
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._member_start = None
+        self.sections: dict = {}
+
+    def feed(self, chunk: str) -> list[tuple[str, object]]:
+        """Consume more text; return the top-level members completed by it, in order."""
+        self._text += chunk or ""
+        done = []
+        text = self._text
+        while self._pos < len(text):
+            ch = text[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._member_start is None:
+                    self._member_start = self._pos
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 1:
+                    done.append(self._close_member())
+                self._depth -= 1
+            elif ch == "," and self._depth == 1:
+                done.append(self._close_member())
+            self._pos += 1
+        return [member for member in done if member]
+
+    def _close_member(self):
+        if self._member_start is None:
+            return None
+        fragment = self._text[self._member_start:self._pos]
+        self._member_start = None
+        try:
+            parsed = json.loads("{" + fragment + "}")
+        except json.JSONDecodeError:
+            return None
+        if len(parsed) != 1:
+            return None
+        key, value = next(iter(parsed.items()))
+        self.sections[key] = value
+        return key, value
+
+    @property
+    def text(self) -> str:
+        return self._text
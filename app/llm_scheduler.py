@@ -0,0 +1,231 @@
+# app/llm_scheduler.py
+"""
+Process-wide, priority-aware rate limiting for OpenAI calls.
+
+Every call site (interview turns, tailoring, upskill) takes a slot from the same scheduler before
+calling the provider. Two token buckets track the provider limits, requests per minute and tokens
+per minute, refilled continuously. Waiters are served strictly by priority (INTERACTIVE before
+STANDARD before BATCH), FIFO within a priority, so a batch of tailoring runs cannot starve a user
+waiting on the next interview question.
+
+Queues are bounded per priority and every wait has a deadline. When a caller cannot be served in
+time, SchedulerSaturated is raised with a retry_after estimate; the API maps it to a 429 with a
+Retry-After header instead of holding the request open. A 429 from the provider pauses the buckets
+for the provider's Retry-After so the process backs off as a whole instead of retrying into a storm.
+
+    LLM_RPM                 requests per minute (default 500)
+    LLM_TPM                 tokens per minute (default 200000)
+    LLM_MAX_QUEUE           waiters per priority (default 64)
+    LLM_INTERACTIVE_TIMEOUT max seconds an interactive call waits for a slot (default 15)
+    LLM_STANDARD_TIMEOUT    (default 30)
+    LLM_BATCH_TIMEOUT       (default 120)
+"""
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+INTERACTIVE, STANDARD, BATCH = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", STANDARD: "standard", BATCH: "batch"}
+
+RPM = int(os.getenv("LLM_RPM", "500"))
+TPM = int(os.getenv("LLM_TPM", "200000"))
+MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))
+TIMEOUTS = {
+    INTERACTIVE: float(os.getenv("LLM_INTERACTIVE_TIMEOUT", "15")),
+    STANDARD: float(os.getenv("LLM_STANDARD_TIMEOUT", "30")),
+    BATCH: float(os.getenv("LLM_BATCH_TIMEOUT", "120")),
+}
+DEFAULT_PROVIDER_BACKOFF = 5.0
+
+
+class SchedulerSaturated(Exception):
+    """No slot within the caller's deadline. `retry_after` is a whole number of seconds."""
+
+    def __init__(self, retry_after: float, reason: str = "LLM capacity saturated"):
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"{reason}; retry after {self.retry_after}s")
+
+
+def estimate_tokens(text: str, max_output: int = 1000) -> int:
+    """Rough prompt size (~4 chars per token) plus the expected completion."""
+    return len(text or "") // 4 + max_output
+
+
+class TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.stamp = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_time(self, amount: float) -> float:
+        # Requests larger than the bucket may run once it is full (leaving it in debt).
+        need = min(amount, self.capacity) - self.level
+        return 0.0 if need <= 0 else need / self.rate
+
+    def projected_wait(self, amount: float) -> float:
+        need = amount - self.level
+        return 0.0 if need <= 0 else need / self.rate
+
+
+class Ticket:
+    def __init__(self, scheduler, tokens: int):
+        self._scheduler = scheduler
+        self.tokens = tokens
+
+    def settle(self, actual_tokens) -> None:
+        """Correct the token bucket once the real usage is known."""
+        if actual_tokens is None:
+            return
+        self._scheduler._adjust_tokens(int(actual_tokens) - self.tokens)
+        self.tokens = int(actual_tokens)
+
+    def release(self) -> None:
+        """Give the slot back unused (the call was never made)."""
+        self._scheduler._give_back(self.tokens)
+        self.tokens = 0
+
+
+class LLMScheduler:
+    def __init__(self, rpm: int = RPM, tpm: int = TPM, max_queue: int = MAX_QUEUE):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_queue = max_queue
+        self._cond = threading.Condition()
+        self._heap: list[list] = []
+        self._seq = itertools.count()
+        self._queued = {p: 0 for p in PRIORITY_NAMES}
+        self._paused_until = 0.0
+        self._stats = {"granted": 0, "rejected": 0, "timed_out": 0, "provider_429": 0}
+
+    def _refill(self, now: float) -> None:
+        self.requests.refill(now)
+        self.tokens.refill(now)
+
+    def _projected_wait(self, priority: int, tokens: int, now: float) -> float:
+        ahead = [w for w in self._heap if w[0] <= priority]
+        demand_tokens = tokens + sum(w[2] for w in ahead)
+        return max(
+            self.requests.projected_wait(len(ahead) + 1),
+            self.tokens.projected_wait(demand_tokens),
+            self._paused_until - now,
+            0.0,
+        )
+
+    def admit(self, priority: int = INTERACTIVE, tokens: int = 0) -> None:
+        """Fail fast (before any work is done) if a call at `priority` could not get a slot in time."""
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            wait = self._projected_wait(priority, tokens, now)
+            if self._queued[priority] >= self.max_queue or wait > TIMEOUTS[priority]:
+                self._stats["rejected"] += 1
+                raise SchedulerSaturated(wait)
+
+    def acquire(self, priority: int = INTERACTIVE, tokens: int = 1000, timeout: float | None = None) -> Ticket:
+        deadline = time.monotonic() + (TIMEOUTS[priority] if timeout is None else timeout)
+        with self._cond:
+            if self._queued[priority] >= self.max_queue:
+                self._stats["rejected"] += 1
+                raise SchedulerSaturated(self._projected_wait(priority, tokens, time.monotonic()), "LLM queue full")
+            waiter = [priority, next(self._seq), tokens]
+            heapq.heappush(self._heap, waiter)
+            self._queued[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = None
+                    if self._heap[0] is waiter:
+                        wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens), self._paused_until - now)
+                        if wait <= 0:
+                            heapq.heappop(self._heap)
+                            self.requests.level -= 1
+                            self.tokens.level -= tokens
+                            self._stats["granted"] += 1
+                            return Ticket(self, tokens)
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._stats["timed_out"] += 1
+                        raise SchedulerSaturated(self._projected_wait(priority, tokens, now), "Timed out waiting for LLM capacity")
+                    self._cond.wait(remaining if wait is None else min(remaining, wait))
+            finally:
+                if any(w is waiter for w in self._heap):
+                    self._heap.remove(waiter)
+                    heapq.heapify(self._heap)
+                self._queued[priority] -= 1
+                self._cond.notify_all()
+
+    def _adjust_tokens(self, delta: int) -> None:
+        with self._cond:
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level - delta)
+            self._cond.notify_all()
+
+    def _give_back(self, tokens: int) -> None:
+        with self._cond:
+            self.requests.level = min(self.requests.capacity, self.requests.level + 1)
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + tokens)
+            self._cond.notify_all()
+
+    def penalize(self, seconds: float) -> None:
+        """Provider said 429: hold every waiter for `seconds`."""
+        with self._cond:
+            self._stats["provider_429"] += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                "rpm": int(self.requests.capacity),
+                "tpm": int(self.tokens.capacity),
+                "available_requests": round(self.requests.level, 1),
+                "available_tokens": int(self.tokens.level),
+                "queued": {PRIORITY_NAMES[p]: n for p, n in self._queued.items()},
+                "paused_for_s": round(max(0.0, self._paused_until - now), 2),
+                **self._stats,
+            }
+
+
+def _provider_retry_after(exc: Exception) -> float | None:
+    """Seconds to back off if `exc` is a provider rate-limit error, else None."""
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    if status != 429 and type(exc).__name__ != "RateLimitError":
+        return None
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or DEFAULT_PROVIDER_BACKOFF)
+    except (TypeError, ValueError):
+        return DEFAULT_PROVIDER_BACKOFF
+
+
+scheduler = LLMScheduler()
+
+
+def note_provider_error(exc: Exception) -> bool:
+    """Back the whole process off if `exc` is a provider 429. Returns True if it was one."""
+    backoff = _provider_retry_after(exc)
+    if backoff is not None:
+        scheduler.penalize(backoff)
+    return backoff is not None
+
+
+@contextmanager
+def slot(priority: int = INTERACTIVE, tokens: int = 1000, timeout: float | None = None):
+    """Hold a rate-limit slot for one provider call. Yields the Ticket (call .settle(total_tokens))."""
+    ticket = scheduler.acquire(priority, tokens, timeout)
+    try:
+        yield ticket
+    except Exception as e:
+        note_provider_error(e)
+        raise
@@ -0,0 +1,182 @@
+"""
+Load test for the resume API against the offline LLM stand-in (fake_llm.py).
+
+Each simulated user logs in, uploads a generated resume PDF, answers interview questions until the
+agent completes (or --max-turns is hit), then runs the two tailoring LLM steps from
+resume_builder.py. The API has no tailoring endpoint, so tailoring runs in this process against the
+same stand-in; pdflatex is skipped because it is not an LLM cost.
+
+Start the API pointed at the stand-in first, e.g.
+
+    python app/fake_llm.py --port 8099 &
+    OPENAI_BASE_URL=http://127.0.0.1:8099/v1 OPENAI_API_KEY=fake uvicorn app.main:app --workers 4
+    python app/loadtest.py --users 50 --concurrency 10 --fake-llm-url http://127.0.0.1:8099/v1
+
+Reports p50/p95/p99 latency per stage and overall throughput.
+"""
+
+import argparse
+import math
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+try:
+    from app import resume_builder
+except ImportError:
+    import resume_builder
+
+SAMPLE_RESUME = """Jordan Example
+jordan@example.com | +1 555-0100 | linkedin.com/in/jordan-example
+
+EXPERIENCE
+Acme Analytics - Data Scientist (Jan 2021 - Present)
+- Built demand forecasting models in Python and SQL
+- Led migration of dashboards to Power BI
+
+EDUCATION
+State University - B.S. Computer Science (2016 - 2020)
+
+SKILLS
+Python, SQL, Spark, Tableau
+"""
+
+SAMPLE_JOB = (
+    "We are hiring a Senior Data Scientist to build forecasting and experimentation platforms. "
+    "Requirements: Python, SQL, Spark, A/B testing, stakeholder communication."
+)
+
+
+def make_resume_pdf(text: str = SAMPLE_RESUME) -> bytes:
+    import fitz
+
+    with fitz.open() as doc:
+        page = doc.new_page()
+        page.insert_text((56, 72), text, fontsize=10)
+        return doc.tobytes()
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    def add(self, stage: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self.samples.setdefault(stage, []).append(elapsed_ms)
+
+    def timed(self, stage: str, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.errors[stage] = self.errors.get(stage, 0) + 1
+            raise
+        finally:
+            self.add(stage, (time.perf_counter() - t0) * 1000)
+
+
+def _post(session: requests.Session, url: str, **kwargs) -> dict:
+    res = session.post(url, timeout=300, **kwargs)
+    res.raise_for_status()
+    return res.json()
+
+
+def run_session(api_url: str, resume_pdf: bytes, max_turns: int, tailor: bool, rec: Recorder) -> bool:
+    email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+    session = requests.Session()
+    t0 = time.perf_counter()
+    try:
+        rec.timed("auth", _post, session, f"{api_url}/auth/", json={"name": "Load Test", "email": email})
+        files = {"resume": ("resume.pdf", resume_pdf, "application/pdf")}
+        response = rec.timed("upload", _post, session, f"{api_url}/process-documents/", data={"email": email}, files=files)
+
+        turns = 0
+        while response.get("status") == "waiting_for_user" and turns < max_turns:
+            answer = f"I improved that metric by {10 + turns}% for about {1000 * (turns + 1)} users."
+            payload = {"thread_id": email, "answers": answer}
+            response = rec.timed("answer_turn", _post, session, f"{api_url}/answer-questions/", json=payload)
+            turns += 1
+        if response.get("status") == "waiting_for_user":
+            response = rec.timed(
+                "answer_turn", _post, session, f"{api_url}/answer-questions/", json={"thread_id": email, "answers": "stop"}
+            )
+
+        if tailor:
+            profile = response.get("parsed_data") or {}
+            enhanced = rec.timed("tailor_enhance", resume_builder.llm_enhance_for_job, profile, SAMPLE_JOB)
+            rec.timed("tailor_fill", resume_builder.llm_fill_template_structure_only, enhanced, "\\documentclass{article}")
+        return True
+    except Exception:
+        return False
+    finally:
+        rec.add("session_total", (time.perf_counter() - t0) * 1000)
+
+
+def format_summary(rec: Recorder, wall_s: float, sessions_ok: int, sessions: int) -> str:
+    lines = [f"{'stage':<16}{'n':>6}{'err':>6}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'mean ms':>11}", "-" * 72]
+    requests_done = 0
+    for stage, values in rec.samples.items():
+        if stage != "session_total":
+            requests_done += len(values)
+        lines.append(
+            f"{stage:<16}{len(values):>6}{rec.errors.get(stage, 0):>6}"
+            f"{percentile(values, 50):>11.1f}{percentile(values, 95):>11.1f}{percentile(values, 99):>11.1f}"
+            f"{statistics.fmean(values):>11.1f}"
+        )
+    lines.append("-" * 72)
+    lines.append(f"sessions: {sessions_ok}/{sessions} ok in {wall_s:.1f}s")
+    lines.append(f"throughput: {sessions_ok / wall_s:.2f} sessions/s, {requests_done / wall_s:.2f} calls/s")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent upload → interview → tailoring load test.")
+    parser.add_argument("--api-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=20, help="Total sessions to run.")
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--max-turns", type=int, default=5, help="Answers per interview before sending 'stop'.")
+    parser.add_argument("--no-tailor", action="store_true", help="Skip the in-process tailoring stage.")
+    parser.add_argument(
+        "--fake-llm-url",
+        help="Base URL of fake_llm.py for the in-process tailoring calls (sets OPENAI_BASE_URL).",
+    )
+    args = parser.parse_args(argv)
+
+    if args.fake_llm_url:
+        os.environ["OPENAI_BASE_URL"] = args.fake_llm_url
+        os.environ.setdefault("OPENAI_API_KEY", "fake")
+
+    resume_pdf = make_resume_pdf()
+    rec = Recorder()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(
+            lambda _: run_session(args.api_url, resume_pdf, args.max_turns, not args.no_tailor, rec),
+            range(args.users),
+        ))
+    wall_s = time.perf_counter() - t0
+
+    print(format_summary(rec, wall_s, sum(results), len(results)))
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
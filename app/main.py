@@ -1,15 +1,36 @@
 # app/main.py
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends
+import os
+from datetime import datetime, timezone
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Query
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from app.agent import resume_agent_app # Import your compiled LangGraph workflow
-from app.utils import extract_text_from_file
-import json
+from app.utils import extract_heading_lines, extract_text_from_file, fingerprint_text, fingerprint_upload
 from sqlalchemy.orm import Session
-from app import models
-from app.database import get_db, engine
+from app import llm_scheduler, matching, model_router, models, profile_store, profile_versions, resume_sections, search, startup, upskill_service
+from app.artifacts import artifact_store
+from app.database import get_db
+from app.profile_cache import get_profile_summary, profile_cache
+from app.single_flight import SingleFlight, ThreadBusy, submission_key
 
-models.Base.metadata.create_all(bind=engine)
-app = FastAPI(title="Resume Parsing Agent API")
+
+def resume_agent():
+    """The compiled LangGraph workflow. app.agent (langgraph, langchain) is imported on first use."""
+    from app.agent import get_resume_agent_app
+    return get_resume_agent_app()
+
+
+# Schema setup and warm-up run in the lifespan, not at import (see startup.py)
+app = FastAPI(title="Resume Parsing Agent API", lifespan=startup.lifespan(resume_agent, model_router.warm_up))
+
+
+@app.exception_handler(llm_scheduler.SchedulerSaturated)
+async def llm_saturated_handler(request, exc: llm_scheduler.SchedulerSaturated):
+    # Shed load quickly instead of holding the request while the LLM queue drains.
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 class LoginRequest(BaseModel):
     name: str
@@ -20,29 +41,76 @@ class LoginRequest(BaseModel):
 async def process_documents(
     email: str = Form(...),
     resume: UploadFile = File(...),
+    force: bool = Form(False),
     db: Session = Depends(get_db)
 ):
     
     resume_bytes = await resume.read()
+
+    # Re-uploading the same file skips text extraction and the LLM entirely (`force` re-parses).
+    fingerprint = fingerprint_upload(resume_bytes)
+    if not force:
+        reused = profile_store.find_reusable_profile(db, email, fingerprint)
+        if reused is not None:
+            return {"status": "completed", "reused": "saved_profile", "parsed_data": reused}
+
     resume_text = extract_text_from_file(resume_bytes, resume.filename)
 
     if not resume_text or "Error" in resume_text or "Unsupported" in resume_text:
         raise HTTPException(status_code=400, detail=f"Could not parse file: {resume_text}")
+
+    # The file hash from above plus the text hash; the bytes are not hashed again.
+    fingerprint = {**fingerprint, "text_sha256": fingerprint_text(resume_text), "filename": resume.filename}
     
     # We use the user's email as the thread_id to track their specific session
     thread_config = {"configurable": {"thread_id": email}}
+    if not force:
+        # Exactly the same normalized text (e.g. a re-exported PDF), not merely similar text: reuse the saved profile or the interview in progress.
+        reused = profile_store.find_reusable_profile(db, email, fingerprint)
+        if reused is not None:
+            return {"status": "completed", "reused": "saved_profile", "parsed_data": reused}
+        state = resume_agent().get_state(thread_config)
+        previous = state.values.get("resume_fingerprint") or {}
+        if state.next == ('human_input',) and previous.get("text_sha256") == fingerprint["text_sha256"]:
+            return {
+                "status": "waiting_for_user",
+                "message": "The agent needs more information.",
+                "reused": "checkpoint",
+                "questions": state.values.get("pending_questions", []),
+                "remaining_questions": state.values.get("remaining_questions", "?"),
+                "parsed_data": state.values.get("extracted_data", {}),
+                "focus_field": state.values.get("current_focus_field", "Candidate Profile"),
+                "answered": _answered(state),
+                "thread_id": email
+            }
+
+    llm_scheduler.scheduler.admit(llm_scheduler.INTERACTIVE)
     initial_state = {
-        "resume_text": resume_text,
+        "resume_ref": resume_agent().checkpointer.blob_store.put(resume_text, owner=email),
         "chat_history": [],
         "extracted_data": None,
-        "pending_questions": []
+        "pending_questions": [],
+        "resume_fingerprint": fingerprint,
+        "resume_draft": resume_sections.build_draft(
+            resume_text, extract_heading_lines(resume_bytes, resume.filename)
+        ),
+        # A re-upload (or force) reuses the thread: start the interview bookkeeping over with the new resume.
+        "current_gap": None,
+        "closed_gaps": [],
+        "question_plan": [],
+        "planned_total": 0,
+        "unmerged_answers": 0,
+        "finish": False,
+        "is_complete": False,
     }
     
     # Run the graph until it hits the breakpoint
-    for event in resume_agent_app.stream(initial_state, config=thread_config):
+    for event in resume_agent().stream(initial_state, config=thread_config):
         pass
         
-    state = resume_agent_app.get_state(thread_config)
+    state = resume_agent().get_state(thread_config)
+    # A new upload starts a fresh version history segment for this thread
+    profile_versions.record_version(db, email, state.values.get("extracted_data"), new_base=True)
     
     # Check if the graph paused at the 'human_input' node
     if state.next == ('human_input',):
@@ -53,20 +121,17 @@ async def process_documents(
             "remaining_questions": state.values.get("remaining_questions", "?"),
             "parsed_data": state.values.get("extracted_data", {}),
             "focus_field": state.values.get("current_focus_field", "Candidate Profile"),
+            "answered": _answered(state),
             "thread_id": email
         }
 
     extracted_json = state.values.get("extracted_data") or {}
 
     # Save only final profile (no draft/resumability behavior).
-    user = db.query(models.CandidateProfile).filter(models.CandidateProfile.email == email).first()
-    if user:
-        user.parsed_data = extracted_json
-        db.commit()
-
-    # --- NEW: Save the JSON to a file for your teammates ---
-    with open("master_candidate_profile.json", "w") as f:
-        json.dump(extracted_json, f, indent=4)
+    profile_store.save_parsed_data(db, email, extracted_json, fingerprint)
+
+    # Export for your teammates (written in the background, per user)
+    artifact_store.enqueue_profile(email, extracted_json)
     # If no questions, it finished completely on the first try!
     return {
         "status": "completed",
@@ -77,12 +142,74 @@ async def process_documents(
 class UserAnswerPayload(BaseModel):
     thread_id: str
     answers: str # e.g., "I actually improved the EBITDA by 40%."
+    # The `answered` count from the last response the client got; lets resubmissions be recognised.
+    expected_turn: int | None = None
+
+# Same answer landing again this soon after the turn that consumed it is a resubmission, not a new answer.
+DUPLICATE_WINDOW_SECONDS = float(os.getenv("ANSWER_DUPLICATE_WINDOW", "3"))
+answer_flights = SingleFlight()
+
+
+def _answered(state) -> int:
+    """Answers already in the thread's chat_history (the server's turn count, sent back as expected_turn)."""
+    return sum(1 for m in state.values.get("chat_history") or [] if m.get("role") == "user")
+
+
+def _waiting_response(state, thread_id: str) -> dict:
+    return {
+        "status": "waiting_for_user",
+        "message": "Follow-up questions from the agent.",
+        "questions": state.values.get("pending_questions", []),
+        "remaining_questions": state.values.get("remaining_questions", "?"),
+        "focus_field": state.values.get("current_focus_field", "Candidate Profile"),
+        "answered": _answered(state),
+        "thread_id": thread_id
+    }
+
+
+def _already_applied(state, payload: UserAnswerPayload) -> bool:
+    """True if this submission was already processed (by a concurrent request or another worker)."""
+    history = state.values.get("chat_history") or []
+    if payload.expected_turn is not None:
+        return _answered(state) > payload.expected_turn
+    if not history or history[-1] != {"role": "user", "content": payload.answers}:
+        return False
+    try:
+        age = (datetime.now(timezone.utc) - datetime.fromisoformat(state.created_at)).total_seconds()
+    except (TypeError, ValueError):
+        return False
+    return age <= DUPLICATE_WINDOW_SECONDS
+
 
 # --- ENDPOINT 2: Resume with Human Input ---
 @app.post("/answer-questions/")
 async def answer_questions(payload: UserAnswerPayload, db: Session = Depends(get_db)):
+    # One run per thread at a time; identical concurrent submissions share the in-flight result.
+    key = submission_key(payload.thread_id, payload.answers)
+    try:
+        return await answer_flights.run(payload.thread_id, key, lambda: _answer_turn(payload, db), db)
+    except ThreadBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+def _run_from_breakpoint(thread_config: dict, state, update: dict) -> None:
+    """Write `update` into the paused thread and run the graph. If the run fails (e.g. SchedulerSaturated
+    inside the graph), put the thread back at the breakpoint as it was, so the client's retry is accepted."""
+    resume_agent().update_state(thread_config, update)
+    try:
+        for event in resume_agent().stream(None, config=thread_config):
+            pass
+    except Exception:
+        resume_agent().update_state(thread_config, state.values, as_node="agent")
+        raise
+
+
+def _answer_turn(payload: UserAnswerPayload, db: Session) -> dict:
     thread_config = {"configurable": {"thread_id": payload.thread_id}}
-    state = resume_agent_app.get_state(thread_config)
+    state = resume_agent().get_state(thread_config)
+
+    if state.next == ('human_input',) and _already_applied(state, payload):
+        return _waiting_response(state, payload.thread_id)
     
     # Guardrail: Ensure the graph is actually paused and waiting
     if state.next != ('human_input',):
@@ -90,19 +217,23 @@ async def answer_questions(payload: UserAnswerPayload, db: Session = Depends(get
     
     user_input_clean = payload.answers.strip().lower()
     if user_input_clean in ["stop", "quit", "exit", "skip", "enough"]:
+        if state.values.get("unmerged_answers"):
+            # Answers to queued questions are merged in batches; fold in the last batch before saving.
+            llm_scheduler.scheduler.admit(llm_scheduler.INTERACTIVE)
+            _run_from_breakpoint(thread_config, state, {"finish": True})
+            state = resume_agent().get_state(thread_config)
         extracted_json = state.values.get("extracted_data")
         
         # --- NEW: Save to Database on Stop ---
-        user = db.query(models.CandidateProfile).filter(models.CandidateProfile.email == payload.thread_id).first()
-        if user:
-            user.parsed_data = extracted_json
-            db.commit()
+        profile_store.save_parsed_data(db, payload.thread_id, extracted_json, state.values.get("resume_fingerprint"))
         return {
             "status": "completed",
             "message": "Interview stopped by user.",
             "parsed_data": state.values.get("extracted_data")
         }
         
+    # Shed load before any work; if the graph still cannot get a slot, the answer is rolled back below.
+    llm_scheduler.scheduler.admit(llm_scheduler.INTERACTIVE)
     questions_asked = state.values.get("pending_questions", [])
     last_question = questions_asked[0] if questions_asked else ""
     
@@ -112,37 +243,25 @@ async def answer_questions(payload: UserAnswerPayload, db: Session = Depends(get
         {"role": "user", "content": payload.answers}
     ]
     
-    # Update the state with the user's answers
-    resume_agent_app.update_state(thread_config, {"chat_history": new_chat_history})
-    
-    # Resume the graph (passing None tells it to continue from the breakpoint)
-    for event in resume_agent_app.stream(None, config=thread_config):
-        pass
-        
+    # Add the answer and resume the graph from the breakpoint (rolled back if the run fails)
+    _run_from_breakpoint(thread_config, state, {"chat_history": new_chat_history})
+
     # Check the state again
-    final_state = resume_agent_app.get_state(thread_config)
+    final_state = resume_agent().get_state(thread_config)
+    profile_versions.record_version(
+        db, payload.thread_id, final_state.values.get("extracted_data"), previous=state.values.get("extracted_data")
+    )
     
     # Did the agent ask MORE questions based on the new info?
     if final_state.next == ('human_input',):
-        return {
-            "status": "waiting_for_user",
-            "message": "Follow-up questions from the agent.",
-            "questions": final_state.values.get("pending_questions", []),
-            "remaining_questions": final_state.values.get("remaining_questions", "?"),
-            "focus_field": final_state.values.get("current_focus_field", "Candidate Profile"),
-            "thread_id": payload.thread_id
-        }
+        return _waiting_response(final_state, payload.thread_id)
     
     extracted_json = final_state.values.get("extracted_data") # Or state.values.get for the first endpoint
 
-    user = db.query(models.CandidateProfile).filter(models.CandidateProfile.email == payload.thread_id).first()
-    if user:
-        user.parsed_data = extracted_json
-        db.commit()
+    profile_store.save_parsed_data(db, payload.thread_id, extracted_json, final_state.values.get("resume_fingerprint"))
     
-    # --- NEW: Save the JSON to a file for your teammates ---
-    with open("master_candidate_profile.json", "w") as f:
-        json.dump(extracted_json, f, indent=4)
+    # Export for your teammates (written in the background, per user)
+    artifact_store.enqueue_profile(payload.thread_id, extracted_json)
         
     # If done, return the master JSON!
     return {
@@ -153,17 +272,17 @@ async def answer_questions(payload: UserAnswerPayload, db: Session = Depends(get
 
 @app.post("/auth/")
 def authenticate_user(req: LoginRequest, db: Session = Depends(get_db)):
-    # 1. Check if the user already exists in the database
-    profile = db.query(models.CandidateProfile).filter(models.CandidateProfile.email == req.email).first()
+    # 1. Check if the user already exists (cached, and without pulling an empty parsed_data blob)
+    profile = get_profile_summary(db, req.email)
     
     if profile:
-        has_saved_master = bool(profile.parsed_data)
+        has_saved_master = profile["has_saved_master"]
         # Returning user! Send back their saved JSON.
         return {
             "status": "existing_user",
-            "message": f"Welcome back, {profile.name}!",
+            "message": f"Welcome back, {profile['name']}!",
             "has_saved_master": has_saved_master,
-            "parsed_data": profile.parsed_data if has_saved_master else {}
+            "parsed_data": profile["parsed_data"] if has_saved_master else {}
         }
     
     # 2. New user! Create a blank profile in the database.
@@ -174,8 +293,164 @@ def authenticate_user(req: LoginRequest, db: Session = Depends(get_db)):
     )
     db.add(new_profile)
     db.commit()
+    profile_cache.invalidate(req.email)
     
     return {
         "status": "new_user",
         "message": "Account created! Please upload your resume."
     }
+
+
+@app.get("/profiles/{email}/export")
+def export_profile(email: str):
+    pending = artifact_store.pending_profile(email)
+    if pending is not None:
+        return pending
+    path = artifact_store.profile_path(email)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="No exported profile for this user yet.")
+    return FileResponse(path, media_type="application/json", filename="master_candidate_profile.json")
+
+
+@app.get("/profiles/{thread_id}/versions")
+def list_profile_versions(thread_id: str, db: Session = Depends(get_db)):
+    return {"thread_id": thread_id, "versions": profile_versions.list_versions(db, thread_id)}
+
+
+@app.get("/profiles/{thread_id}/versions/{turn}")
+def get_profile_version(thread_id: str, turn: int, db: Session = Depends(get_db)):
+    profile = profile_versions.get_version(db, thread_id, turn)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="No such version.")
+    return {"thread_id": thread_id, "turn": turn, "parsed_data": profile}
+
+
+@app.get("/profiles/{thread_id}/diff")
+def diff_profile_versions(thread_id: str, from_turn: int, to_turn: int, db: Session = Depends(get_db)):
+    ops = profile_versions.diff_versions(db, thread_id, from_turn, to_turn)
+    if ops is None:
+        raise HTTPException(status_code=404, detail="No such version.")
+    return {"thread_id": thread_id, "from_turn": from_turn, "to_turn": to_turn, "diff": ops}
+
+
+@app.get("/search/")
+def search_candidates(
+    q: str | None = None,
+    skill: str | None = None,
+    title: str | None = None,
+    company: str | None = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=search.MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    if not any(v and v.strip() for v in (q, skill, title, company)):
+        raise HTTPException(status_code=400, detail="Provide q, skill, title or company.")
+    return search.search_profiles(
+        db, q=q, skill=skill, title=title, company=company, page=page, page_size=page_size
+    )
+
+
+class MatchRequest(BaseModel):
+    job_description: str | None = None
+    job_url: str | None = None
+    top_n: int = 20
+
+
+@app.post("/match/")
+def match_candidates(req: MatchRequest, db: Session = Depends(get_db)):
+    job_description = (req.job_description or "").strip()
+    if not job_description and req.job_url:
+        from app.resume_builder import fetch_job_description, is_fetch_failure
+        job_description = fetch_job_description(req.job_url)
+        if is_fetch_failure(job_description):
+            raise HTTPException(status_code=502, detail=f"Could not read a job description from job_url: {job_description}")
+    if not job_description:
+        raise HTTPException(status_code=400, detail="Provide job_description or job_url.")
+    top_n = max(1, min(req.top_n, 200))
+    return {"results": matching.match_job(db, job_description, top_n)}
+
+
+class UpskillStartRequest(BaseModel):
+    email: str
+    job_url: str | None = None
+    job_description: str | None = None
+    restart: bool = False  # discard the saved conversation for this job and start over
+
+
+class UpskillMessage(BaseModel):
+    message: str
+
+
+@app.post("/upskill/sessions")
+def start_upskill_session(req: UpskillStartRequest, db: Session = Depends(get_db)):
+    """Resume the user's upskill session for this job, or start one (asks the first follow-up questions)."""
+    llm_scheduler.scheduler.admit(llm_scheduler.STANDARD)
+    try:
+        row, resumed = upskill_service.start_session(db, req.email, req.job_url, req.job_description, req.restart)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {**upskill_service.session_view(row), "resumed": resumed}
+
+
+@app.get("/upskill/sessions")
+def list_upskill_sessions(email: str, db: Session = Depends(get_db)):
+    return {"email": email, "sessions": upskill_service.list_sessions(db, email)}
+
+
+@app.get("/upskill/sessions/{session_id}")
+def get_upskill_session(session_id: int, db: Session = Depends(get_db)):
+    row = upskill_service.get_session(db, session_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="No such upskill session.")
+    return upskill_service.session_view(row)
+
+
+@app.post("/upskill/sessions/{session_id}/messages")
+def upskill_reply(session_id: int, payload: UpskillMessage, db: Session = Depends(get_db)):
+    llm_scheduler.scheduler.admit(llm_scheduler.STANDARD)
+    try:
+        row = upskill_service.reply(db, session_id, payload.message)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ThreadBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return upskill_service.session_view(row)
+
+
+@app.post("/upskill/sessions/{session_id}/messages/stream")
+def upskill_reply_stream(session_id: int, payload: UpskillMessage):
+    """
+    Same turn as /messages, streamed as NDJSON: {"delta": text} frames, then {"error", "status"} if
+    the turn fails midway. GET the session afterwards for the saved state.
+    """
+    llm_scheduler.scheduler.admit(llm_scheduler.STANDARD)
+    try:
+        frames = upskill_service.stream_reply(session_id, payload.message)
+    except (ValueError, LookupError, ThreadBusy) as e:
+        raise HTTPException(status_code=upskill_service.error_status(e), detail=str(e))
+    return StreamingResponse(frames, media_type="application/x-ndjson")
+
+
+@app.get("/metrics/llm-routes")
+def llm_route_metrics():
+    """Per-route LLM call counts, latency percentiles, tokens and estimated cost for this worker."""
+    return model_router.stats()
+
+
+@app.get("/metrics/checkpoints")
+def checkpoint_metrics(thread_id: str | None = None, top: int = Query(20, ge=1, le=200)):
+    """Checkpoint memory held by this worker: totals and the largest threads, or one thread's footprint."""
+    saver = resume_agent().checkpointer
+    if thread_id:
+        return saver.footprint(thread_id)
+    return saver.report(top)
+
+
+@app.get("/health")
+def health():
+    """Liveness plus start-up progress: schema prepared, warm-up finished."""
+    return {"status": "ok" if startup.status["schema_ready"] else "starting", **startup.status}
@@ -0,0 +1,277 @@
+# app/matching.py
+"""
+Job-to-candidate matching over the whole profile store, without LLM calls.
+
+Every CandidateProfile is kept as a sparse row (its non-zero columns and float32 values) of a feature
+space made of three hashed blocks:
+  - skills:  technical / tools / soft skills / skills_used (binary presence)
+  - titles:  tokens of work_experience roles (binary presence)
+  - text:    log term frequency of bullets, project descriptions and context (weighted by IDF at query time)
+
+A job description is turned into the same blocks and scored against every row in one pass over the
+packed non-zeros: skill coverage, title overlap and TF-IDF cosine, blended with SCORE_WEIGHTS. A
+profile has a few hundred non-zero features (~12 bytes each in the packed arrays), so memory grows
+with profile content rather than with the 3328-column width; profiles with no features at all are
+not indexed. Exact term sets are kept per profile so the top-N can be explained (matched and
+missing skills) despite hashing.
+
+The index lives in process memory (numpy is imported on first use). It loads lazily from the DB,
+picks up rows saved by other workers before each query, and is updated in place by profile_store
+on save. updated_at is the saving transaction's start time, so a transaction that commits after a
+sync can carry an older stamp: each sync re-scans the last SYNC_OVERLAP_SECONDS as well.
+
+    MATCH_SYNC_OVERLAP   seconds re-scanned before the last seen stamp (default 300)
+"""
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+
+from datetime import timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app import models
+
+SKILL_DIM = 1024
+TITLE_DIM = 256
+TEXT_DIM = 2048
+SCORE_WEIGHTS = {"skills": 0.5, "titles": 0.2, "text": 0.3}
+MAX_SKILL_NGRAM = 4
+SYNC_OVERLAP_SECONDS = float(os.getenv("MATCH_SYNC_OVERLAP", "300"))
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9+#.\-/]*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or our that the their this to we will with you your "
+    "using used into across over per via".split()
+)
+
+
+def _tokens(text: str) -> list[str]:
+    return [t.rstrip(".-/") for t in _WORD.findall((text or "").lower()) if t.rstrip(".-/")]
+
+
+def _norm_term(term: str) -> str:
+    return " ".join(_tokens(term))
+
+
+def _bucket(term: str, dim: int) -> int:
+    return zlib.crc32(term.encode("utf-8")) % dim
+
+
+def profile_terms(parsed_data: dict | None) -> dict:
+    """Exact term sets used for features and explanations."""
+    data = parsed_data or {}
+    skills = data.get("skills") or {}
+    work = data.get("work_experience") or []
+
+    skill_terms = set()
+    for group in ("technical", "tools", "soft_skills"):
+        skill_terms.update(_norm_term(s) for s in skills.get(group) or [])
+    for job in work:
+        skill_terms.update(_norm_term(s) for s in job.get("skills_used") or [])
+    skill_terms.discard("")
+
+    title_tokens = {t for job in work for t in _tokens(job.get("role") or "") if t not in _STOPWORDS}
+
+    text_parts = []
+    for job in work:
+        text_parts += [job.get("experience_context") or ""] + list(job.get("bullets") or [])
+    for proj in data.get("projects") or []:
+        text_parts += [proj.get("title") or "", proj.get("description") or ""]
+    text_counts = Counter(t for t in _tokens(" ".join(text_parts)) if t not in _STOPWORDS and len(t) > 1)
+
+    return {"skills": skill_terms, "titles": title_tokens, "text": text_counts}
+
+
+class MatchIndex:
+    def __init__(self):
+        self.dim = SKILL_DIM + TITLE_DIM + TEXT_DIM
+        self.vectors: dict[int, tuple] = {}  # profile id -> (columns, values)
+        self.terms: dict[int, dict] = {}
+        self.names: dict[int, str] = {}
+        self.skill_vocab: Counter = Counter()
+        self.doc_freq = None  # per text column, created with the first row
+        self.loaded = False
+        self.synced_at = None
+        self._packed = None
+        self._lock = threading.RLock()
+
+    # --- feature construction ---
+    def _vectorize(self, terms: dict):
+        import numpy as np
+
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for s in terms["skills"]:
+            vec[_bucket(s, SKILL_DIM)] = 1.0
+        for t in terms["titles"]:
+            vec[SKILL_DIM + _bucket(t, TITLE_DIM)] = 1.0
+        offset = SKILL_DIM + TITLE_DIM
+        for term, count in terms["text"].items():
+            vec[offset + _bucket(term, TEXT_DIM)] += 1.0 + math.log(count)
+        return vec
+
+    @staticmethod
+    def _text_columns(cols):
+        return cols[cols >= SKILL_DIM + TITLE_DIM] - (SKILL_DIM + TITLE_DIM)
+
+    def _pack(self):
+        """All rows as flat (row, column, value) arrays, split by block; rebuilt after any change."""
+        if self._packed is None:
+            import numpy as np
+
+            ids = np.fromiter(self.vectors, dtype=np.int64, count=len(self.vectors))
+            parts = list(self.vectors.values())
+            lengths = [len(cols) for cols, _ in parts]
+            rows = np.repeat(np.arange(len(ids), dtype=np.int32), lengths)
+            cols = np.concatenate([c for c, _ in parts]) if parts else np.zeros(0, dtype=np.int32)
+            vals = np.concatenate([v for _, v in parts]) if parts else np.zeros(0, dtype=np.float32)
+            block = np.searchsorted([SKILL_DIM, SKILL_DIM + TITLE_DIM], cols, side="right")
+            self._packed = (ids, [(rows[block == b], cols[block == b], vals[block == b]) for b in range(3)])
+        return self._packed
+
+    # --- maintenance ---
+    def upsert(self, profile_id: int, parsed_data: dict | None, name: str | None = None) -> None:
+        """Index the profile, or drop it if it no longer has any features."""
+        import numpy as np
+
+        terms = profile_terms(parsed_data)
+        vec = self._vectorize(terms)
+        cols = np.flatnonzero(vec).astype(np.int32)
+        with self._lock:
+            if profile_id in self.vectors:
+                self._forget(profile_id)
+            if not len(cols):
+                return
+            if self.doc_freq is None:
+                self.doc_freq = np.zeros(TEXT_DIM, dtype=np.float64)
+            self.vectors[profile_id] = (cols, vec[cols])
+            self.terms[profile_id] = terms
+            self.names[profile_id] = name or ((parsed_data or {}).get("personal_info") or {}).get("name") or ""
+            self.skill_vocab.update(terms["skills"])
+            self.doc_freq[self._text_columns(cols)] += 1.0
+            self._packed = None
+
+    def _forget(self, profile_id: int) -> None:
+        cols, _ = self.vectors.pop(profile_id)
+        self.doc_freq[self._text_columns(cols)] -= 1.0
+        self.skill_vocab.subtract(self.terms.pop(profile_id)["skills"])
+        self.skill_vocab += Counter()  # drop zero counts
+        self.names.pop(profile_id, None)
+        self._packed = None
+
+    def remove(self, profile_id: int) -> None:
+        with self._lock:
+            if profile_id in self.vectors:
+                self._forget(profile_id)
+
+    def sync(self, db: Session) -> None:
+        """Load everything on first use, then only profiles updated since the last sync."""
+        P = models.CandidateProfile
+        query = db.query(P.id, P.name, P.parsed_data, P.updated_at, P.created_at)
+        with self._lock:
+            if self.loaded and self.synced_at is not None:
+                since = self.synced_at - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+                query = query.filter(func.coalesce(P.updated_at, P.created_at) > since)
+            for row in query.yield_per(500):
+                self.upsert(row.id, row.parsed_data, row.name)  # an emptied profile is removed
+                stamp = row.updated_at or row.created_at
+                if stamp is not None and (self.synced_at is None or stamp > self.synced_at):
+                    self.synced_at = stamp
+            self.loaded = True
+
+    # --- scoring ---
+    def _job_terms(self, job_description: str) -> dict:
+        tokens = _tokens(job_description)
+        grams = set()
+        for n in range(1, MAX_SKILL_NGRAM + 1):
+            for i in range(len(tokens) - n + 1):
+                grams.add(" ".join(tokens[i:i + n]))
+        job_skills = {g for g in grams if g in self.skill_vocab}
+        return {
+            "skills": job_skills,
+            "titles": {t for t in tokens if t not in _STOPWORDS},
+            "text": Counter(t for t in tokens if t not in _STOPWORDS and len(t) > 1),
+        }
+
+    def score(self, job_description: str, top_n: int = 20) -> list[dict]:
+        import numpy as np
+
+        with self._lock:
+            n_docs = len(self.vectors)
+            if not n_docs:
+                return []
+            job = self._job_terms(job_description)
+            q = self._vectorize(job)
+            ids, (skills, titles, text) = self._pack()
+
+            s_end, t_end = SKILL_DIM, SKILL_DIM + TITLE_DIM
+            q_skills = float(q[:s_end].sum())
+            idf = (np.log((1.0 + n_docs) / (1.0 + self.doc_freq)) + 1.0).astype(np.float32)
+            q_text_w = q[t_end:] * idf
+
+            def per_row(block, weights):
+                return np.bincount(block[0], weights=weights, minlength=n_docs)
+
+            # Block-wise products against every candidate row; text norms use the current IDF.
+            skill_hits = per_row(skills, skills[2] * q[skills[1]])
+            title_hits = per_row(titles, titles[2] * q[titles[1]])
+            title_sums = per_row(titles, titles[2])
+            text_idf = idf[text[1] - t_end]
+            text_dot = per_row(text, text[2] * q_text_w[text[1] - t_end] * text_idf)
+            text_norm = np.sqrt(per_row(text, (text[2] * text_idf) ** 2))
+
+            skill_cov = skill_hits / max(1.0, q_skills)
+            title_cov = np.minimum(1.0, title_hits / np.maximum(1.0, title_sums))
+            q_norm = float(np.linalg.norm(q_text_w)) or 1.0
+            text_cos = text_dot / (np.maximum(text_norm, 1e-6) * q_norm)
+
+            scores = (
+                SCORE_WEIGHTS["skills"] * skill_cov
+                + SCORE_WEIGHTS["titles"] * title_cov
+                + SCORE_WEIGHTS["text"] * text_cos
+            )
+            top_n = max(1, min(top_n, n_docs))
+            top = np.argpartition(-scores, top_n - 1)[:top_n]
+            top = top[np.argsort(-scores[top])]
+
+            return [
+                self._explain(int(ids[i]), job, scores[i], skill_cov[i], title_cov[i], text_cos[i])
+                for i in top
+            ]
+
+    def _explain(self, profile_id, job, score, skill_cov, title_cov, text_cos) -> dict:
+        terms = self.terms[profile_id]
+        matched = sorted(job["skills"] & terms["skills"])
+        missing = sorted(job["skills"] - terms["skills"], key=lambda s: (-self.skill_vocab[s], s))
+        shared_text = [t for t, _ in (job["text"] & terms["text"]).most_common(8)]
+        return {
+            "profile_id": profile_id,
+            "name": self.names.get(profile_id, ""),
+            "score": round(float(score), 4),
+            "components": {
+                "skills": round(float(skill_cov), 4),
+                "titles": round(float(title_cov), 4),
+                "text": round(float(text_cos), 4),
+            },
+            "matched_skills": matched,
+            "missing_skills": missing[:15],
+            "matched_title_terms": sorted(job["titles"] & terms["titles"]),
+            "shared_keywords": shared_text,
+        }
+
+
+match_index = MatchIndex()
+
+
+def match_job(db: Session, job_description: str, top_n: int = 20) -> list[dict]:
+    match_index.sync(db)
+    return match_index.score(job_description, top_n)
+
+
+def on_profile_saved(profile_id: int, parsed_data: dict | None, name: str | None = None) -> None:
+    """Keep this worker's index current after a save; skipped until the index is first loaded."""
+    if match_index.loaded:
+        match_index.upsert(profile_id, parsed_data, name)
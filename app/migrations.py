@@ -0,0 +1,51 @@
+# app/migrations.py
+"""
+Idempotent schema upgrades for databases created before a model change.
+`Base.metadata.create_all` only creates missing tables; it never alters existing ones.
+"""
+from sqlalchemy import inspect, text
+from app import models
+
+PROFILE_JSON_COLUMNS = ("parsed_data", "education", "work_experience", "projects")
+PROFILE_SECTION_COLUMNS = ("education", "work_experience", "projects")
+PROFILE_ADDED_COLUMNS = {
+    "resume_sha256": "varchar(64)",
+    "resume_text_sha256": "varchar(64)",
+}
+
+
+def _upgrade_profiles_to_jsonb(conn) -> None:
+    table = models.CandidateProfile.__tablename__
+    for column in PROFILE_JSON_COLUMNS:
+        data_type = conn.execute(
+            text(
+                "SELECT data_type FROM information_schema.columns "
+                "WHERE table_name = :table AND column_name = :column"
+            ),
+            {"table": table, "column": column},
+        ).scalar()
+        if data_type == "json":
+            conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb"))
+
+    # Backfill the section columns for profiles saved before they were populated.
+    for column in PROFILE_SECTION_COLUMNS:
+        conn.execute(text(
+            f"UPDATE {table} SET {column} = parsed_data -> '{column}' "
+            f"WHERE {column} IS NULL AND parsed_data ? '{column}'"
+        ))
+
+    for column, ddl_type in PROFILE_ADDED_COLUMNS.items():
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {ddl_type}"))
+
+    for index in models.CandidateProfile.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+
+def upgrade(engine) -> None:
+    """Bring an existing database up to the current models. Safe to run on every start-up."""
+    if engine.dialect.name != "postgresql":
+        return
+    if not inspect(engine).has_table(models.CandidateProfile.__tablename__):
+        return
+    with engine.begin() as conn:
+        _upgrade_profiles_to_jsonb(conn)
@@ -0,0 +1,184 @@
+# app/model_router.py
+"""
+Tiered model routing for LLM calls, with per-route latency and cost metrics.
+
+Cheap turns (short answers folded into one entry, small sections, clarifications) go to a small
+fast model; initial extraction and merges that touch a lot of the profile go to the large model.
+Decisions are local heuristics over the answer length, the field being updated and the size of the
+expected schema delta, so routing itself costs nothing.
+
+    RESUME_SMALL_MODEL   (default gpt-4o-mini)
+    RESUME_LARGE_MODEL   (default gpt-4o)
+    LLM_MODEL_PRICES     optional JSON {"model": [usd_per_1M_input, usd_per_1M_output], ...}
+
+Every call made through invoke_structured (and any call reported with record) is aggregated per
+route: calls, errors, latency p50/p95, tokens and estimated cost. See stats() / GET /metrics/llm-routes.
+"""
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+try:
+    from app import llm_scheduler
+except ImportError:
+    import llm_scheduler
+
+SMALL_MODEL = os.getenv("RESUME_SMALL_MODEL", "gpt-4o-mini")
+LARGE_MODEL = os.getenv("RESUME_LARGE_MODEL", "gpt-4o")
+
+# USD per 1M tokens (input, output); unknown models report tokens but no cost.
+PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+PRICES.update({k: tuple(v) for k, v in json.loads(os.getenv("LLM_MODEL_PRICES", "{}")).items()})
+
+# Heuristic thresholds
+SHORT_ANSWER_WORDS = 60
+SMALL_SECTION_CHARS = 2500
+SMALL_ENTRY_CHARS = 3000
+COMPLEX_FIELDS = {"work_experience", "education"}
+LATENCY_WINDOW = 500
+
+
+def _words(text: str) -> int:
+    return len((text or "").split())
+
+
+def route_section(section: str, text: str) -> tuple[str, str]:
+    """Section of the initial extraction: small model for short, simple sections (skills, header, ...)."""
+    if len(text or "") <= SMALL_SECTION_CHARS and section not in COMPLEX_FIELDS:
+        return "section.small", SMALL_MODEL
+    return "section.large", LARGE_MODEL
+
+
+def route_entry_update(entry, answer: str) -> tuple[str, str]:
+    """Answer folded into a single profile entry: the delta is one object, small unless long."""
+    size = len(json.dumps(entry, default=str)) if entry is not None else 0
+    if _words(answer) <= SHORT_ANSWER_WORDS and size <= SMALL_ENTRY_CHARS:
+        return "entry_update.small", SMALL_MODEL
+    return "entry_update.large", LARGE_MODEL
+
+
+def route_turn(first_turn: bool, answers: list[str], focus_field: str | None = None, stale: bool = False) -> tuple[str, str]:
+    """
+    Full interview call. The initial extraction, plan invalidations and merges of several or long
+    answers into complex sections use the large model; a clarification or a single short answer
+    outside work/education uses the small one, which returns only the changed sections (schemas.ProfileDelta).
+    """
+    if first_turn:
+        return "turn.initial", LARGE_MODEL
+    if stale:
+        return "turn.replan", LARGE_MODEL
+    total_words = sum(_words(a) for a in answers)
+    if len(answers) <= 1 and total_words <= SHORT_ANSWER_WORDS and focus_field not in COMPLEX_FIELDS:
+        return "turn.light", SMALL_MODEL
+    return "turn.merge", LARGE_MODEL
+
+
+class RouteStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: dict[str, dict] = {}
+
+    def record(self, route: str, model: str, seconds: float, input_tokens=None, output_tokens=None, error: bool = False) -> None:
+        with self._lock:
+            r = self._routes.setdefault(route, {
+                "calls": 0, "errors": 0, "models": {}, "latencies": deque(maxlen=LATENCY_WINDOW),
+                "total_seconds": 0.0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0,
+            })
+            r["calls"] += 1
+            r["errors"] += int(error)
+            r["models"][model] = r["models"].get(model, 0) + 1
+            r["latencies"].append(seconds)
+            r["total_seconds"] += seconds
+            r["input_tokens"] += input_tokens or 0
+            r["output_tokens"] += output_tokens or 0
+            price = PRICES.get(model)
+            if price:
+                r["cost_usd"] += ((input_tokens or 0) * price[0] + (output_tokens or 0) * price[1]) / 1_000_000
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            out = {}
+            for name, r in sorted(self._routes.items()):
+                lat = sorted(r["latencies"])
+                # nearest-rank percentile, as in loadtest.py
+                pick = lambda q: round(lat[max(0, math.ceil(q * len(lat)) - 1)] * 1000, 1) if lat else None
+                out[name] = {
+                    "calls": r["calls"],
+                    "errors": r["errors"],
+                    "models": dict(r["models"]),
+                    "latency_ms": {"p50": pick(0.50), "p95": pick(0.95), "mean": round(r["total_seconds"] / r["calls"] * 1000, 1)},
+                    "input_tokens": r["input_tokens"],
+                    "output_tokens": r["output_tokens"],
+                    "cost_usd": round(r["cost_usd"], 6),
+                }
+            return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+route_stats = RouteStats()
+
+
+def record(route: str, model: str, seconds: float, input_tokens=None, output_tokens=None, error: bool = False) -> None:
+    route_stats.record(route, model, seconds, input_tokens, output_tokens, error)
+
+
+def stats() -> dict:
+    return {
+        "small_model": SMALL_MODEL,
+        "large_model": LARGE_MODEL,
+        "routes": route_stats.snapshot(),
+        "scheduler": llm_scheduler.scheduler.snapshot(),
+    }
+
+
+@lru_cache(maxsize=None)
+def chat_model(model: str):
+    """One ChatOpenAI client per model, reused across calls (langchain_openai is imported on first use)."""
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model=model, temperature=0)
+
+
+def warm_up() -> None:
+    """Build the clients for both tiers ahead of the first request."""
+    for model in dict.fromkeys((SMALL_MODEL, LARGE_MODEL)):
+        chat_model(model)
+
+
+def invoke_structured(route: tuple[str, str], prompt, schema, inputs: dict, priority: int = llm_scheduler.INTERACTIVE):
+    """
+    Run `prompt | model.with_structured_output(schema)` on the routed model and record the call.
+    The call waits for a slot from the shared llm_scheduler (raises SchedulerSaturated if none in time).
+    Raises ValueError (carrying the parsing error) if the output does not parse into `schema`.
+    """
+    name, model = route
+    chain = prompt | chat_model(model).with_structured_output(schema, include_raw=True)
+    tokens = llm_scheduler.estimate_tokens(json.dumps(inputs, default=str), max_output=2000)
+    with llm_scheduler.slot(priority, tokens) as ticket:
+        t0 = time.perf_counter()
+        try:
+            out = chain.invoke(inputs)
+        except Exception:
+            record(name, model, time.perf_counter() - t0, error=True)
+            raise
+        usage = getattr(out.get("raw"), "usage_metadata", None) or {}
+        ticket.settle(usage.get("total_tokens"))
+    error, parsed = out.get("parsing_error"), out.get("parsed")
+    record(name, model, time.perf_counter() - t0, usage.get("input_tokens"), usage.get("output_tokens"), error=parsed is None)
+    if parsed is None:
+        # e.g. the model answered in prose instead of calling the schema tool
+        raise ValueError(f"{model} ({name}) returned no parsable {schema.__name__}: {error!r}") from error
+    return parsed
@@ -1,7 +1,13 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime
+from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, Index, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import JSONB
 from app.database import Base
 from sqlalchemy.sql import func
 
+# JSONB on Postgres (binary, indexable, supports partial updates); plain JSON on other backends.
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+# Same, but Python None is stored as SQL NULL (not JSON 'null') so IS NULL filters work.
+NullableJSONType = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")
+
 class CandidateProfile(Base):
     __tablename__ = "candidate_profiles"
 
@@ -9,18 +15,77 @@ class CandidateProfile(Base):
     name = Column(String, index=True)
     email = Column(String, unique=True, index=True)
     
-    # Structured fields for the template objective function
-    education = Column(JSON) # e.g., [{"university": "...", "degree": "...", "start": "..."}]
-    work_experience = Column(JSON)
-    projects = Column(JSON)
+    # Structured fields for the template objective function.
+    # Mirrors of the matching parsed_data keys, kept in sync by profile_store.save_parsed_data.
+    education = Column(JSONType) # e.g., [{"university": "...", "degree": "...", "start": "..."}]
+    work_experience = Column(JSONType)
+    projects = Column(JSONType)
     
     # Store the parsed unstructured data from the hard-copy resume
     resume_filename = Column(String, nullable=True)
     cover_letter_filename = Column(String, nullable=True)
+    # Fingerprints of the upload parsed_data came from (see utils.fingerprint_upload)
+    resume_sha256 = Column(String(64), nullable=True, index=True)
+    resume_text_sha256 = Column(String(64), nullable=True, index=True)
     
     # The master JSON payload that your agent will generate and update
-    parsed_data = Column(JSON, default=dict)
+    parsed_data = Column(JSONType, default=dict)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # Skill lookups: parsed_data -> 'skills' @> '{"technical": ["Python"]}'
+        Index(
+            "ix_candidate_profiles_skills_gin",
+            text("(parsed_data -> 'skills')"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+        # Company / role lookups: work_experience @> '[{"company": "Acme"}]'
+        Index(
+            "ix_candidate_profiles_work_experience_gin",
+            "work_experience",
+            postgresql_using="gin",
+            postgresql_ops={"work_experience": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+class ProfileVersion(Base):
+    """One interview turn of a profile: a compact diff from the previous turn, plus a full snapshot every few turns."""
+    __tablename__ = "profile_versions"
+
+    id = Column(Integer, primary_key=True)
+    thread_id = Column(String, nullable=False, index=True)
+    turn = Column(Integer, nullable=False)
+
+    # [[op, path, value], ...] from the previous turn; null for snapshot-only rows (turn 0 / new upload)
+    delta = Column(NullableJSONType, nullable=True)
+    # Full profile, stored at turn 0 and every PROFILE_SNAPSHOT_EVERY turns
+    snapshot = Column(NullableJSONType, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (UniqueConstraint("thread_id", "turn", name="uq_profile_versions_thread_turn"),)
+
+
+class UpskillSession(Base):
+    """One upskill-planning conversation per user and target job. The profile itself is read from candidate_profiles."""
+    __tablename__ = "upskill_sessions"
+
+    id = Column(Integer, primary_key=True)
+    email = Column(String, nullable=False, index=True)
+    # sha256 of the normalized job URL (or of the pasted description); one live session per (email, job)
+    job_key = Column(String(64), nullable=False)
+    job_url = Column(String, nullable=True)
+    job_description = Column(Text, nullable=True)
+    stage = Column(String(32), nullable=False)
+
+    # UpskillAgent.context without the profile and job description: conversation, plan, the user's answers
+    state = Column(JSONType, nullable=False, default=dict)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (UniqueConstraint("email", "job_key", name="uq_upskill_sessions_email_job"),)
@@ -0,0 +1,375 @@
+"""
+ReportLab resume renderer: a low-latency alternative to template.tex + pdflatex.
+
+Renders a CandidateProfile (or the tailored info.json dict of the same shape) straight to PDF bytes,
+in-process: no TeX install, no temp files, no compile passes. The layout follows template.tex:
+centred small-caps name over a contact line, small-caps section titles over a rule, two-column
+subheadings (bold left, dates right; italic second row) and bulleted items in a smaller size.
+
+Every line is measured with the font metrics before anything is drawn, so the height of the page is
+known up front. A resume taller than one page is scaled down as a whole (font sizes and spacing) to
+the largest scale that still fits. Height is smooth in the scale, so each measuring pass predicts
+the next one (secant steps) and a few passes land within FIT_TOLERANCE of a full page. Below
+MIN_SCALE it flows onto a second page instead.
+"""
+
+import io
+import math
+import re
+import unicodedata
+from functools import lru_cache
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas as pdf_canvas
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+# template.tex: fullpage with the side margins pulled in 0.6in and the top 0.8in
+MARGIN_X = 0.42 * 72
+MARGIN_TOP = 0.45 * 72
+MARGIN_BOTTOM = 0.45 * 72
+MIN_SCALE = 0.72
+FIT_ITERATIONS = 6
+FIT_TOLERANCE = 0.02
+
+REGULAR, BOLD, ITALIC = "Times-Roman", "Times-Bold", "Times-Italic"
+# Sizes at scale 1, after the template's 11pt article with \small items and a \Huge name
+NAME_SIZE = 24.0
+SECTION_SIZE = 13.0
+BODY_SIZE = 11.0
+SMALL_SIZE = 10.0
+LEADING = 1.18
+BULLET_INDENT = 14.0
+LINK_COLOR = (0.0, 0.0, 0.8)
+
+SECTION_TITLES = {
+    "education": "Education",
+    "skills": "Technical Skills",
+    "work_experience": "Experience",
+    "projects": "Projects",
+    "publications": "Publications",
+    "certifications": "Certifications",
+}
+
+
+def _clean(text) -> str:
+    """Single-line text the standard (cp1252) fonts can draw; other characters are transliterated or dropped."""
+    text = re.sub(r"\s+", " ", str(text or ""))
+    try:
+        text.encode("cp1252")
+        return text
+    except UnicodeEncodeError:
+        out = []
+        for ch in text:
+            try:
+                ch.encode("cp1252")
+                out.append(ch)
+            except UnicodeEncodeError:
+                out.append(unicodedata.normalize("NFKD", ch).encode("cp1252", "ignore").decode("cp1252"))
+        return "".join(out)
+
+
+@lru_cache(maxsize=8192)
+def _unit_width(text: str, font: str) -> float:
+    # Glyph widths scale linearly with the font size, so measure once at 1pt.
+    return stringWidth(text, font, 1.0)
+
+
+def _run(text, font=REGULAR, size=BODY_SIZE, url=None) -> tuple:
+    return (_clean(text), font, size, url)
+
+
+def _join(*parts, sep=" | ") -> str:
+    return sep.join(_clean(p).strip() for p in parts if p and _clean(p).strip())
+
+
+def _url(link: str) -> str:
+    return link if "://" in link or link.startswith("mailto:") else f"https://{link}"
+
+
+def _dates(item: dict, start="start_date", end="end_date") -> str:
+    return _join(item.get(start), item.get(end), sep=" - ")
+
+
+def _as_list(value) -> list:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [v for v in value if v]
+
+
+class _Layout:
+    """Lays the profile out top-down at `scale`. Only measures unless given a canvas to draw on."""
+
+    def __init__(self, scale: float, canvas=None):
+        self.scale = scale
+        self.canvas = canvas
+        self.width = PAGE_WIDTH - 2 * MARGIN_X
+        self.y = PAGE_HEIGHT - MARGIN_TOP
+        self.pages = 1
+
+    # --- measuring ---
+    def _size(self, run) -> float:
+        return run[2] * self.scale
+
+    def _width(self, runs) -> float:
+        return sum(_unit_width(r[0], r[1]) * self._size(r) for r in runs)
+
+    def _wrap(self, runs, width: float) -> list[list[tuple]]:
+        """Greedy word wrap of styled runs into lines no wider than `width`."""
+        lines, line, used = [], [], 0.0
+        for text, font, size, url in runs:
+            for i, word in enumerate(text.split(" ")):
+                # keep the separator between words, but not at the start of a run that glues on (": ...")
+                piece = word if i == 0 else " " + word
+                w = _unit_width(piece, font) * size * self.scale
+                if line and used + w > width and i > 0:
+                    lines.append(line)
+                    piece, w = word, _unit_width(word, font) * size * self.scale
+                    line, used = [], 0.0
+                if piece:
+                    if line and line[-1][1:] == (font, size, url):
+                        line[-1] = (line[-1][0] + piece, font, size, url)
+                    else:
+                        line.append((piece, font, size, url))
+                    used += w
+        if line:
+            lines.append(line)
+        return lines
+
+    # --- placing ---
+    def gap(self, points: float) -> None:
+        self.y -= points * self.scale
+
+    def _next_line(self, size: float) -> float:
+        """Advance to the next baseline for text of `size` (already scaled); breaks pages when drawing."""
+        if self.canvas is not None and self.y - size * LEADING < MARGIN_BOTTOM:
+            self.canvas.showPage()
+            self.pages += 1
+            self.y = PAGE_HEIGHT - MARGIN_TOP
+        self.y -= size
+        baseline = self.y
+        self.y -= size * (LEADING - 1)
+        return baseline
+
+    def _draw(self, runs, x: float, baseline: float) -> None:
+        for text, font, size, url in runs:
+            size = size * self.scale
+            w = _unit_width(text, font) * size
+            if self.canvas is not None:
+                self.canvas.setFont(font, size)
+                if url:
+                    self.canvas.setFillColorRGB(*LINK_COLOR)
+                    self.canvas.drawString(x, baseline, text)
+                    self.canvas.setFillColorRGB(0, 0, 0)
+                    self.canvas.linkURL(url, (x, baseline - 2, x + w, baseline + size), relative=0)
+                else:
+                    self.canvas.drawString(x, baseline, text)
+            x += w
+
+    def paragraph(self, runs, indent: float = 0.0, bullet: bool = False, align: str = "left") -> None:
+        indent *= self.scale
+        for i, line in enumerate(self._wrap(runs, self.width - indent)):
+            size = max(self._size(r) for r in line)
+            baseline = self._next_line(size)
+            x = MARGIN_X + indent
+            if align == "center":
+                x = MARGIN_X + (self.width - self._width(line)) / 2
+            if bullet and i == 0:
+                self._draw([("•", REGULAR, line[0][2], None)], x - BULLET_INDENT * self.scale * 0.7, baseline)
+            self._draw(line, x, baseline)
+
+    def two_column(self, left, right) -> None:
+        """Left runs wrap in the space the right-aligned runs leave on the first line."""
+        right = [r for r in right if r[0]]
+        right_width = self._width(right)
+        lines = self._wrap([r for r in left if r[0]], self.width - right_width - (8 * self.scale if right else 0))
+        for i, line in enumerate(lines or [[]]):
+            runs = line + (right if i == 0 else [])
+            size = max((self._size(r) for r in runs), default=BODY_SIZE * self.scale)
+            baseline = self._next_line(size)
+            self._draw(line, MARGIN_X, baseline)
+            if i == 0 and right:
+                self._draw(right, MARGIN_X + self.width - right_width, baseline)
+
+    def small_caps(self, text: str, size: float, center: bool = False) -> None:
+        """Small caps as in \\scshape: capitals at full size, lower case as capitals at 80%."""
+        runs = []
+        for ch in _clean(text):
+            small = ch.islower()
+            run_size = size * 0.8 if small else size
+            if runs and runs[-1][2] == run_size:
+                runs[-1] = (runs[-1][0] + ch.upper(), REGULAR, run_size, None)
+            else:
+                runs.append((ch.upper(), REGULAR, run_size, None))
+        baseline = self._next_line(size * self.scale)
+        x = MARGIN_X + ((self.width - self._width(runs)) / 2 if center else 0)
+        self._draw(runs, x, baseline)
+
+    def rule(self) -> None:
+        self.gap(2)
+        if self.canvas is not None:
+            self.canvas.setLineWidth(0.5)
+            self.canvas.line(MARGIN_X, self.y, MARGIN_X + self.width, self.y)
+        self.gap(4)
+
+    # --- resume blocks ---
+    def header(self, info: dict) -> None:
+        self.small_caps(info.get("name") or "", NAME_SIZE, center=True)
+        self.gap(2)
+        contact = []
+        for key in ("location", "phone", "email", "linkedin", "github", "portfolio"):
+            value = _clean(info.get(key)).strip()
+            if not value:
+                continue
+            url = None
+            if key == "email":
+                url = f"mailto:{value}"
+            elif key in ("linkedin", "github", "portfolio"):
+                url, value = _url(value), value.split("://", 1)[-1].rstrip("/")
+            if contact:
+                contact.append(_run("  |  ", size=SMALL_SIZE))
+            contact.append(_run(value, size=SMALL_SIZE, url=url))
+        if contact:
+            self.paragraph(contact, align="center")
+        self.gap(2)
+
+    def section(self, title: str) -> None:
+        self.gap(5)
+        self.small_caps(title, SECTION_SIZE)
+        self.rule()
+
+    def bullets(self, items) -> None:
+        for text in _as_list(items):
+            self.paragraph([_run(text, size=SMALL_SIZE)], indent=BULLET_INDENT, bullet=True)
+
+    def education(self, items) -> None:
+        for edu in items:
+            degree = _join(edu.get("degree"), edu.get("field_of_study"), sep=": ")
+            gpa = edu.get("gpa")
+            if isinstance(gpa, dict):
+                gpa = ", ".join(f"{k}: {v}" for k, v in gpa.items())
+            self.two_column([_run(edu.get("institution"), BOLD)], [_run(_dates(edu))])
+            self.two_column(
+                [_run(_join(degree, f"GPA {gpa}" if gpa else None, sep=", "), ITALIC, SMALL_SIZE)],
+                [_run(edu.get("location"), ITALIC, SMALL_SIZE)],
+            )
+            coursework = _as_list(edu.get("coursework"))
+            if coursework:
+                self.paragraph([_run("Relevant Coursework", BOLD, SMALL_SIZE), _run(": " + ", ".join(coursework), size=SMALL_SIZE)])
+            self.gap(3)
+
+    def skills(self, skills) -> None:
+        groups = skills.items() if isinstance(skills, dict) else [("skills", skills)]
+        for key, values in groups:
+            values = _as_list(values)
+            if values:
+                label = {"technical": "Technical", "tools": "Tools", "soft_skills": "Soft Skills"}.get(key, key.replace("_", " ").title())
+                self.paragraph([_run(label, BOLD, SMALL_SIZE), _run(": " + ", ".join(map(str, values)), size=SMALL_SIZE)])
+
+    def work_experience(self, items) -> None:
+        for job in items:
+            self.two_column(
+                [_run(job.get("company"), BOLD), _run(" | " if job.get("role") else ""), _run(job.get("role"))],
+                [_run(_join(job.get("location"), _dates(job), sep=" • "), ITALIC, SMALL_SIZE)],
+            )
+            self.bullets(job.get("bullets"))
+            self.gap(3)
+
+    def projects(self, items) -> None:
+        for project in items:
+            link = _clean(project.get("link")).strip()
+            left = [_run(project.get("title") or project.get("name"), BOLD)]
+            if link:
+                left += [_run(" | "), _run("Link", url=_url(link))]
+            self.two_column(left, [_run(project.get("date") or _dates(project), ITALIC, SMALL_SIZE)])
+            self.bullets(project.get("bullets") or project.get("description"))
+            self.gap(3)
+
+    def publications(self, items) -> None:
+        for pub in items:
+            left = [_run(pub.get("title"), BOLD)]
+            if pub.get("publisher"):
+                left.append(_run(", " + _clean(pub.get("publisher")), ITALIC))
+            if pub.get("link"):
+                left += [_run(" | "), _run("Link", url=_url(_clean(pub["link"]).strip()))]
+            self.two_column(left, [_run(pub.get("date"), ITALIC, SMALL_SIZE)])
+            self.gap(2)
+
+    def certifications(self, items) -> None:
+        for cert in items:
+            left = [_run(cert.get("name"), BOLD)]
+            if cert.get("issuer"):
+                left.append(_run(" | " + _clean(cert.get("issuer"))))
+            self.two_column(left, [_run(cert.get("date"), ITALIC, SMALL_SIZE)])
+
+    def render(self, profile: dict) -> float:
+        """Lay out the whole resume; returns the y position where it ends."""
+        self.header(profile.get("personal_info") or {})
+        # Sections follow the profile's own key order (as the LaTeX path does), unknown keys are skipped.
+        for key in [k for k in profile if k in SECTION_TITLES]:
+            value = profile.get(key)
+            if not value:
+                continue
+            if key != "skills" and not isinstance(value, list):
+                continue
+            self.section(SECTION_TITLES[key])
+            getattr(self, key)([v for v in value if isinstance(v, dict)] if key != "skills" else value)
+        return self.y
+
+
+def _height(profile: dict, scale: float) -> float:
+    return PAGE_HEIGHT - MARGIN_TOP - _Layout(scale).render(profile)
+
+
+def fit_scale(profile: dict, min_scale: float = MIN_SCALE) -> float:
+    """Largest scale in [min_scale, 1] at which the resume fits on one page (min_scale if none does)."""
+    available = PAGE_HEIGHT - MARGIN_TOP - MARGIN_BOTTOM
+    target = available * (1 - FIT_TOLERANCE / 2)
+    fits = over = last = None  # (scale, used) of the largest fitting / smallest overflowing / previous pass
+    scale = 1.0
+    for _ in range(FIT_ITERATIONS):
+        used = _height(profile, scale)
+        if used <= available:
+            fits = (scale, used) if fits is None or scale > fits[0] else fits
+            if scale == 1.0 or used >= available * (1 - FIT_TOLERANCE):
+                break
+        else:
+            over = (scale, used) if over is None or scale < over[0] else over
+            if scale == min_scale:
+                break
+        # Interpolate between a fitting and an overflowing pass, else extrapolate from the last two,
+        # else (first pass) assume height ~ scale^2.
+        a, b = (fits, over) if fits else (last, (scale, used))
+        if a and b[1] != a[1]:
+            proposed = a[0] + (target - a[1]) * (b[0] - a[0]) / (b[1] - a[1])
+        else:
+            proposed = scale * math.sqrt(target / used)
+        last = (scale, used)
+        proposed = min(over[0] - 1e-3, max(fits[0] if fits else min_scale, proposed))
+        if fits and proposed <= fits[0]:
+            break
+        scale = proposed
+    return fits[0] if fits else min_scale
+
+
+def render_profile_pdf(profile, info: dict | None = None, min_scale: float = MIN_SCALE) -> bytes:
+    """
+    Render a CandidateProfile (model or dict) to PDF bytes, scaled to fit one page where possible.
+    Pass `info` to receive the chosen scale and page count.
+    """
+    data = profile.model_dump() if hasattr(profile, "model_dump") else dict(profile or {})
+    scale = fit_scale(data, min_scale)
+    buf = io.BytesIO()
+    canvas = pdf_canvas.Canvas(buf, pagesize=letter)
+    name = _clean((data.get("personal_info") or {}).get("name"))
+    canvas.setTitle(f"{name} - Resume" if name else "Resume")
+    canvas.setAuthor(name)
+    layout = _Layout(scale, canvas)
+    layout.render(data)
+    canvas.showPage()
+    canvas.save()
+    if info is not None:
+        info.update({"scale": round(scale, 3), "pages": layout.pages})
+    return buf.getvalue()
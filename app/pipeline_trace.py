@@ -0,0 +1,114 @@
+"""
+Span-based tracing for the tailoring pipeline.
+
+Each span records a name, its parent, wall-clock duration and free-form attributes. Finished spans
+are appended as one JSON object per line to the trace file (RESUME_TRACE_FILE, if set) and kept in
+memory for the current trace so `format_report()` can print a per-stage breakdown.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+TRACE_FILE_ENV = "RESUME_TRACE_FILE"
+
+
+class Tracer:
+    def __init__(self, path: Path | str | None = None):
+        self.path = Path(path) if path else None
+        self.trace_id = uuid.uuid4().hex
+        self.spans: list[dict] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> list[dict]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """Time a block of work. Yields the attrs dict so callers can attach results to the span."""
+        stack = self._stack()
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": uuid.uuid4().hex[:16],
+            "parent_id": stack[-1]["span_id"] if stack else None,
+            "name": name,
+            "depth": len(stack),
+            "start": time.time(),
+            "attrs": dict(attrs),
+        }
+        stack.append(record)
+        t0 = time.perf_counter()
+        try:
+            yield record["attrs"]
+        except BaseException as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record["duration_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+            stack.pop()
+            self._emit(record)
+
+    def _emit(self, record: dict) -> None:
+        with self._lock:
+            self.spans.append(record)
+            if not self.path:
+                return
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+            except OSError:
+                pass
+
+
+_tracer = Tracer(os.environ.get(TRACE_FILE_ENV))
+
+
+def start_trace(path: Path | str | None = None) -> Tracer:
+    """Begin a new trace (fresh trace_id and span list). Falls back to RESUME_TRACE_FILE for output."""
+    global _tracer
+    _tracer = Tracer(path or os.environ.get(TRACE_FILE_ENV))
+    return _tracer
+
+
+def current_tracer() -> Tracer:
+    return _tracer
+
+
+def span(name: str, **attrs):
+    return _tracer.span(name, **attrs)
+
+
+def format_report(tracer: Tracer | None = None) -> str:
+    """Per-stage timing table for a finished trace, in the order stages first started."""
+    tracer = tracer or _tracer
+    spans = sorted(tracer.spans, key=lambda s: s["start"])
+    if not spans:
+        return "No spans recorded."
+
+    stages: dict[str, dict] = {}
+    for s in spans:
+        row = stages.setdefault(s["name"], {"depth": s["depth"], "calls": 0, "total_ms": 0.0})
+        row["calls"] += 1
+        row["total_ms"] += s["duration_ms"]
+
+    roots = [s for s in spans if s["parent_id"] is None]
+    wall_ms = sum(s["duration_ms"] for s in roots) or 1.0
+
+    lines = [f"{'Stage':<44}{'calls':>6}{'total ms':>12}{'share':>8}", "-" * 70]
+    for name, row in stages.items():
+        label = ("  " * row["depth"]) + name
+        share = 100.0 * row["total_ms"] / wall_ms
+        lines.append(f"{label:<44}{row['calls']:>6}{row['total_ms']:>12.1f}{share:>7.1f}%")
+    lines.append("-" * 70)
+    lines.append(f"{'Total':<44}{'':>6}{wall_ms:>12.1f}")
+    lines.append(f"pdflatex passes: {stages.get('latex.pass', {}).get('calls', 0)}")
+    lines.append(f"tighten iterations: {stages.get('latex.tighten', {}).get('calls', 0)}")
+    return "\n".join(lines)
@@ -0,0 +1,94 @@
+# app/profile_cache.py
+"""
+Read-through cache of the login view of a profile (id, name, has_saved_master, parsed_data, updated_at).
+
+Used by /auth/ and by every upskill turn (upskill_service reads the profile through it). Entries
+expire after PROFILE_CACHE_TTL seconds. profile_store writes through it: after a save the entry holds
+the new profile and its updated_at, so a worker never serves its own stale data and the next save
+can diff against the cached profile (after checking updated_at) instead of loading the blob again;
+other workers converge within the TTL.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import String, case, cast, func
+from sqlalchemy.orm import Session
+from app import models
+
+CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "30"))
+CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "2048"))
+
+
+class ProfileCache:
+    def __init__(self, ttl: float = CACHE_TTL, max_size: int = CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, email: str) -> dict | None:
+        with self._lock:
+            item = self._entries.get(email)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._entries[email]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(email)
+            self.hits += 1
+            return item[1]
+
+    def put(self, email: str, value: dict) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[email] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(email)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, email: str) -> None:
+        with self._lock:
+            self._entries.pop(email, None)
+
+
+profile_cache = ProfileCache()
+
+
+def _has_master_expr():
+    # '{}' / 'null' / NULL all mean "no saved master"; works for JSON (SQLite) and JSONB (Postgres).
+    as_text = func.coalesce(cast(models.CandidateProfile.parsed_data, String), "")
+    return as_text.notin_(["", "{}", "null"])
+
+
+def get_profile_summary(db: Session, email: str) -> dict | None:
+    """Cached login lookup. parsed_data is only fetched from the DB when it is non-empty."""
+    cached = profile_cache.get(email)
+    if cached is not None:
+        return cached
+
+    P = models.CandidateProfile
+    has_master = _has_master_expr()
+    row = (
+        db.query(
+            P.id, P.name, P.updated_at, has_master.label("has_master"),
+            case((has_master, P.parsed_data), else_=None).label("parsed_data"),
+        )
+        .filter(P.email == email)
+        .first()
+    )
+    if row is None:
+        return None
+    summary = {
+        "id": row.id,
+        "name": row.name,
+        "has_saved_master": bool(row.has_master),
+        "parsed_data": row.parsed_data or {},
+        "updated_at": row.updated_at,
+    }
+    profile_cache.put(email, summary)
+    return summary
+
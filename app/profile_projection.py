@@ -0,0 +1,205 @@
+"""
+Compact, job-relevant projection of a candidate profile for LLM prompts.
+
+Prompts used to embed the whole profile (json.dumps with indentation, or cut blindly at a
+character limit, which can end mid-object). project_profile() instead returns minified JSON that:
+
+  - drops null / empty values ("", [], {}) at every level;
+  - keeps personal_info and skills whole (every prompt needs them);
+  - when the profile is over the token budget, ranks the entries of the list sections
+    (work_experience, projects, education, ...) by a section weight plus their word overlap with
+    the job description and keeps them best-first until the budget is spent. An entry that does
+    not fit whole keeps its most relevant bullets; entries that still do not fit are left out
+    rather than cut mid-way, and what was trimmed is logged;
+  - keeps the profile's own section and entry order, so callers that lay out sections in the
+    order the model returns them (tailoring) see the resume as written. Relevance only decides
+    what to trim.
+
+The output is always valid JSON. Results are memoised in a small LRU keyed by profile version
+(a hash of the profile content), job description and budget, so repeated turns over the same
+profile and job do no work.
+
+    PROFILE_PROJECTION_CACHE   entries kept in the LRU (default 256)
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+
+PINNED_SECTIONS = ("personal_info", "skills")
+SECTION_WEIGHTS = {
+    "work_experience": 1.0,
+    "projects": 0.8,
+    "education": 0.6,
+    "certifications": 0.5,
+    "publications": 0.4,
+    "application_history": 0.1,
+}
+OTHER_SECTION_WEIGHT = 0.3
+CACHE_SIZE = int(os.getenv("PROFILE_PROJECTION_CACHE", "256"))
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9+#.\-/]*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or our that the their this to we will with you your "
+    "using used into across over per via".split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token, as in llm_scheduler.estimate_tokens."""
+    return len(text or "") // 4
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def _terms(text: str) -> set[str]:
+    return {t for t in (w.rstrip(".-/") for w in _WORD.findall((text or "").lower())) if len(t) > 1 and t not in _STOPWORDS}
+
+
+def _strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for v in value.values():
+            yield from _strings(v)
+    elif isinstance(value, list):
+        for v in value:
+            yield from _strings(v)
+
+
+def prune(value):
+    """Drop None and empty strings/lists/dicts recursively; returns None if nothing is left."""
+    if isinstance(value, dict):
+        out = {k: v for k, v in ((k, prune(v)) for k, v in value.items()) if v is not None}
+        return out or None
+    if isinstance(value, list):
+        out = [v for v in (prune(v) for v in value) if v is not None]
+        return out or None
+    if isinstance(value, str):
+        return value.strip() or None
+    return value
+
+
+def relevance(value, job_terms: set[str]) -> float:
+    """Share of the entry's distinct terms that appear in the job description, damped by entry length."""
+    if not job_terms:
+        return 0.0
+    terms = _terms(" ".join(_strings(value)))
+    if not terms:
+        return 0.0
+    return len(terms & job_terms) / math.sqrt(len(terms))
+
+
+def _shrink(entry, job_terms: set[str], room: int):
+    """The entry with its lowest-relevance bullets removed until it fits in `room` characters, or None."""
+    if not isinstance(entry, dict):
+        return None
+    lists = [k for k, v in entry.items() if isinstance(v, list) and v and all(isinstance(s, str) for s in v)]
+    if not lists:
+        return None
+    key = max(lists, key=lambda k: len(_dumps(entry[k])))
+    ranked = sorted(range(len(entry[key])), key=lambda i: -relevance(entry[key][i], job_terms))
+    for keep in range(len(ranked) - 1, 0, -1):
+        kept = sorted(ranked[:keep])
+        candidate = {**entry, key: [entry[key][i] for i in kept]}
+        if len(_dumps(candidate)) <= room:
+            return candidate
+    return None
+
+
+def _project(profile: dict, job_description: str, max_tokens: int) -> str:
+    data = prune(profile) or {}
+    budget = max_tokens * 4
+    if len(_dumps(data)) <= budget:
+        return _dumps(data)
+
+    job_terms = _terms(job_description)
+    used = len(_dumps({k: data[k] for k in PINNED_SECTIONS if k in data}))
+    candidates = []  # (score, section, index, entry)
+    for section, value in data.items():
+        if section in PINNED_SECTIONS:
+            continue
+        weight = SECTION_WEIGHTS.get(section, OTHER_SECTION_WEIGHT)
+        entries = value if isinstance(value, list) else [value]
+        for i, entry in enumerate(entries):
+            # Earlier entries are usually the more recent ones: a slight edge breaks ties.
+            candidates.append((weight + relevance(entry, job_terms) - i * 0.01, section, i, entry))
+
+    chosen: dict[str, dict[int, object]] = {}
+    dropped, shortened = [], []
+    for score, section, i, entry in sorted(candidates, key=lambda c: -c[0]):
+        # Cost of the entry plus the separators / section key it adds.
+        overhead = 1 if section in chosen else len(_dumps(section)) + 4
+        size = len(_dumps(entry)) + overhead
+        if used + size > budget:
+            entry = _shrink(entry, job_terms, budget - used - overhead)
+            if entry is None:
+                dropped.append(f"{section}[{i}]")
+                continue
+            shortened.append(f"{section}[{i}]")
+            size = len(_dumps(entry)) + overhead
+        chosen.setdefault(section, {})[i] = entry
+        used += size
+
+    result = {}
+    for section, value in data.items():
+        if section in PINNED_SECTIONS:
+            result[section] = value
+        elif section in chosen:
+            entries = [chosen[section][i] for i in sorted(chosen[section])]
+            result[section] = entries if isinstance(value, list) else entries[0]
+    print(
+        f"Profile projection over {max_tokens} tokens: dropped {', '.join(dropped) or 'nothing'}; "
+        f"fewer bullets in {', '.join(shortened) or 'nothing'}"
+    )
+    return _dumps(result)
+
+
+class ProjectionCache:
+    def __init__(self, max_size: int = CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> str | None:
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key: tuple, text: str) -> None:
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+projection_cache = ProjectionCache()
+
+
+def profile_version(profile: dict | None) -> str:
+    return hashlib.blake2b(json.dumps(profile or {}, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def project_profile(profile: dict | None, job_description: str = "", max_tokens: int = 3000) -> str:
+    """Minified JSON of the profile's most job-relevant content within about `max_tokens` tokens."""
+    job_digest = hashlib.blake2b((job_description or "").encode("utf-8"), digest_size=16).hexdigest()
+    key = (profile_version(profile), job_digest, max_tokens)
+    text = projection_cache.get(key)
+    if text is None:
+        text = _project(profile or {}, job_description or "", max_tokens)
+        projection_cache.put(key, text)
+    return text
@@ -0,0 +1,111 @@
+# app/profile_store.py
+"""
+Writes of the master profile (`CandidateProfile.parsed_data`).
+
+On Postgres only the top-level keys that changed are sent, merged server-side with the JSONB
+`||` / `-` operators, instead of rewriting the whole document. The education / work_experience /
+projects columns are kept in sync so readers can fetch a single section without the full blob,
+and the search index row is refreshed in the same transaction.
+
+On Postgres the diff is taken against the profile in profile_cache when its updated_at (microsecond
+precision) still matches the row, so a save only loads parsed_data when another writer got there
+first. SQLite stamps have one-second precision and always reload. Saves write the new profile
+through to the cache.
+"""
+import copy
+import json
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app import matching, models, search
+from app.profile_cache import get_profile_summary, profile_cache
+from app.migrations import PROFILE_SECTION_COLUMNS
+
+
+def diff_top_level(old: dict | None, new: dict | None) -> tuple[dict, list[str]]:
+    """Return ({key: new_value} for added/changed keys, [removed keys])."""
+    old = old or {}
+    new = new or {}
+    changed = {k: v for k, v in new.items() if k not in old or old[k] != v}
+    removed = [k for k in old if k not in new]
+    return changed, removed
+
+
+def find_reusable_profile(db: Session, email: str, fingerprint: dict) -> dict | None:
+    """The saved profile for `email` if it was built from the same upload (exact file or exact normalized text)."""
+    P = models.CandidateProfile
+    row = db.query(P.resume_sha256, P.resume_text_sha256).filter(P.email == email).first()
+    if not row:
+        return None
+    same_file = row.resume_sha256 and row.resume_sha256 == fingerprint.get("file_sha256")
+    same_text = row.resume_text_sha256 and row.resume_text_sha256 == fingerprint.get("text_sha256")
+    if not (same_file or same_text):
+        return None  # the common case: no need to load the profile at all
+    summary = get_profile_summary(db, email)
+    return summary["parsed_data"] if summary and summary["has_saved_master"] else None
+
+
+def _saved_profile(db: Session, email: str, row) -> dict | None:
+    """The stored parsed_data, from profile_cache when the row has not changed since it was cached."""
+    cached = profile_cache.get(email)
+    trusted = db.get_bind().dialect.name == "postgresql" and row.updated_at is not None
+    if trusted and cached is not None and cached["id"] == row.id and cached.get("updated_at") == row.updated_at:
+        return cached["parsed_data"]
+    P = models.CandidateProfile
+    return db.query(P.parsed_data).filter(P.id == row.id).scalar()
+
+
+def save_parsed_data(db: Session, email: str, new_data: dict | None, fingerprint: dict | None = None) -> bool:
+    """
+    Persist the agent's profile for `email`. Returns False if no such user exists.
+    `fingerprint` (from utils.fingerprint_upload, plus optional "filename") records which upload it came from.
+    """
+    P = models.CandidateProfile
+    row = db.query(P.id, P.name, P.updated_at).filter(P.email == email).first()
+    if not row:
+        return False
+
+    new_data = new_data or {}
+    changed, removed = diff_top_level(_saved_profile(db, email, row), new_data)
+    upload_columns = {}
+    if fingerprint:
+        upload_columns = {
+            "resume_sha256": fingerprint.get("file_sha256"),
+            "resume_text_sha256": fingerprint.get("text_sha256"),
+            "resume_filename": fingerprint.get("filename"),
+        }
+    if not changed and not removed and not upload_columns:
+        return True
+
+    sections = {c: new_data.get(c) for c in PROFILE_SECTION_COLUMNS if c in changed or c in removed}
+
+    if db.get_bind().dialect.name == "postgresql":
+        assignments = [
+            "parsed_data = (COALESCE(parsed_data, '{}'::jsonb) - CAST(:removed AS text[])) || CAST(:patch AS jsonb)",
+            "updated_at = now()",
+        ]
+        params = {"id": row.id, "removed": removed, "patch": json.dumps(changed, default=str)}
+        for column, value in sections.items():
+            assignments.append(f"{column} = CAST(:{column} AS jsonb)")
+            params[column] = json.dumps(value, default=str) if value is not None else None
+        for column, value in upload_columns.items():
+            assignments.append(f"{column} = :{column}")
+            params[column] = value
+        updated_at = db.execute(
+            text(f"UPDATE candidate_profiles SET {', '.join(assignments)} WHERE id = :id RETURNING updated_at"),
+            params,
+        ).scalar()
+    else:
+        values = {"parsed_data": new_data, **sections, **upload_columns}
+        db.query(P).filter(P.id == row.id).update(values, synchronize_session=False)
+        updated_at = db.query(P.updated_at).filter(P.id == row.id).scalar()
+    search.index_profile(db, row.id, new_data, row.name)
+    db.commit()
+    profile_cache.put(email, {
+        "id": row.id,
+        "name": row.name,
+        "has_saved_master": bool(new_data),
+        "parsed_data": copy.deepcopy(new_data),
+        "updated_at": updated_at,
+    })
+    matching.on_profile_saved(row.id, new_data, row.name)
+    return True
@@ -0,0 +1,168 @@
+# app/profile_versions.py
+"""
+Per-turn version history of the interview profile, stored as compact JSON diffs.
+
+Turn 0 (and every new upload) stores the full profile as a snapshot. Each later turn stores only the
+diff from the previous turn (empty if the answer changed nothing, so version numbers stay the
+interview's turn numbers), plus a full snapshot every SNAPSHOT_EVERY turns so reconstructing
+any version never replays more than SNAPSHOT_EVERY - 1 deltas.
+
+Diff format: a list of [op, path, value] where op is "s" (set) or "d" (delete) and path is a list
+of dict keys / list indices. Lists that only grew get per-item appends; otherwise a changed list of
+different length is replaced whole.
+
+Turn numbers are read-then-inserted, so two writers on one thread (an upload racing a turn, two
+workers) can pick the same turn. The loser hits the (thread_id, turn) unique constraint, rolls back
+and records again on top of the winner's row.
+"""
+import copy
+import os
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app import models
+
+SNAPSHOT_EVERY = int(os.getenv("PROFILE_SNAPSHOT_EVERY", "10"))
+RECORD_ATTEMPTS = 3
+
+
+def json_diff(old, new, path=None) -> list:
+    path = path or []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append(["d", path + [key], None])
+        for key, value in new.items():
+            if key not in old:
+                ops.append(["s", path + [key], value])
+            elif old[key] != value:
+                ops.extend(json_diff(old[key], value, path + [key]))
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        if len(old) == len(new):
+            ops = []
+            for i, (a, b) in enumerate(zip(old, new)):
+                if a != b:
+                    ops.extend(json_diff(a, b, path + [i]))
+            return ops
+        if len(new) > len(old) and new[:len(old)] == old:
+            return [["s", path + [i], new[i]] for i in range(len(old), len(new))]
+    if old == new:
+        return []
+    return [["s", path, new]]
+
+
+def apply_diff(doc, ops: list):
+    """Return a new document with `ops` applied; `doc` is left untouched."""
+    doc = copy.deepcopy(doc)
+    for op, path, value in ops:
+        if not path:
+            doc = copy.deepcopy(value) if op == "s" else None
+            continue
+        parent = doc
+        for key in path[:-1]:
+            parent = parent[key]
+        last = path[-1]
+        if op == "d":
+            del parent[last]
+        elif isinstance(parent, list) and last == len(parent):
+            parent.append(copy.deepcopy(value))
+        else:
+            parent[last] = copy.deepcopy(value)
+    return doc
+
+
+def _latest(db: Session, thread_id: str):
+    V = models.ProfileVersion
+    return db.query(V.turn, V.snapshot.isnot(None).label("has_snapshot")).filter(V.thread_id == thread_id).order_by(V.turn.desc()).first()
+
+
+def get_version(db: Session, thread_id: str, turn: int | None = None) -> dict | None:
+    """Reconstruct the profile at `turn` (latest if None) from the nearest snapshot plus deltas; None if no such turn."""
+    V = models.ProfileVersion
+    if turn is None:
+        latest = _latest(db, thread_id)
+        if latest is None:
+            return None
+        turn = latest.turn
+    elif db.query(V.id).filter(V.thread_id == thread_id, V.turn == turn).first() is None:
+        return None
+    base = (
+        db.query(V.turn, V.snapshot)
+        .filter(V.thread_id == thread_id, V.turn <= turn, V.snapshot.isnot(None))
+        .order_by(V.turn.desc())
+        .first()
+    )
+    if base is None:
+        return None
+    deltas = (
+        db.query(V.delta)
+        .filter(V.thread_id == thread_id, V.turn > base.turn, V.turn <= turn)
+        .order_by(V.turn)
+        .all()
+    )
+    doc = base.snapshot
+    for (ops,) in deltas:
+        doc = apply_diff(doc, ops or [])
+    return doc
+
+
+def record_version(db: Session, thread_id: str, profile: dict | None, previous: dict | None = None, new_base: bool = False) -> int:
+    """
+    Append the profile for the next turn. `previous` is the profile of the last recorded turn, when the
+    caller has it (saves a reconstruction). `new_base` starts a fresh history segment (new upload).
+    Returns the turn number.
+    """
+    for attempt in range(RECORD_ATTEMPTS):
+        try:
+            return _record(db, thread_id, profile or {}, previous, new_base)
+        except IntegrityError:
+            db.rollback()
+            if attempt == RECORD_ATTEMPTS - 1:
+                raise
+            previous = None  # the turn we diffed against is no longer the latest
+
+
+def _record(db: Session, thread_id: str, profile: dict, previous: dict | None, new_base: bool) -> int:
+    latest = _latest(db, thread_id)
+    turn = 0 if latest is None else latest.turn + 1
+
+    if latest is None or new_base:
+        row = models.ProfileVersion(thread_id=thread_id, turn=turn, delta=None, snapshot=profile)
+    else:
+        if previous is None:
+            previous = get_version(db, thread_id, latest.turn) or {}
+        ops = json_diff(previous, profile)  # may be empty: the turn is still recorded
+        snapshot = profile if turn % SNAPSHOT_EVERY == 0 else None
+        row = models.ProfileVersion(thread_id=thread_id, turn=turn, delta=ops, snapshot=snapshot)
+    db.add(row)
+    db.commit()
+    return turn
+
+
+def list_versions(db: Session, thread_id: str) -> list[dict]:
+    V = models.ProfileVersion
+    rows = (
+        db.query(V.turn, V.delta, V.snapshot.isnot(None).label("has_snapshot"), V.created_at)
+        .filter(V.thread_id == thread_id)
+        .order_by(V.turn)
+        .all()
+    )
+    return [
+        {
+            "turn": r.turn,
+            "changes": len(r.delta or []),
+            "changed_fields": sorted({str(op[1][0]) for op in (r.delta or []) if op[1]}),
+            "snapshot": bool(r.has_snapshot),
+            "created_at": r.created_at,
+        }
+        for r in rows
+    ]
+
+
+def diff_versions(db: Session, thread_id: str, from_turn: int, to_turn: int) -> list | None:
+    old = get_version(db, thread_id, from_turn)
+    new = get_version(db, thread_id, to_turn)
+    if old is None or new is None:
+        return None
+    return json_diff(old, new)
@@ -12,13 +12,24 @@ body text — only headers, lines, margins.
 
 Finally: compile to PDF (pdf/resume_<Name>.pdf).
 Requires: OpenAI API key in json/config.json, pdflatex on PATH.
+Run `python resume_builder.py --profile` to print a per-stage timing breakdown (see pipeline_trace.py).
+
+With --stream, Step 1 is streamed and parsed as it arrives (json_stream.py): each top-level section
+is sent to its own Step 2 call as soon as it is complete, so LaTeX generation overlaps enhancement.
+The preamble is taken from template.tex as-is and the sections are assembled in Step 1 order.
+
+With --engine reportlab, Step 2 and pdflatex are skipped: the enhanced content is rendered straight to
+PDF in-process by pdf_renderer.py (same layout as template.tex, scaled to fit one page).
 """
 
+import argparse
 import json
 import os
 import re
 import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from urllib.error import URLError
 from urllib.request import Request, urlopen
@@ -35,6 +46,18 @@ try:
 except ImportError:
     OpenAI = None
 
+try:
+    from app.json_stream import SectionStream
+    from app.pipeline_trace import format_report, span, start_trace
+    from app.profile_projection import project_profile
+    from app import llm_scheduler, model_router
+except ImportError:
+    from json_stream import SectionStream
+    from pipeline_trace import format_report, span, start_trace
+    from profile_projection import project_profile
+    import llm_scheduler
+    import model_router
+
 SCRIPT_DIR = Path(__file__).resolve().parent
 PROJECT_DIR = SCRIPT_DIR.parent
 JSON_DIR = SCRIPT_DIR / "json"
@@ -45,6 +68,10 @@ INFO_FILE = JSON_DIR / "info.json"
 CONFIG_FILE = JSON_DIR / "config.json"
 TEMPLATE_TEX = TEX_DIR / "template.tex"
 OUTPUT_DIR = PDF_DIR
+SECTION_WORKERS = int(os.environ.get("TAILOR_SECTION_WORKERS", "4"))
+# Token budget for info.json in the Step 1 prompt (see profile_projection.py)
+PROFILE_TOKENS = int(os.environ.get("TAILOR_PROFILE_TOKENS", "7500"))
+ENGINES = ("latex", "reportlab")
 
 
 def _first_existing(*paths: Path) -> Path | None:
@@ -74,6 +101,16 @@ def load_job_link(link_path: Path) -> str:
     raise ValueError("No valid URL in link.txt")
 
 
+# Placeholders fetch_job_description() returns instead of raising when there is no description.
+FETCH_FAILED_PREFIX = "[Could not fetch:"
+UNRECOGNIZED_PAGE = "[Job page structure not recognized.]"
+
+
+def is_fetch_failure(text: str) -> bool:
+    text = (text or "").strip()
+    return not text or text.startswith(FETCH_FAILED_PREFIX) or text == UNRECOGNIZED_PAGE
+
+
 def fetch_job_description(url: str) -> str:
     def _render_with_playwright(target_url: str) -> str | None:
         try:
@@ -82,7 +119,7 @@ def fetch_job_description(url: str) -> str:
             return None
 
         try:
-            with sync_playwright() as p:
+            with span("jd.playwright", url=target_url), sync_playwright() as p:
                 browser = p.chromium.launch(headless=True)
                 page = browser.new_page()
                 page.goto(target_url, wait_until="domcontentloaded", timeout=45000)
@@ -112,17 +149,42 @@ def fetch_job_description(url: str) -> str:
 
     headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0"}
     try:
-        if requests:
-            resp = requests.get(url, headers=headers, timeout=15)
-            resp.raise_for_status()
-            raw_html = resp.text
-        else:
-            req = Request(url, headers=headers)
-            with urlopen(req, timeout=15) as resp:
-                raw_html = resp.read().decode("utf-8", errors="replace")
+        with span("jd.http", url=url) as http_attrs:
+            raw_html = _http_get(url, headers)
+            http_attrs["bytes"] = len(raw_html)
     except Exception as e:
-        return f"[Could not fetch: {e}]"
+        return f"{FETCH_FAILED_PREFIX} {e}]"
+
+    with span("jd.parse") as parse_attrs:
+        description, title = parse_job_description_html(raw_html)
+        parse_attrs["found"] = bool(description)
+    if description:
+        return description
+
+    # Page is probably rendered client-side; fall back to a headless browser.
+    rendered = _render_with_playwright(url)
+    if rendered:
+        return rendered
+    if title:
+        return f"Job: {title}"
+    return UNRECOGNIZED_PAGE
 
+
+def _http_get(url: str, headers: dict) -> str:
+    if requests:
+        resp = requests.get(url, headers=headers, timeout=15)
+        resp.raise_for_status()
+        return resp.text
+    req = Request(url, headers=headers)
+    with urlopen(req, timeout=15) as resp:
+        return resp.read().decode("utf-8", errors="replace")
+
+
+def parse_job_description_html(raw_html: str) -> tuple[str | None, str | None]:
+    """
+    Pull the job description out of a career page's static HTML.
+    Returns (description, page_title); description is None when the page needs JS rendering.
+    """
     if BeautifulSoup:
         soup = BeautifulSoup(raw_html, "html.parser")
         for script in soup.find_all("script", type="application/ld+json"):
@@ -130,7 +192,7 @@ def fetch_job_description(url: str) -> str:
                 data = json.loads(script.string or "{}")
                 desc = data.get("description") or (data.get("@graph", [{}])[0].get("description") if isinstance(data.get("@graph"), list) else None)
                 if desc:
-                    return desc
+                    return desc, None
             except (json.JSONDecodeError, IndexError, KeyError, TypeError):
                 pass
         for sel in ["[data-job-description]", ".job-description", "article", "main"]:
@@ -138,49 +200,39 @@ def fetch_job_description(url: str) -> str:
             if el:
                 t = el.get_text(separator="\n", strip=True)
                 if len(t) > 200:
-                    return t
+                    return t, None
         title = soup.find("title")
         if title and title.string:
-            title_text = title.string.strip()
-            rendered = _render_with_playwright(url)
-            if rendered:
-                return rendered
-            return f"Job: {title_text}"
-    else:
-        scripts = re.findall(
-            r"<script[^>]*type=['\"]application/ld\+json['\"][^>]*>(.*?)</script>",
-            raw_html,
-            flags=re.IGNORECASE | re.DOTALL,
-        )
-        for script_body in scripts:
-            try:
-                data = json.loads(script_body.strip() or "{}")
-                desc = data.get("description")
-                if not desc and isinstance(data.get("@graph"), list):
-                    first = data.get("@graph")[0] or {}
-                    desc = first.get("description")
-                if desc:
-                    return str(desc)
-            except (json.JSONDecodeError, IndexError, KeyError, TypeError):
-                pass
+            return None, title.string.strip()
+        return None, None
 
-        text = re.sub(r"<(script|style)[^>]*>.*?</\1>", " ", raw_html, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r"<[^>]+>", " ", text)
-        text = re.sub(r"\s+", " ", text).strip()
-        if len(text) > 200:
-            return text[:12000]
-
-        title_match = re.search(r"<title[^>]*>(.*?)</title>", raw_html, flags=re.IGNORECASE | re.DOTALL)
-        if title_match:
-            rendered = _render_with_playwright(url)
-            if rendered:
-                return rendered
-            return f"Job: {title_match.group(1).strip()}"
-
-    rendered = _render_with_playwright(url)
-    if rendered:
-        return rendered
-    return "[Job page structure not recognized.]"
+    scripts = re.findall(
+        r"<script[^>]*type=['\"]application/ld\+json['\"][^>]*>(.*?)</script>",
+        raw_html,
+        flags=re.IGNORECASE | re.DOTALL,
+    )
+    for script_body in scripts:
+        try:
+            data = json.loads(script_body.strip() or "{}")
+            desc = data.get("description")
+            if not desc and isinstance(data.get("@graph"), list):
+                first = data.get("@graph")[0] or {}
+                desc = first.get("description")
+            if desc:
+                return str(desc), None
+        except (json.JSONDecodeError, IndexError, KeyError, TypeError):
+            pass
+
+    text = re.sub(r"<(script|style)[^>]*>.*?</\1>", " ", raw_html, flags=re.IGNORECASE | re.DOTALL)
+    text = re.sub(r"<[^>]+>", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    if len(text) > 200:
+        return text[:12000], None
+
+    title_match = re.search(r"<title[^>]*>(.*?)</title>", raw_html, flags=re.IGNORECASE | re.DOTALL)
+    if title_match:
+        return None, title_match.group(1).strip()
+    return None, None
 
 
 def load_user_info(info_path: Path) -> dict:
@@ -201,17 +253,27 @@ def _openai_client():
     return OpenAI(api_key=api_key), config.get("openai_model") or "gpt-4o"
 
 
+def _record_usage(attrs: dict, response, route: str | None = None, seconds: float = 0.0) -> None:
+    """Attach token usage from an OpenAI response to a trace span (and the route metrics), when reported."""
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        attrs["prompt_tokens"] = getattr(usage, "prompt_tokens", None)
+        attrs["completion_tokens"] = getattr(usage, "completion_tokens", None)
+    if route:
+        model_router.record(route, attrs.get("model", ""), seconds, attrs.get("prompt_tokens"), attrs.get("completion_tokens"))
+
+
+def _strip_code_fence(raw: str | None) -> str:
+    raw = (raw or "").strip()
+    if raw.startswith("```"):
+        raw = re.sub(r"^```\w*\n?", "", raw)
+        raw = re.sub(r"\n?```\s*$", "", raw)
+    return raw
+
+
 # --- Step 1: Enhance info.json for the job (ATS-friendly, similar sentence length) ---
-def llm_enhance_for_job(user_info: dict, job_description: str) -> dict:
-    """
-    LLM improves the resume content from info.json for the specific job and for ATS.
-    Uses only info.json; does not change sentence lengths by much so content still fits.
-    Returns enhanced structured content (dict) for use in the template.
-    """
-    if not OpenAI or not user_info:
-        return user_info
-    client, model = _openai_client()
-    prompt = f"""You are an expert resume writer. You will receive info.json (structured resume data) and a job description.
+def _enhance_prompt(user_info: dict, job_description: str) -> str:
+    return f"""You are an expert resume writer. You will receive info.json (structured resume data) and a job description.
 
 Your task: Produce a single JSON object with ENHANCED resume content that:
 1) Is tailored for this specific job and would score highly if scanned by an ATS (use keywords from the job, clear section structure, quantifiable achievements).
@@ -225,18 +287,33 @@ JOB DESCRIPTION:
 {job_description[:8000]}
 
 INFO.JSON (only source of content — enhance wording for job and ATS, keep sentence lengths similar):
-{json.dumps(user_info, indent=2)[:30000]}
+{project_profile(user_info, job_description, PROFILE_TOKENS)}
 """
 
-    response = client.chat.completions.create(
-        model=model,
-        max_completion_tokens=16000,
-        messages=[{"role": "user", "content": prompt}],
-    )
-    raw = (response.choices[0].message.content or "").strip()
-    if raw.startswith("```"):
-        raw = re.sub(r"^```\w*\n?", "", raw)
-        raw = re.sub(r"\n?```\s*$", "", raw)
+
+def llm_enhance_for_job(user_info: dict, job_description: str) -> dict:
+    """
+    LLM improves the resume content from info.json for the specific job and for ATS.
+    Uses only info.json; does not change sentence lengths by much so content still fits.
+    Returns enhanced structured content (dict) for use in the template.
+    """
+    if not OpenAI or not user_info:
+        return user_info
+    client, model = _openai_client()
+    prompt = _enhance_prompt(user_info, job_description)
+
+    # Tailoring is batch work: it yields to interactive interview turns in the shared scheduler.
+    tokens = llm_scheduler.estimate_tokens(prompt, max_output=6000)
+    with span("llm.enhance", model=model) as llm_attrs, llm_scheduler.slot(llm_scheduler.BATCH, tokens) as ticket:
+        t0 = time.perf_counter()
+        response = client.chat.completions.create(
+            model=model,
+            max_completion_tokens=16000,
+            messages=[{"role": "user", "content": prompt}],
+        )
+        _record_usage(llm_attrs, response, "tailor.enhance", time.perf_counter() - t0)
+        ticket.settle(getattr(getattr(response, "usage", None), "total_tokens", None))
+    raw = _strip_code_fence(response.choices[0].message.content)
     try:
         return json.loads(raw)
     except json.JSONDecodeError:
@@ -273,18 +350,135 @@ TEMPLATE.TEX (use only for preamble, section headers, lines, margins, and comman
 {template_content}
 """
 
-    response = client.chat.completions.create(
-        model=model,
-        max_completion_tokens=16000,
-        messages=[{"role": "user", "content": prompt}],
-    )
-    raw = (response.choices[0].message.content or "").strip()
-    if raw.startswith("```"):
-        raw = re.sub(r"^```\w*\n?", "", raw)
-        raw = re.sub(r"\n?```\s*$", "", raw)
+    # Tailoring is batch work: it yields to interactive interview turns in the shared scheduler.
+    tokens = llm_scheduler.estimate_tokens(prompt, max_output=6000)
+    with span("llm.fill_template", model=model) as llm_attrs, llm_scheduler.slot(llm_scheduler.BATCH, tokens) as ticket:
+        t0 = time.perf_counter()
+        response = client.chat.completions.create(
+            model=model,
+            max_completion_tokens=16000,
+            messages=[{"role": "user", "content": prompt}],
+        )
+        _record_usage(llm_attrs, response, "tailor.fill_template", time.perf_counter() - t0)
+        ticket.settle(getattr(getattr(response, "usage", None), "total_tokens", None))
+    raw = _strip_code_fence(response.choices[0].message.content)
     return raw
 
 
+# --- Streaming: Step 2 runs per section while Step 1 is still generating ---
+def llm_enhance_for_job_stream(user_info: dict, job_description: str, on_section) -> dict:
+    """
+    Streamed llm_enhance_for_job: on_section(key, value) is called for each top-level section as soon
+    as it has been generated. Returns the full enhanced content (user_info if the output is unusable).
+    """
+    if not OpenAI or not user_info:
+        return user_info
+    client, model = _openai_client()
+    prompt = _enhance_prompt(user_info, job_description)
+    parser = SectionStream()
+
+    tokens = llm_scheduler.estimate_tokens(prompt, max_output=6000)
+    with span("llm.enhance", model=model, stream=True) as llm_attrs, llm_scheduler.slot(llm_scheduler.BATCH, tokens) as ticket:
+        t0 = time.perf_counter()
+        stream = client.chat.completions.create(
+            model=model,
+            max_completion_tokens=16000,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        last = None
+        for chunk in stream:
+            last = chunk
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            for key, value in parser.feed(delta or ""):
+                llm_attrs.setdefault("first_section_ms", round((time.perf_counter() - t0) * 1000, 1))
+                on_section(key, value)
+        _record_usage(llm_attrs, last, "tailor.enhance", time.perf_counter() - t0)
+        ticket.settle(getattr(getattr(last, "usage", None), "total_tokens", None))
+    try:
+        return json.loads(_strip_code_fence(parser.text))
+    except json.JSONDecodeError:
+        return parser.sections or user_info
+
+
+def split_template(template_content: str) -> tuple[str, str]:
+    """(preamble, body) of template.tex, split around \\begin{document} ... \\end{document}."""
+    begin = template_content.find("\\begin{document}")
+    if begin < 0:
+        return template_content, ""
+    end = template_content.find("\\end{document}", begin)
+    body = template_content[begin + len("\\begin{document}"):end if end >= 0 else None]
+    return template_content[:begin], body
+
+
+def llm_fill_section(key: str, value, template_body: str) -> str:
+    """Step 2 for one top-level section: only that section's LaTeX, using the template's commands."""
+    client, model = _openai_client()
+    prompt = f"""You are a LaTeX expert. You will receive ONE section of enhanced resume content (JSON) and the body of template.tex.
+
+Your task: Produce ONLY the LaTeX for this one section, to be placed inside the document body:
+- If the section key is "personal_info", produce the header block exactly as the template structures it (name, contact line, links). Otherwise produce the \\section{{...}} header with a fitting title (e.g. education → Education, work_experience → Experience, skills → Technical Skills) followed by its entries.
+- Use the template's commands (\\resumeItem, \\resumeSubheading, \\resumeProjectHeading, \\resumeItemListStart, etc.) and spacing exactly as the template uses them for the matching section.
+- Do NOT copy any of the template's example or placeholder text. All content must come from the section JSON below.
+- Do NOT output a preamble, \\begin{{document}} or \\end{{document}}, and do NOT output any other section.
+
+LATEX RULES (required for compilation):
+- Escape special characters in inserted text: % → \\%, & → \\&, # → \\#, _ → \\_. For literal curly braces in text use \\{{ and \\}}.
+- Every \\resumeItem has one argument: \\resumeItem{{content}}. No unescaped {{ or }} inside the content.
+
+Return ONLY the LaTeX for this section. No markdown, no code fence, no explanation.
+
+SECTION KEY: {key}
+
+SECTION CONTENT:
+{json.dumps(value, indent=2)[:12000]}
+
+TEMPLATE BODY (use only for structure and commands — not for content):
+{template_body}
+"""
+
+    tokens = llm_scheduler.estimate_tokens(prompt, max_output=2000)
+    with span("llm.fill_section", model=model, section=key) as llm_attrs, llm_scheduler.slot(llm_scheduler.BATCH, tokens) as ticket:
+        t0 = time.perf_counter()
+        response = client.chat.completions.create(
+            model=model,
+            max_completion_tokens=4000,
+            messages=[{"role": "user", "content": prompt}],
+        )
+        _record_usage(llm_attrs, response, "tailor.fill_section", time.perf_counter() - t0)
+        ticket.settle(getattr(getattr(response, "usage", None), "total_tokens", None))
+    return _strip_code_fence(response.choices[0].message.content)
+
+
+def stream_tailored_tex(user_info: dict, job_description: str, template_content: str) -> str:
+    """
+    Steps 1 and 2 overlapped: every section streamed out of Step 1 is filled concurrently, then the
+    template preamble and the filled sections (in Step 1 order) are assembled into one document.
+    Falls back to the whole-document Step 2 if streaming produced no sections or a section failed.
+    """
+    preamble, template_body = split_template(template_content)
+    order: list[str] = []
+    futures = {}
+    with ThreadPoolExecutor(max_workers=SECTION_WORKERS) as pool:
+        def on_section(key, value):
+            if value in (None, "", [], {}) or key in futures:
+                return
+            print(f"   Section ready: {key} — filling LaTeX...")
+            order.append(key)
+            futures[key] = pool.submit(llm_fill_section, key, value, template_body)
+
+        enhanced = llm_enhance_for_job_stream(user_info, job_description, on_section)
+        try:
+            parts = [futures[key].result() for key in order]
+        except Exception as e:
+            print(f"   Section fill failed ({e}); filling the whole template instead...")
+            parts = []
+    if not parts or not preamble:
+        return llm_fill_template_structure_only(enhanced, template_content)
+    return preamble + "\\begin{document}\n\n" + "\n\n".join(parts) + "\n\n\\end{document}\n"
+
+
 def compile_latex_to_pdf(tex_path: Path, output_dir: Path, jobname: str) -> tuple[Path | None, str]:
     """Compile .tex to PDF with pdflatex. Returns (pdf_path, "") or (None, error_message)."""
     if not tex_path.exists():
@@ -303,10 +497,12 @@ def compile_latex_to_pdf(tex_path: Path, output_dir: Path, jobname: str) -> tupl
         str(rel_tex).replace("\\", "/"),
     ]
     try:
-        for _ in range(2):
-            result = subprocess.run(
-                args, cwd=cwd, capture_output=True, timeout=120, text=True, encoding="utf-8", errors="replace"
-            )
+        for pass_no in range(2):
+            with span("latex.pass", jobname=jobname, pass_no=pass_no + 1) as pass_attrs:
+                result = subprocess.run(
+                    args, cwd=cwd, capture_output=True, timeout=120, text=True, encoding="utf-8", errors="replace"
+                )
+                pass_attrs["returncode"] = result.returncode
             pdf_path = output_dir / f"{jobname}.pdf"
             if result.returncode != 0:
                 # pdflatex can return non-zero with warnings while still producing a usable PDF.
@@ -377,6 +573,20 @@ def reduce_tex_spacing(tex_content: str) -> str:
     return tex_content
 
 
+def render_with_reportlab(enhanced_content: dict, output_dir: Path, jobname: str) -> Path:
+    """Render the enhanced content with pdf_renderer (no LaTeX) and write output_dir/<jobname>.pdf."""
+    try:
+        from app import pdf_renderer
+    except ImportError:
+        import pdf_renderer
+
+    with span("reportlab.render") as render_attrs:
+        pdf_bytes = pdf_renderer.render_profile_pdf(enhanced_content, render_attrs)
+    pdf_path = output_dir / f"{jobname}.pdf"
+    pdf_path.write_bytes(pdf_bytes)
+    return pdf_path
+
+
 def remove_latex_auxiliary_files(output_dir: Path, jobname: str) -> None:
     """Remove LaTeX auxiliary files (e.g. .aux, .log, .out) from output_dir, keeping only the .pdf."""
     suffixes = (".aux", ".log", ".out", ".fls", ".synctex.gz", ".fdb_latexmk")
@@ -406,10 +616,18 @@ def run(
     info_path: Path = INFO_FILE,
     template_path: Path = TEMPLATE_TEX,
     output_dir: Path = OUTPUT_DIR,
+    trace_file: Path | None = None,
+    stream: bool = False,
+    engine: str = "latex",
 ) -> Path:
     """
     Run the pipeline: one LLM call (info.json + job description + template.tex) → .tex → compile to PDF.
+    Every run starts a fresh trace; pass trace_file (or set RESUME_TRACE_FILE) to keep the JSON-lines spans.
+    With stream=True, Step 2 is filled per section while Step 1 streams (see stream_tailored_tex).
+    engine="reportlab" renders the Step 1 content directly with pdf_renderer instead of Step 2 + pdflatex.
     """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}; expected one of {', '.join(ENGINES)}.")
     if not info_path.exists():
         fallback_info = PROJECT_DIR / "json" / "info.json"
         if fallback_info.exists():
@@ -424,22 +642,51 @@ def run(
     if not template_path.exists():
         raise FileNotFoundError(f"Template not found: {template_path}")
 
+    start_trace(trace_file)
+    with span("resume_builder.run"):
+        return _run_stages(job_url, link_path, info_path, template_path, output_dir, stream, engine)
+
+
+def _run_stages(
+    job_url: str | None,
+    link_path: Path,
+    info_path: Path,
+    template_path: Path,
+    output_dir: Path,
+    stream: bool = False,
+    engine: str = "latex",
+) -> Path:
     print("1. Loading job link and fetching description...")
-    url = job_url if job_url else load_job_link(link_path)
-    job_desc = fetch_job_description(url)
+    with span("fetch_job_description") as jd_attrs:
+        url = job_url if job_url else load_job_link(link_path)
+        job_desc = fetch_job_description(url)
+        jd_attrs["chars"] = len(job_desc)
     print("2. Loading info.json and template.tex...")
-    user_info = load_user_info(info_path)
-    template_content = load_template(template_path)
+    with span("load_inputs"):
+        user_info = load_user_info(info_path)
+        template_content = load_template(template_path)
     name = (user_info.get("personal_info") or {}).get("name") or user_info.get("name") or "Candidate"
     safe_name = re.sub(r"[^\w\s-]", "", str(name)).replace(" ", "_")[:30]
     output_dir.mkdir(parents=True, exist_ok=True)
     TEX_DIR.mkdir(parents=True, exist_ok=True)
-
-    print("3. Step 1 — LLM enhancing content for job and ATS (similar sentence length)...")
-    enhanced = llm_enhance_for_job(user_info, job_desc)
-    print("4. Step 2 — LLM filling template structure only (headers, lines, margins) with enhanced content...")
-    filled_tex = llm_fill_template_structure_only(enhanced, template_content)
     jobname = f"resume_{safe_name}"
+
+    if engine == "reportlab":
+        print("3. Step 1 — LLM enhancing content for job and ATS (similar sentence length)...")
+        enhanced = llm_enhance_for_job(user_info, job_desc)
+        print("4. Rendering PDF with ReportLab (no LaTeX)...")
+        pdf_path = render_with_reportlab(enhanced, output_dir, jobname)
+        print(f"   Done. Resume saved to: {pdf_path}")
+        return pdf_path
+
+    if stream:
+        print("3-4. Steps 1 and 2 — streaming enhanced sections into per-section LaTeX fills...")
+        filled_tex = stream_tailored_tex(user_info, job_desc, template_content)
+    else:
+        print("3. Step 1 — LLM enhancing content for job and ATS (similar sentence length)...")
+        enhanced = llm_enhance_for_job(user_info, job_desc)
+        print("4. Step 2 — LLM filling template structure only (headers, lines, margins) with enhanced content...")
+        filled_tex = llm_fill_template_structure_only(enhanced, template_content)
     tex_path = TEX_DIR / f"{jobname}.tex"
     with open(tex_path, "w", encoding="utf-8") as f:
         f.write(filled_tex)
@@ -450,7 +697,9 @@ def run(
     for attempt in range(max_tighten_attempts):
         with open(tex_path, "w", encoding="utf-8") as f:
             f.write(filled_tex_current)
-        pdf_path, err_msg = compile_latex_to_pdf(tex_path, output_dir, jobname)
+        with span("latex.compile", attempt=attempt + 1) as compile_attrs:
+            pdf_path, err_msg = compile_latex_to_pdf(tex_path, output_dir, jobname)
+            compile_attrs["ok"] = bool(pdf_path)
         if not pdf_path:
             if "pdflatex not found" in err_msg.lower():
                 print("   pdflatex not found. Returning generated .tex file instead.")
@@ -461,17 +710,39 @@ def run(
             break
         if attempt < max_tighten_attempts - 1:
             print(f"   PDF has {pages} page(s); tightening spacing to fit one page...")
-            filled_tex_current = reduce_tex_spacing(filled_tex_current)
+            with span("latex.tighten", pages=pages):
+                filled_tex_current = reduce_tex_spacing(filled_tex_current)
     remove_latex_auxiliary_files(output_dir, jobname)
     remove_latex_output_from_tex_dir(TEX_DIR, jobname)
     print(f"   Done. Resume saved to: {pdf_path}")
     return pdf_path
 
 
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Tailor info.json to a job posting and compile the resume PDF.")
+    parser.add_argument("--job-url", help="Job posting URL (defaults to the first URL in link.txt).")
+    parser.add_argument("--info", type=Path, default=INFO_FILE, help="Path to info.json.")
+    parser.add_argument("--profile", action="store_true", help="Print a per-stage timing breakdown when done.")
+    parser.add_argument("--trace-file", type=Path, help="Append JSON-lines trace spans to this file.")
+    parser.add_argument("--stream", action="store_true", help="Overlap Step 2 with Step 1 by filling sections as they stream in.")
+    parser.add_argument(
+        "--engine", choices=ENGINES, default="latex",
+        help="PDF engine: template.tex + pdflatex (default) or the in-process ReportLab renderer.",
+    )
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    cli_args = _parse_args()
     try:
-        run()
-        sys.exit(0)
+        run(
+            job_url=cli_args.job_url, info_path=cli_args.info, trace_file=cli_args.trace_file, stream=cli_args.stream,
+            engine=cli_args.engine,
+        )
+        exit_code = 0
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
-        sys.exit(1)
+        exit_code = 1
+    if cli_args.profile:
+        print("\n" + format_report(), file=sys.stderr)
+    sys.exit(exit_code)
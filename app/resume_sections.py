@@ -0,0 +1,324 @@
+# app/resume_sections.py
+"""
+Deterministic pre-parse of extracted resume text, run before the first LLM call.
+
+The text is split into sections on heading lines (known heading names, plus lines the PDF/DOCX
+marks as headings, see utils.extract_heading_lines). Fields that can be read reliably without a
+model are pre-filled: personal_info (email, phone, links, name) from the header block and the
+link list, skills from "Label: a, b, c" style lists, and date ranges per section. Everything that
+still needs interpretation (experience, education, projects, unknown sections) is passed to the
+LLM as raw text next to the draft, instead of the whole resume.
+"""
+import json
+import re
+
+try:
+    from app.utils import URL_PATTERN, _dedupe_links
+except ImportError:
+    from utils import URL_PATTERN, _dedupe_links
+
+SECTION_ALIASES = {
+    "summary": ["summary", "professional summary", "profile", "professional profile", "objective", "career objective", "about me", "about"],
+    "education": ["education", "academic background", "academics", "education and training", "academic qualifications"],
+    "work_experience": [
+        "experience", "work experience", "professional experience", "employment", "employment history",
+        "work history", "career history", "relevant experience", "industry experience",
+    ],
+    "projects": ["projects", "personal projects", "selected projects", "academic projects", "key projects", "side projects"],
+    "skills": [
+        "skills", "technical skills", "core competencies", "technologies", "skills and tools", "tools and technologies",
+        "skills and technologies", "technical expertise", "expertise", "key skills",
+    ],
+    "certifications": ["certifications", "certificates", "licenses and certifications", "licenses", "certifications and licenses"],
+    "publications": ["publications", "papers", "research", "research and publications"],
+}
+_ALIAS_TO_SECTION = {alias: key for key, aliases in SECTION_ALIASES.items() for alias in aliases}
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_PATTERN = re.compile(r"(?<![\w/])\+?\(?\d[\d\s().-]{7,18}\d(?![\w/])")
+BARE_PROFILE_URL = re.compile(r"(?<![\w./])(?:[a-z]{2,3}\.)?(?:linkedin\.com|github\.com)/[\w\-./%]+", re.IGNORECASE)
+
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_DATE = rf"(?:{_MONTH}\s*'?\d{{2,4}}|\d{{1,2}}/\d{{4}}|\d{{4}}-\d{{2}}|(?:spring|summer|fall|autumn|winter)\s+\d{{4}}|\d{{4}})"
+DATE_RANGE_PATTERN = re.compile(
+    rf"(?P<start>{_DATE})\s*(?:-|–|—|to|until)\s*(?P<end>{_DATE}|present|current|now|ongoing|today)\b",
+    re.IGNORECASE,
+)
+
+_SKILL_SPLIT = re.compile(r"\s*(?:,|;|\||•|·|▪|●)\s*")
+_BULLET_PREFIX = re.compile(r"^[\s\-*•·▪●◦]+")
+MAX_SKILL_WORDS = 5
+
+
+def _heading_key(line: str) -> str:
+    key = re.sub(r"[^a-z ]+", " ", line.lower().replace("&", " and "))
+    return " ".join(key.split())
+
+
+def _is_unknown_heading(line: str, heading_lines: set[str]) -> bool:
+    stripped = line.strip().rstrip(":")
+    if not stripped or len(stripped.split()) > 5 or any(ch.isdigit() for ch in stripped):
+        return False
+    if "@" in stripped or URL_PATTERN.search(stripped):
+        return False
+    return stripped in heading_lines or line.strip() in heading_lines or (stripped.isupper() and len(stripped) > 3)
+
+
+def split_sections(text: str, heading_lines: set[str] | None = None) -> tuple[list[str], list[tuple[str, str, list[str]]], list[str]]:
+    """
+    Return (header lines, [(section key, heading text, lines)], links listed under "Extracted Links").
+    Unknown headings are only recognised after the first known one, so a large upper-case name
+    at the top is never mistaken for a section.
+    """
+    heading_lines = heading_lines or set()
+    header: list[str] = []
+    sections: list[tuple[str, str, list[str]]] = []
+    links: list[str] = []
+    in_links = False
+
+    for raw in (text or "").splitlines():
+        line = raw.strip()
+        if line == "Extracted Links:":
+            in_links = True
+            continue
+        if in_links:
+            if line.startswith("- "):
+                links.append(line[2:].strip())
+            continue
+        if not line:
+            continue
+
+        key = _heading_key(line) if len(line) <= 60 else ""
+        section = _ALIAS_TO_SECTION.get(key)
+        if section is None and sections and _is_unknown_heading(line, heading_lines):
+            section = key.replace(" ", "_") or "other"
+        if section is not None:
+            sections.append((section, line.rstrip(":"), []))
+        elif sections:
+            sections[-1][2].append(line)
+        else:
+            header.append(line)
+    return header, sections, links
+
+
+def _link_key(url: str) -> str:
+    low = url.lower().split("://", 1)[-1]
+    return low.removeprefix("www.").rstrip("/")
+
+
+def _classify_links(header: list[str], listed: list[str]) -> tuple[dict, list[str]]:
+    """Return (personal_info link fields, every distinct link). Embedded links win over visible text."""
+    header_text = "\n".join(header)
+    found = list(listed) + URL_PATTERN.findall(header_text) + BARE_PROFILE_URL.findall(header_text)
+    links, seen = [], set()
+    for url in _dedupe_links([u if "://" in u or u.lower().startswith("www.") else f"https://{u}" for u in found]):
+        if _link_key(url) not in seen:
+            seen.add(_link_key(url))
+            links.append(url)
+    links.sort(key=lambda u: 0 if any(_link_key(u) == _link_key(l) for l in listed) else 1)
+
+    header_low = header_text.lower()
+    info = {}
+    for url in links:
+        low = url.lower()
+        if "linkedin.com/" in low:
+            info.setdefault("linkedin", url)
+        elif "github.com/" in low:
+            # The shortest github link is the profile; longer ones are repositories.
+            if "github" not in info or len(url) < len(info["github"]):
+                info["github"] = url
+        elif "portfolio" not in info and _link_key(url).split("/")[0] in header_low:
+            # Only a site named in the header block is the candidate's own; other links may be projects.
+            info["portfolio"] = url
+    return info, links
+
+
+def _guess_name(header: list[str]) -> str | None:
+    for line in header[:3]:
+        words = line.replace(",", " ").split()
+        if not 2 <= len(words) <= 5:
+            continue
+        if any(ch.isdigit() for ch in line) or "@" in line or URL_PATTERN.search(line) or "|" in line:
+            continue
+        if all(w[0].isalpha() and w[0].isupper() for w in words if w[0].isalpha()) and all(
+            w.replace(".", "").replace("-", "").replace("'", "").isalpha() for w in words
+        ):
+            name = " ".join(words)
+            return name.title() if name.isupper() else name
+    return None
+
+
+def _phone(lines: list[str]) -> str | None:
+    for line in lines:
+        for match in PHONE_PATTERN.finditer(line):
+            candidate = match.group(0).strip()
+            digits = re.sub(r"\D", "", candidate)
+            if 10 <= len(digits) <= 15 and not DATE_RANGE_PATTERN.search(candidate):
+                return candidate
+    return None
+
+
+def _leftover_header(header: list[str], personal: dict) -> list[str]:
+    """Header lines with the pre-filled values removed (location, headline, ... stay for the LLM)."""
+    name = (personal.get("name") or "").lower()
+    portfolio = _link_key(personal["portfolio"]) if personal.get("portfolio") else None
+    leftover = []
+    for line in header:
+        if name and " ".join(line.replace(",", " ").split()).lower() == name:
+            continue
+        rest = EMAIL_PATTERN.sub(" ", line)
+        if portfolio:
+            rest = re.sub(rf"(?i)\b(?:www\.)?{re.escape(portfolio)}/?", " ", rest)
+        rest = URL_PATTERN.sub(" ", rest)
+        rest = BARE_PROFILE_URL.sub(" ", rest)
+        rest = PHONE_PATTERN.sub(" ", rest)
+        rest = re.sub(r"(?i)\b(?:email|e-mail|phone|tel|mobile|linkedin|github|portfolio|website)\b\s*:?", " ", rest)
+        rest = " ".join(re.sub(r"^[\s|•·,;:-]+|[\s|•·,;:-]+$", "", part) for part in re.split(r"\s[|•·]\s", rest))
+        rest = " ".join(rest.split())
+        if re.search(r"[A-Za-z]{2}", rest):
+            leftover.append(rest)
+    return leftover
+
+
+def parse_skills(lines: list[str]) -> dict | None:
+    """Parse list-style skills; None when the section reads like prose and needs the LLM."""
+    skills = {"technical": [], "tools": [], "soft_skills": []}
+    seen = set()
+    for raw in lines:
+        line = _BULLET_PREFIX.sub("", raw).strip()
+        label, sep, items = line.partition(":")
+        if not sep or len(label.split()) > 4:
+            label, items = "", line
+        parts = [p.strip(" .") for p in _SKILL_SPLIT.split(items) if p.strip(" .")]
+        if not parts:
+            continue
+        if len(parts) == 1 and len(parts[0].split()) > MAX_SKILL_WORDS:
+            return None
+        if any(len(p.split()) > MAX_SKILL_WORDS for p in parts):
+            return None
+        low = label.lower()
+        group = "soft_skills" if "soft" in low or "interpersonal" in low else (
+            "tools" if any(k in low for k in ("tool", "platform", "software", "cloud", "devops")) else "technical"
+        )
+        for part in parts:
+            if part.lower() not in seen:
+                seen.add(part.lower())
+                skills[group].append(part)
+    return skills if seen else None
+
+
+def find_date_ranges(lines: list[str]) -> list[dict]:
+    found = []
+    for line in lines:
+        for match in DATE_RANGE_PATTERN.finditer(line):
+            end = match.group("end")
+            found.append({
+                "line": line,
+                "start_date": match.group("start"),
+                "end_date": "Present" if end.lower() in ("present", "current", "now", "ongoing", "today") else end,
+            })
+    return found
+
+
+def build_draft(text: str, heading_lines: set[str] | None = None) -> dict | None:
+    """
+    Pre-structured draft of the resume, or None when no sections could be found (the caller then
+    sends the raw text as before).
+
+    {"profile": partial CandidateProfile dict, "sections": {key: raw text still to structure},
+     "date_ranges": {key: [{"line", "start_date", "end_date"}]}}
+    """
+    header, sections, listed_links = split_sections(text, heading_lines)
+    if not sections:
+        return None
+
+    personal = {}
+    email = EMAIL_PATTERN.search("\n".join(header)) or EMAIL_PATTERN.search(text)
+    if email:
+        personal["email"] = email.group(0)
+    phone = _phone(header)
+    if phone:
+        personal["phone"] = phone
+    name = _guess_name(header)
+    if name:
+        personal["name"] = name
+    link_info, all_links = _classify_links(header, listed_links)
+    personal.update(link_info)
+
+    profile = {"personal_info": personal}
+    remaining: dict[str, list[str]] = {}
+    date_ranges: dict[str, list[dict]] = {}
+    leftover = _leftover_header(header, personal)
+    if leftover:
+        remaining["header"] = leftover
+
+    for key, heading, lines in sections:
+        if not lines:
+            continue
+        if key == "skills":
+            parsed = parse_skills(lines)
+            if parsed is not None:
+                merged = profile.setdefault("skills", {"technical": [], "tools": [], "soft_skills": []})
+                for group, items in parsed.items():
+                    merged[group] += [i for i in items if i not in merged[group]]
+                continue
+        ranges = find_date_ranges(lines)
+        if ranges:
+            date_ranges.setdefault(key, []).extend(ranges)
+        bucket = remaining.setdefault(key, [])
+        if bucket:
+            bucket.append(heading)
+        bucket.extend(lines)
+
+    used = {_link_key(v) for v in link_info.values()}
+    other_links = [u for u in all_links if _link_key(u) not in used]
+    if other_links:
+        remaining["links"] = other_links
+
+    return {
+        "profile": profile,
+        "sections": {key: "\n".join(lines) for key, lines in remaining.items()},
+        "date_ranges": date_ranges,
+    }
+
+
+def format_for_llm(draft: dict) -> str:
+    """The compact first-turn input: the draft as JSON plus only the sections still to structure."""
+    parts = [
+        "Pre-parsed fields (extracted deterministically, keep them):",
+        json.dumps(draft["profile"], separators=(",", ":"), ensure_ascii=False),
+    ]
+    parts += ["", "Sections still to structure:"]
+    for key, body in draft["sections"].items():
+        parts += ["", f"## {key}", body]
+    return "\n".join(parts)
+
+
+def merge_draft(profile: dict, draft: dict) -> dict:
+    """Fill anything the model left empty from the deterministic draft."""
+    personal = profile.setdefault("personal_info", {}) or {}
+    for key, value in (draft["profile"].get("personal_info") or {}).items():
+        if not personal.get(key):
+            personal[key] = value
+    profile["personal_info"] = personal
+    draft_skills = draft["profile"].get("skills")
+    if draft_skills:
+        skills = profile.get("skills") or {}
+        for group, items in draft_skills.items():
+            current = skills.get(group) or []
+            lowered = {s.lower() for s in current}
+            skills[group] = current + [s for s in items if s.lower() not in lowered]
+        profile["skills"] = skills
+
+    # Dates the model missed are taken from the range on the line naming the same employer/school.
+    for section, name_key in (("work_experience", "company"), ("education", "institution")):
+        ranges = draft.get("date_ranges", {}).get(section) or []
+        for entry in profile.get(section) or []:
+            org = (entry.get(name_key) or "").strip().lower()
+            if not org or (entry.get("start_date") and entry.get("end_date")):
+                continue
+            match = next((r for r in ranges if org in r["line"].lower()), None)
+            if match:
+                entry["start_date"] = entry.get("start_date") or match["start_date"]
+                entry["end_date"] = entry.get("end_date") or match["end_date"]
+    return profile
@@ -72,6 +72,17 @@ class CandidateProfile(BaseModel):
     certifications: List[Certification] = []
     application_history: List[ApplicationHistory] = []
 
+class PlannedQuestion(BaseModel):
+    question: str = Field(description="ONE short, conversational follow-up question.")
+    target_field: str = Field(
+        description="The top-level JSON key the answer will update (e.g., 'work_experience', 'projects', 'skills')."
+    )
+
+QUESTION_PLAN_DESCRIPTION = (
+    "Up to 5 follow-up questions for later turns, most important first, each about a different gap. "
+    "Do NOT repeat the current question or anything listed under 'Already queued'."
+)
+
 class ExtractionResult(BaseModel):
     profile: CandidateProfile = Field(
         description="The structured candidate profile extracted so far."
@@ -82,16 +93,51 @@ class ExtractionResult(BaseModel):
         description="A SHORT conversational reply ending with EXACTLY ONE question. NEVER ask multiple questions at once."
     )
 
-    remaining_questions_count: int = Field(
-        default=0,
-        description="The estimated number of questions still needed to complete the profile. 0 if complete."
+    question_plan: List[PlannedQuestion] = Field(default=[], description=QUESTION_PLAN_DESCRIPTION)
+
+# --- Per-section wrappers for concurrent initial extraction (see section_extraction.py) ---
+class PersonalInfoSection(BaseModel):
+    item: PersonalInfo
+
+class EducationSection(BaseModel):
+    items: List[Education] = []
+
+class WorkExperienceSection(BaseModel):
+    items: List[WorkExperience] = []
+
+class ProjectsSection(BaseModel):
+    items: List[Project] = []
+
+class PublicationsSection(BaseModel):
+    items: List[Publication] = []
+
+class CertificationsSection(BaseModel):
+    items: List[Certification] = []
+
+class SkillsSection(BaseModel):
+    item: Skills
+
+class ProfileDelta(BaseModel):
+    """Light interview turn: only the profile sections the latest answer changes (null = unchanged)."""
+    personal_info: Optional[PersonalInfo] = None
+    education: Optional[List[Education]] = None
+    work_experience: Optional[List[WorkExperience]] = None
+    projects: Optional[List[Project]] = None
+    skills: Optional[Skills] = None
+    publications: Optional[List[Publication]] = None
+    certifications: Optional[List[Certification]] = None
+    application_history: Optional[List[ApplicationHistory]] = None
+
+    assistant_message: Optional[str] = Field(
+        default=None,
+        description="Only if the user asked a clarifying question: a SHORT answer to it, ending with the original question."
     )
 
-    current_focus_field: Optional[str] = Field(
-        default="Summary",
-        description="The EXACT top-level JSON key you are currently asking about (e.g., 'work_experience', 'education', 'projects', 'skills')."
+class InterviewTurn(BaseModel):
+    """ExtractionResult without the profile: used when the profile is extracted section by section."""
+    assistant_message: Optional[str] = Field(
+        default=None,
+        description="A SHORT conversational reply ending with EXACTLY ONE question. NEVER ask multiple questions at once."
     )
-    
-    is_complete: bool = Field(
-        description="Set to True ONLY if all mandatory fields, metrics, and context are fully populated."
-    )
\ No newline at end of file
+
+    question_plan: List[PlannedQuestion] = Field(default=[], description=QUESTION_PLAN_DESCRIPTION)
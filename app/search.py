@@ -0,0 +1,302 @@
+# app/search.py
+"""
+Cross-candidate search over stored profiles.
+
+`candidate_search` is a materialized index with one row per CandidateProfile, flattened into
+name / titles / companies / skills / body text. It is refreshed in the same transaction as every
+parsed_data save (see profile_store.save_parsed_data).
+
+- Postgres: weighted tsvector (GIN) for free text, pg_trgm GIN indexes for fuzzy skill/title/company
+  filters, ranked with ts_rank_cd + trigram word similarity. Where pg_trgm cannot be installed (no
+  CREATE privilege on a managed database) the filters are plain substring matches (ILIKE, unindexed)
+  and the app still starts.
+- SQLite (local/tests): an FTS5 virtual table ranked with bm25.
+
+`total` is the number of matches for the query, on every page (also past the last one).
+"""
+import json
+import re
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+MAX_PAGE_SIZE = 100
+_TOKEN = re.compile(r"[\w+#.\-]+", re.UNICODE)
+
+_PG_DDL = [
+    """CREATE TABLE IF NOT EXISTS candidate_search (
+        profile_id integer PRIMARY KEY REFERENCES candidate_profiles(id) ON DELETE CASCADE,
+        name text NOT NULL DEFAULT '',
+        titles text NOT NULL DEFAULT '',
+        companies text NOT NULL DEFAULT '',
+        skills text NOT NULL DEFAULT '',
+        body text NOT NULL DEFAULT '',
+        document tsvector NOT NULL,
+        updated_at timestamptz NOT NULL DEFAULT now()
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_candidate_search_document ON candidate_search USING gin (document)",
+]
+_PG_TRGM_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_candidate_search_skills_trgm ON candidate_search USING gin (skills gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_candidate_search_titles_trgm ON candidate_search USING gin (titles gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_candidate_search_companies_trgm ON candidate_search USING gin (companies gin_trgm_ops)",
+]
+
+# Whether pg_trgm is installed; None until ensure_schema (or the first Postgres search) checks.
+_trigram = None
+
+_SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS candidate_search USING fts5("
+    "name, titles, companies, skills, body, tokenize='porter unicode61')",
+]
+
+_PG_UPSERT = text("""
+    INSERT INTO candidate_search (profile_id, name, titles, companies, skills, body, document, updated_at)
+    VALUES (
+        :profile_id, :name, :titles, :companies, :skills, :body,
+        setweight(to_tsvector('simple', :name), 'A')
+          || setweight(to_tsvector('english', :skills || ' ' || :titles), 'A')
+          || setweight(to_tsvector('english', :companies), 'B')
+          || setweight(to_tsvector('english', :body), 'C'),
+        now()
+    )
+    ON CONFLICT (profile_id) DO UPDATE SET
+        name = EXCLUDED.name, titles = EXCLUDED.titles, companies = EXCLUDED.companies,
+        skills = EXCLUDED.skills, body = EXCLUDED.body, document = EXCLUDED.document,
+        updated_at = EXCLUDED.updated_at
+""")
+
+
+def _dialect(db) -> str:
+    bind = db.get_bind() if isinstance(db, Session) else db
+    return bind.dialect.name
+
+
+def _join(values) -> str:
+    seen = []
+    for v in values:
+        v = (v or "").strip() if isinstance(v, str) else ""
+        if v and v not in seen:
+            seen.append(v)
+    return " | ".join(seen)
+
+
+def build_search_document(parsed_data: dict | None, fallback_name: str | None = None) -> dict:
+    """Flatten a CandidateProfile dict into the text fields stored in the index."""
+    data = parsed_data or {}
+    personal = data.get("personal_info") or {}
+    work = data.get("work_experience") or []
+    skills = data.get("skills") or {}
+
+    skill_terms = []
+    for group in ("technical", "tools", "soft_skills"):
+        skill_terms += skills.get(group) or []
+    for job in work:
+        skill_terms += job.get("skills_used") or []
+
+    body = []
+    for job in work:
+        body += [job.get("experience_context") or ""] + list(job.get("bullets") or [])
+    for proj in data.get("projects") or []:
+        body += [proj.get("title") or "", proj.get("description") or ""]
+    for edu in data.get("education") or []:
+        body += [edu.get("institution") or "", edu.get("degree") or "", edu.get("field_of_study") or ""]
+    for cert in data.get("certifications") or []:
+        body.append(cert.get("name") or "")
+
+    return {
+        "name": _join([personal.get("name"), fallback_name]),
+        "titles": _join(job.get("role") for job in work),
+        "companies": _join(job.get("company") for job in work),
+        "skills": _join(skill_terms),
+        "body": " ".join(b for b in body if b),
+    }
+
+
+def _has_trigram(conn) -> bool:
+    return conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
+
+
+def _install_trigram(engine) -> bool:
+    """Install pg_trgm if needed; False (and a warning) if this role may not."""
+    with engine.connect() as conn:
+        if _has_trigram(conn):
+            return True
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        return True
+    except DBAPIError as e:
+        if e.connection_invalidated:
+            raise
+        print(f"pg_trgm is not available, candidate search filters fall back to unindexed ILIKE: {e.orig}")
+        return False
+
+
+def ensure_schema(engine) -> None:
+    """Create the search index if missing and backfill it from existing profiles."""
+    global _trigram
+    dialect = engine.dialect.name
+    ddl = _PG_DDL if dialect == "postgresql" else _SQLITE_DDL if dialect == "sqlite" else None
+    if ddl is None:
+        return
+    if dialect == "postgresql":
+        _trigram = _install_trigram(engine)
+        if _trigram:
+            ddl = ddl + _PG_TRGM_DDL
+    with engine.begin() as conn:
+        for stmt in ddl:
+            conn.execute(text(stmt))
+        indexed = conn.execute(text("SELECT count(*) FROM candidate_search")).scalar()
+        if indexed:
+            return
+        rows = conn.execute(text("SELECT id, name, parsed_data FROM candidate_profiles")).mappings().all()
+        for row in rows:
+            parsed = row["parsed_data"]
+            if isinstance(parsed, str):
+                parsed = json.loads(parsed or "{}")
+            _upsert(conn, dialect, row["id"], build_search_document(parsed, row["name"]))
+
+
+def _upsert(conn, dialect: str, profile_id: int, doc: dict) -> None:
+    if dialect == "postgresql":
+        conn.execute(_PG_UPSERT, {"profile_id": profile_id, **doc})
+    elif dialect == "sqlite":
+        conn.execute(text("DELETE FROM candidate_search WHERE rowid = :id"), {"id": profile_id})
+        conn.execute(
+            text(
+                "INSERT INTO candidate_search (rowid, name, titles, companies, skills, body) "
+                "VALUES (:id, :name, :titles, :companies, :skills, :body)"
+            ),
+            {"id": profile_id, **doc},
+        )
+
+
+def index_profile(db: Session, profile_id: int, parsed_data: dict | None, name: str | None = None) -> None:
+    """Refresh one profile's index row. Runs inside the caller's transaction."""
+    _upsert(db, _dialect(db), profile_id, build_search_document(parsed_data, name))
+
+
+def _fts5_phrase(value: str) -> str:
+    tokens = _TOKEN.findall(value or "")
+    return '"' + " ".join(tokens) + '"' if tokens else ""
+
+
+def _search_sqlite(db, q, filters, limit, offset):
+    clauses = []
+    terms = _TOKEN.findall(q or "")
+    if terms:
+        clauses.append(" ".join(f'"{t}"' for t in terms))
+    for column, value in filters.items():
+        phrase = _fts5_phrase(value)
+        if phrase:
+            clauses.append(f"{column} : {phrase}")
+    if not clauses:
+        return 0, []
+    match = " AND ".join(f"({c})" for c in clauses)
+
+    total = db.execute(
+        text("SELECT count(*) FROM candidate_search WHERE candidate_search MATCH :m"), {"m": match}
+    ).scalar()
+    rows = db.execute(
+        text("""
+            SELECT s.rowid AS profile_id, p.name, p.email, s.titles, s.companies, s.skills,
+                   -bm25(candidate_search, 3.0, 2.0, 2.0, 3.0, 1.0) AS score
+            FROM candidate_search s JOIN candidate_profiles p ON p.id = s.rowid
+            WHERE candidate_search MATCH :m
+            ORDER BY score DESC, s.rowid
+            LIMIT :limit OFFSET :offset
+        """),
+        {"m": match, "limit": limit, "offset": offset},
+    ).mappings().all()
+    return total, rows
+
+
+def _like_pattern(value: str) -> str:
+    """'%value%' with LIKE wildcards in the user's text escaped (used with ESCAPE '\\')."""
+    return "%" + value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def _search_postgres(db, q, filters, limit, offset):
+    global _trigram
+    if _trigram is None:
+        _trigram = _has_trigram(db)
+    where, score_terms, params = [], [], {"limit": limit, "offset": offset}
+    if q and q.strip():
+        params["q"] = q.strip()
+        where.append("s.document @@ websearch_to_tsquery('english', :q)")
+        score_terms.append("ts_rank_cd(s.document, websearch_to_tsquery('english', :q), 32)")
+    for column, value in filters.items():
+        if value and value.strip():
+            params[column] = value.strip()
+            params[f"{column}_like"] = _like_pattern(value.strip())
+            like = f"s.{column} ILIKE :{column}_like ESCAPE '\\'"
+            if _trigram:
+                # ILIKE '%x%' and the <% operator are both served by the gin_trgm_ops index.
+                where.append(f"({like} OR :{column} <% s.{column})")
+                score_terms.append(f"word_similarity(:{column}, s.{column})")
+            else:
+                where.append(like)
+                score_terms.append("1.0")
+    if not where:
+        return 0, []
+
+    source = f"""
+        FROM candidate_search s JOIN candidate_profiles p ON p.id = s.profile_id
+        WHERE {' AND '.join(where)}
+    """
+    rows = db.execute(
+        text(f"""
+            SELECT s.profile_id, p.name, p.email, s.titles, s.companies, s.skills,
+                   ({' + '.join(score_terms)}) AS score,
+                   count(*) OVER () AS total
+            {source}
+            ORDER BY score DESC, s.profile_id
+            LIMIT :limit OFFSET :offset
+        """),
+        params,
+    ).mappings().all()
+    if rows:
+        return rows[0]["total"], rows
+    # Past the last page the window count has no row to ride on: count separately.
+    total = db.execute(text(f"SELECT count(*) {source}"), params).scalar() if offset else 0
+    return total, rows
+
+
+def search_profiles(
+    db: Session,
+    q: str | None = None,
+    skill: str | None = None,
+    title: str | None = None,
+    company: str | None = None,
+    page: int = 1,
+    page_size: int = 20,
+) -> dict:
+    """Ranked, paginated candidate search. Free text `q` plus optional per-field filters."""
+    page = max(1, page)
+    page_size = max(1, min(MAX_PAGE_SIZE, page_size))
+    offset = (page - 1) * page_size
+    filters = {"skills": skill, "titles": title, "companies": company}
+
+    if _dialect(db) == "postgresql":
+        total, rows = _search_postgres(db, q, filters, page_size, offset)
+    else:
+        total, rows = _search_sqlite(db, q, filters, page_size, offset)
+
+    return {
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "results": [
+            {
+                "profile_id": r["profile_id"],
+                "name": r["name"],
+                "email": r["email"],
+                "score": round(float(r["score"] or 0.0), 4),
+                "titles": [t for t in (r["titles"] or "").split(" | ") if t],
+                "companies": [c for c in (r["companies"] or "").split(" | ") if c],
+                "skills": [s for s in (r["skills"] or "").split(" | ") if s],
+            }
+            for r in rows
+        ],
+    }
@@ -0,0 +1,130 @@
+# app/section_extraction.py
+"""
+Concurrent initial extraction for long resumes.
+
+Instead of one structured-output call that decodes the whole CandidateProfile, each section found by
+resume_sections is extracted into its own sub-schema (schemas.*Section) in parallel. Everything else
+the draft still holds (summary, the "links" block, unknown headings such as Awards or Volunteer) goes
+through one generic call into the full CandidateProfile schema, so no resume text is dropped. Next to
+them, a small-model call produces the first interview turn (schemas.InterviewTurn): its output is a
+handful of questions, so it never becomes the long pole. The parts are merged onto the deterministic
+draft and validated against CandidateProfile, so first-response latency is bounded by the largest
+section rather than the whole document.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.prompts import ChatPromptTemplate
+from app import model_router, resume_sections, schemas
+
+# Resumes shorter than this keep the single-call path; the fan-out only pays off on long CVs.
+MIN_CHARS = int(os.getenv("SECTION_EXTRACTION_MIN_CHARS", "6000"))
+MAX_WORKERS = int(os.getenv("SECTION_EXTRACTION_MAX_WORKERS", "6"))
+
+# draft section key -> (wrapper schema, CandidateProfile key)
+SECTION_SCHEMAS = {
+    "header": (schemas.PersonalInfoSection, "personal_info"),
+    "work_experience": (schemas.WorkExperienceSection, "work_experience"),
+    "education": (schemas.EducationSection, "education"),
+    "projects": (schemas.ProjectsSection, "projects"),
+    "publications": (schemas.PublicationsSection, "publications"),
+    "certifications": (schemas.CertificationsSection, "certifications"),
+    "skills": (schemas.SkillsSection, "skills"),
+}
+
+SECTION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You extract one section of a candidate's resume into the given JSON schema.
+    Use only facts stated in the text. Keep every entry and every bullet, in order, worded as written.
+    Leave fields you cannot find empty; do not invent dates, metrics or links."""),
+    ("user", "Section: {section}\n\n{text}"),
+])
+
+
+def should_split(resume_text: str, draft: dict | None) -> bool:
+    if not draft or len(resume_text or "") < MIN_CHARS:
+        return False
+    return sum(1 for key in draft["sections"] if key in SECTION_SCHEMAS) >= 2
+
+
+def _extract_section(key: str, text: str):
+    schema, _ = SECTION_SCHEMAS[key]
+    route = model_router.route_section(key, text)
+    return model_router.invoke_structured(route, SECTION_PROMPT, schema, {"section": key, "text": text})
+
+
+def _extract_other(sections: dict[str, str]):
+    """Sections without a sub-schema, in one call into the whole CandidateProfile schema."""
+    text = "\n\n".join(f"## {key}\n{body}" for key, body in sections.items())
+    route = model_router.route_section("other", text)
+    return model_router.invoke_structured(
+        route, SECTION_PROMPT, schemas.CandidateProfile, {"section": ", ".join(sections), "text": text}
+    )
+
+
+def _merge_other(profile: dict, other: dict) -> None:
+    """Add what the generic call found without overwriting the dedicated section results."""
+    personal = profile.setdefault("personal_info", {})
+    for key, value in (other.get("personal_info") or {}).items():
+        if value and not personal.get(key):
+            personal[key] = value
+    skills = other.get("skills") or {}
+    if any(skills.values()):
+        current = profile.setdefault("skills", {"technical": [], "tools": [], "soft_skills": []})
+        for group, items in skills.items():
+            lowered = {s.lower() for s in current.get(group) or []}
+            current[group] = (current.get(group) or []) + [s for s in items if s.lower() not in lowered]
+    for key, items in other.items():
+        if key in ("personal_info", "skills") or not items:
+            continue
+        # e.g. a summary restating the current job must not add a second copy of it
+        existing = profile.setdefault(key, [])
+        seen = {_entry_name(item) for item in existing}
+        existing.extend(item for item in items if _entry_name(item) not in seen)
+
+
+def _entry_name(entry: dict) -> str:
+    for field in ("company", "institution", "title", "name"):
+        if entry.get(field):
+            return f"{field}:{entry[field].strip().lower()}"
+    return repr(sorted(entry.items()))
+
+
+def extract_profile(draft: dict, interview_prompt=None, interview_inputs: dict | None = None) -> tuple[dict, schemas.InterviewTurn | None]:
+    """
+    Run the per-section extractions (and, when `interview_prompt` is given, the first interview turn)
+    concurrently. Returns (validated profile dict, InterviewTurn or None). Any failed call propagates,
+    so the caller can fall back to the single-call path.
+    """
+    jobs = {key: text for key, text in draft["sections"].items() if key in SECTION_SCHEMAS and text.strip()}
+    others = {key: text for key, text in draft["sections"].items() if key not in SECTION_SCHEMAS and text.strip()}
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(jobs) + 2), thread_name_prefix="extract") as pool:
+        turn_future = other_future = None
+        if interview_prompt is not None:
+            turn_future = pool.submit(
+                model_router.invoke_structured, ("turn.initial_plan", model_router.SMALL_MODEL),
+                interview_prompt, schemas.InterviewTurn, interview_inputs,
+            )
+        if others:
+            other_future = pool.submit(_extract_other, others)
+        futures = {key: pool.submit(_extract_section, key, text) for key, text in jobs.items()}
+        parts = {key: future.result() for key, future in futures.items()}
+        other = other_future.result().model_dump() if other_future is not None else None
+        turn = turn_future.result() if turn_future is not None else None
+
+    profile = {k: (list(v) if isinstance(v, list) else dict(v)) for k, v in draft["profile"].items()}
+    for key, result in parts.items():
+        _, target = SECTION_SCHEMAS[key]
+        if target == "personal_info":
+            # Header extraction only adds what the deterministic pass could not read (location, ...).
+            extracted = {k: v for k, v in result.item.model_dump().items() if v}
+            profile["personal_info"] = {**extracted, **(profile.get("personal_info") or {})}
+        elif target == "skills":
+            profile["skills"] = result.item.model_dump()
+        else:
+            profile[target] = [item.model_dump() for item in result.items]
+
+    if other is not None:
+        _merge_other(profile, other)
+
+    profile = resume_sections.merge_draft(profile, draft)
+    return schemas.CandidateProfile.model_validate(profile).model_dump(), turn
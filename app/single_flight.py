@@ -0,0 +1,111 @@
+# app/single_flight.py
+"""
+Per-thread single-flight for interview turns.
+
+Concurrent submissions for one interview thread (double-clicked submit, two tabs) must not run the
+graph twice or interleave their chat_history updates:
+
+  - identical submissions (same thread and answer) that arrive while one is running join it and
+    get the same result, without starting another run;
+  - different submissions for the same thread run one after another, in arrival order;
+  - across workers the turn runs under a Postgres session advisory lock keyed by the thread id,
+    taken on the connection of the request's own Session (no second pool connection per turn).
+    Other databases fall back to the in-process lock only.
+
+The turn itself is blocking (LLM calls, checkpoint writes), so it runs in the threadpool and never
+blocks the event loop while it waits for the lock or the model.
+"""
+import asyncio
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+ADVISORY_LOCK_TIMEOUT = float(os.getenv("THREAD_LOCK_TIMEOUT", "120"))
+ADVISORY_POLL_INTERVAL = 0.05
+
+
+class ThreadBusy(Exception):
+    """The thread's cross-worker lock could not be taken in time."""
+
+
+def submission_key(thread_id: str, answer: str) -> str:
+    return hashlib.sha256(f"{thread_id}\0{(answer or '').strip()}".encode("utf-8")).hexdigest()
+
+
+def _advisory_key(thread_id: str) -> int:
+    # pg advisory locks take a signed bigint.
+    return int.from_bytes(hashlib.blake2b(thread_id.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+@contextmanager
+def advisory_lock(db, thread_id: str, timeout: float = ADVISORY_LOCK_TIMEOUT):
+    """
+    Cross-worker exclusive lock for one thread (Postgres), held on the connection of the request's own
+    Session `db`; a no-op elsewhere.
+
+    For the duration of the block `db` is bound to that one connection, so a turn holds a single pool
+    connection however many times it commits, and its commits do not release the lock. Work left
+    uncommitted at the end of the block is rolled back.
+    """
+    engine = db.get_bind() if db is not None else None
+    if engine is None or engine.dialect.name != "postgresql":
+        yield
+        return
+    key = _advisory_key(thread_id)
+    deadline = time.monotonic() + timeout
+    with engine.connect() as conn:
+        # try-lock in a loop so a stuck holder turns into an error instead of a hung request
+        while not conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": key}).scalar():
+            if time.monotonic() > deadline:
+                raise ThreadBusy(f"Session {thread_id} is busy in another worker.")
+            time.sleep(ADVISORY_POLL_INTERVAL)
+        conn.commit()  # a session-level lock outlives the transaction; the Session then runs its own
+        db.bind = conn
+        try:
+            yield
+        finally:
+            if db.in_transaction():
+                db.rollback()
+            db.bind = engine
+            conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": key})
+            conn.commit()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._locks: dict[str, list] = {}  # thread_id -> [asyncio.Lock, users]
+        self._inflight: dict[tuple[str, str], asyncio.Task] = {}
+
+    async def run(self, thread_id: str, key: str, fn, db=None):
+        """Run blocking `fn()` for `thread_id` at most once per in-flight `key`; returns its result.
+
+        `db` is the Session `fn` works in; the cross-worker lock is taken on its connection.
+        """
+        flight = (thread_id, key)
+        task = self._inflight.get(flight)
+        if task is None:
+            task = asyncio.ensure_future(self._execute(thread_id, flight, fn, db))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())  # never "unretrieved"
+            self._inflight[flight] = task
+        # A caller that disconnects must not cancel the run others are waiting on (or release its lock early).
+        return await asyncio.shield(task)
+
+    async def _execute(self, thread_id: str, flight: tuple[str, str], fn, db):
+        entry = self._locks.setdefault(thread_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await run_in_threadpool(self._locked_call, thread_id, fn, db)
+        finally:
+            self._inflight.pop(flight, None)
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._locks.pop(thread_id, None)
+
+    def _locked_call(self, thread_id: str, fn, db):
+        with advisory_lock(db, thread_id):
+            return fn()
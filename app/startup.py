@@ -0,0 +1,90 @@
+# app/startup.py
+"""
+Start-up work for the API, run from FastAPI's lifespan instead of at import time.
+
+Importing app.main is cheap: the heavy dependencies (langgraph, langchain_openai, PyMuPDF,
+python-docx) load on first use and nothing touches the database. The lifespan then:
+
+  1. prepares the schema (create_all, migrations.upgrade, search.ensure_schema), retrying with
+     backoff while the database is still coming up instead of failing the worker on boot;
+  2. runs the warm-up hooks (compile the interview graph, build the LLM clients) so the first
+     request does not pay for them.
+
+    DB_STARTUP_TIMEOUT   seconds to keep retrying the schema step (default 60)
+    STARTUP_WARMUP       background (default: warm up on a thread while already serving),
+                         blocking (finish before serving) or off
+
+GET /health reports the progress of both steps (see status).
+"""
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from sqlalchemy.exc import OperationalError
+from starlette.concurrency import run_in_threadpool
+
+from app import migrations, models, search
+from app.database import engine
+
+DB_STARTUP_TIMEOUT = float(os.getenv("DB_STARTUP_TIMEOUT", "60"))
+WARMUP_MODE = os.getenv("STARTUP_WARMUP", "background").lower()
+
+status = {
+    "schema_ready": False,
+    "schema_attempts": 0,
+    "schema_seconds": None,
+    "warm": False,
+    "warmup_seconds": None,
+    "warmup_errors": [],
+}
+
+
+def prepare_database(db_engine=engine, timeout: float = DB_STARTUP_TIMEOUT) -> None:
+    """Create and upgrade the schema, retrying while the database refuses connections."""
+    t0 = time.perf_counter()
+    deadline = time.monotonic() + timeout
+    delay = 0.5
+    while True:
+        status["schema_attempts"] += 1
+        try:
+            models.Base.metadata.create_all(bind=db_engine)
+            migrations.upgrade(db_engine)
+            search.ensure_schema(db_engine)
+            break
+        except OperationalError as e:
+            if time.monotonic() + delay > deadline:
+                raise
+            print(f"Database not ready (attempt {status['schema_attempts']}), retrying in {delay:.1f}s: {e.orig}")
+            time.sleep(delay)
+            delay = min(delay * 2, 5.0)
+    status["schema_ready"] = True
+    status["schema_seconds"] = round(time.perf_counter() - t0, 3)
+
+
+def warm_up(hooks) -> None:
+    """Run each warm-up hook; a failing hook is reported but never stops the worker."""
+    t0 = time.perf_counter()
+    for hook in hooks:
+        try:
+            hook()
+        except Exception as e:
+            status["warmup_errors"].append(f"{getattr(hook, '__name__', hook)}: {e}")
+            print(f"Warm-up step {getattr(hook, '__name__', hook)} failed: {e}")
+    status["warm"] = True
+    status["warmup_seconds"] = round(time.perf_counter() - t0, 3)
+
+
+def lifespan(*warmup_hooks):
+    """FastAPI lifespan: schema first (blocking), then the warm-up hooks per STARTUP_WARMUP."""
+
+    @asynccontextmanager
+    async def _lifespan(app):
+        await run_in_threadpool(prepare_database)
+        if WARMUP_MODE == "blocking":
+            await run_in_threadpool(warm_up, warmup_hooks)
+        elif WARMUP_MODE != "off":
+            threading.Thread(target=warm_up, args=(warmup_hooks,), name="warm-up", daemon=True).start()
+        yield
+
+    return _lifespan
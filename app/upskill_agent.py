@@ -1,4 +1,47 @@
-import json
+import os
+import re
+
+try:
+    from app.profile_projection import project_profile
+except ImportError:
+    from profile_projection import project_profile
+
+# Token budget for the profile in follow-up and plan prompts (see profile_projection.py)
+PROFILE_TOKENS = int(os.environ.get("UPSKILL_PROFILE_TOKENS", "2000"))
+_HEADING = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$")
+NO_CHANGES = "NO CHANGES"
+
+
+def split_plan(plan: str) -> list[list[str]]:
+    """[[heading line, body], ...] of a markdown plan; text before the first heading has heading ''."""
+    sections = [["", ""]]
+    for line in (plan or "").splitlines(keepends=True):
+        if _HEADING.match(line.strip()):
+            sections.append([line.strip(), ""])
+        else:
+            sections[-1][1] += line
+    return [s for s in sections if s[0] or s[1].strip()]
+
+
+def _heading_key(heading: str) -> str:
+    m = _HEADING.match(heading)
+    return re.sub(r"\W+", " ", (m.group(1) if m else heading)).strip().lower()
+
+
+def fold_revision(draft: str, revision: str) -> str:
+    """Replace the draft's sections with the revised ones of the same heading; new headings are appended."""
+    sections = split_plan(draft)
+    index = {_heading_key(h): i for i, (h, _) in enumerate(sections) if h}
+    for heading, body in split_plan(revision):
+        if not heading:
+            continue  # stray text outside a section
+        i = index.get(_heading_key(heading))
+        if i is None:
+            index[_heading_key(heading)] = len(sections)
+            sections.append([heading, body])
+        else:
+            sections[i] = [sections[i][0], body]
+    return "\n\n".join(f"{h}\n{b.strip()}".strip() if h else b.strip() for h, b in sections)
 
 
 class UpskillAgent:
@@ -8,6 +51,13 @@ class UpskillAgent:
         self.llm = llm
         self.context = {}
 
+    @classmethod
+    def from_context(cls, llm, context: dict):
+        """Resume an agent from a saved context (as returned by start() and updated by each turn)."""
+        agent = cls(llm)
+        agent.context = context
+        return agent
+
     def start(self, profile: dict, target_jd: str):
         self.context = {
             "profile": profile or {},
@@ -19,6 +69,16 @@ class UpskillAgent:
         self._ask_follow_ups()
         return self.context
 
+    def _complete(self, prompt: str, on_chunk=None) -> str:
+        """Ask the LLM; with on_chunk, stream the reply (on_chunk gets the text so far)."""
+        if on_chunk is None or not hasattr(self.llm, "stream"):
+            return self.llm.generate(prompt)
+        text = ""
+        for chunk in self.llm.stream(prompt):
+            text += chunk
+            on_chunk(text)
+        return text.strip()
+
     def _add_message(self, speaker: str, text: str):
         self.context["conversation"].append({"speaker": speaker, "text": text})
 
@@ -50,46 +110,99 @@ class UpskillAgent:
             "3. User understanding: {user_response}\n\n"
             "Ask 3-4 focused follow-up questions to identify skill gaps, experience gaps, and realistic learning capacity."
         ).format(
-            profile=json.dumps(profile, indent=0),
+            profile=project_profile(profile, jd, PROFILE_TOKENS),
             jd=jd[:1500],
             user_response=user_response[:600],
         )
         resp = self.llm.generate(prompt)
         self._add_message("agent", resp)
 
-    def handle_followup_response(self, user_input: str):
+    def handle_followup_response(self, user_input: str, on_chunk=None, draft: str | None = None):
         if not user_input.strip():
             return False
         self._add_message("user", user_input)
         self.context["user_followup_response"] = user_input
         self.context["current_stage"] = "plan_generation"
-        self._generate_plan()
+        if draft:
+            self._adjust_draft(draft, on_chunk)
+        else:
+            self._generate_plan(on_chunk)
         return True
 
-    def _generate_plan(self):
+    def _plan_prompt(self, followup_answer: str = "") -> str:
         profile = self.context.get("profile", {})
         jd = self.context.get("target_jd", "")
-        followup_answer = self.context.get("user_followup_response", "")
         prompt = (
             "Generate a practical upskill action plan with:\n"
             "- timeline (weeks/months)\n"
             "- specific skills to learn\n"
             "- learning resources and project ideas\n"
-            "- checkpoints/milestones\n\n"
+            "- checkpoints/milestones\n"
+            "Start each part with a '## ' markdown heading.\n\n"
             "User Profile: {profile}\n"
-            "Target Job: {jd}\n"
-            "User Follow-up Answers: {followup_answer}"
+            "Target Job: {jd}"
         ).format(
-            profile=json.dumps(profile, indent=0),
+            profile=project_profile(profile, jd, PROFILE_TOKENS),
             jd=jd[:1500],
-            followup_answer=followup_answer[:1200],
         )
-        plan = self.llm.generate(prompt)
+        if followup_answer:
+            prompt += f"\nUser Follow-up Answers: {followup_answer[:1200]}"
+        return prompt
+
+    def draft_plan(self, stop=None) -> str | None:
+        """
+        Baseline plan from the profile and job alone, drafted while the user answers the follow-ups.
+        Returns None if `stop` (a threading.Event) is set before the draft is finished.
+        """
+        if stop is None or not hasattr(self.llm, "stream"):
+            return self.llm.generate(self._plan_prompt())
+        text = ""
+        for chunk in self.llm.stream(self._plan_prompt()):
+            if stop.is_set():
+                return None
+            text += chunk
+        return text.strip()
+
+    def _generate_plan(self, on_chunk=None):
+        plan = self._complete(self._plan_prompt(self.context.get("user_followup_response", "")), on_chunk)
+        self._set_plan(plan)
+
+    def _adjust_draft(self, draft: str, on_chunk=None):
+        """
+        Turn a speculative draft into the plan with one short call: the model rewrites only the sections
+        the answers change, and those replace the draft's sections of the same heading.
+        """
+        questions = next(
+            (m["text"] for m in reversed(self.context["conversation"][:-1]) if m["speaker"] == "agent"), ""
+        )
+        prompt = (
+            "Below is a draft upskill plan written before the user answered some follow-up questions.\n"
+            "Rewrite only the sections of the draft that their answers change (timeline, pace, skills to add "
+            "or skip, resources). Return each rewritten section in full, starting with its exact heading line "
+            "from the draft, and nothing else. Keep the sections consistent with each other. "
+            "If nothing needs to change, reply with exactly: {no_changes}\n\n"
+            "Draft plan:\n{draft}\n\n"
+            "Follow-up questions:\n{questions}\n\n"
+            "User Follow-up Answers: {answers}"
+        ).format(
+            no_changes=NO_CHANGES,
+            draft=draft,
+            questions=questions[:1500],
+            answers=self.context.get("user_followup_response", "")[:1200],
+        )
+        if on_chunk is not None:
+            on_chunk(draft)
+        # While streaming, fold only complete lines (a half-written heading would show as a new section).
+        preview = on_chunk and (lambda text: on_chunk(fold_revision(draft, text[:text.rfind("\n") + 1])))
+        revision = self._complete(prompt, preview)
+        self._set_plan(draft if revision.strip() == NO_CHANGES else fold_revision(draft, revision))
+
+    def _set_plan(self, plan: str):
         self.context["plan"] = plan
         self.context["current_stage"] = "refinement"
         self._add_message("agent", f"Here is your personalized upskill action plan:\n\n{plan}")
 
-    def refine_plan(self, refinement_input: str):
+    def refine_plan(self, refinement_input: str, on_chunk=None):
         if not refinement_input.strip():
             return False
         self._add_message("user", f"Refinement request: {refinement_input}")
@@ -98,7 +211,7 @@ class UpskillAgent:
             "Current plan:\n{plan}\n\n"
             "User feedback: {feedback}"
         ).format(plan=self.context.get("plan", ""), feedback=refinement_input)
-        refined_plan = self.llm.generate(prompt)
+        refined_plan = self._complete(prompt, on_chunk)
         self.context["plan"] = refined_plan
         self._add_message("agent", f"Here is the refined plan:\n\n{refined_plan}")
         return True
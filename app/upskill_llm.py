@@ -1,12 +1,93 @@
+"""
+LLM client for the upskill agent: async streaming with deadlines, retries and optional hedging.
+
+astream() yields text chunks as the provider produces them; agenerate() returns the whole text.
+stream() and generate() are the blocking equivalents for sync callers: they run on one event loop
+thread per LLMClient, so the provider SDK clients (and their connection pools) are created once and
+reused across calls.
+
+Every call has an overall deadline (timeout). Transient failures (timeouts, connection errors, 429,
+5xx) are retried with full-jitter exponential backoff, but only until the first token: text that has
+already been streamed is never replayed. With a hedge provider configured, a second request to the
+other provider (OpenAI or Gemini) is started if the first has not produced a token within
+hedge_after seconds, or as soon as it fails; whichever streams first wins and the other is
+cancelled. Each request takes a slot from llm_scheduler (STANDARD unless priority is given); the
+slot is settled however the request ends, and given back if the request is cancelled (a losing
+hedge, a passed deadline) before the slot was granted.
+
+    UPSKILL_LLM_TIMEOUT       overall deadline per call in seconds (default 120)
+    UPSKILL_LLM_RETRIES       retries per provider before the first token (default 2)
+    UPSKILL_HEDGE_PROVIDER    openai | gemini (default: no hedging)
+    UPSKILL_HEDGE_AFTER       seconds without a first token before hedging (default 4)
+"""
+import asyncio
 import os
+import queue
+import random
+import threading
+import weakref
 from pathlib import Path
 
+try:
+    from app import llm_scheduler
+except ImportError:
+    import llm_scheduler
+
+DEFAULT_MODELS = {"openai": "gpt-4o-mini", "gemini": "gemini-2.0-flash"}
+DEFAULT_TIMEOUT = float(os.environ.get("UPSKILL_LLM_TIMEOUT", "120"))
+DEFAULT_RETRIES = int(os.environ.get("UPSKILL_LLM_RETRIES", "2"))
+DEFAULT_HEDGE_AFTER = float(os.environ.get("UPSKILL_HEDGE_AFTER", "4"))
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+TRANSIENT_ERRORS = {
+    "APITimeoutError", "APIConnectionError", "RateLimitError", "InternalServerError",
+    "ServiceUnavailable", "DeadlineExceeded", "ServerError", "ReadTimeout", "ConnectTimeout",
+}
+
+
+def _is_transient(exc: Exception) -> bool:
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    if status is None and isinstance(getattr(exc, "code", None), int):
+        status = exc.code  # google-genai APIError
+    if isinstance(status, int) and (status in (408, 409, 429) or status >= 500):
+        return True
+    return type(exc).__name__ in TRANSIENT_ERRORS
+
+
+def _backoff(attempt: int) -> float:
+    """Full jitter: uniform in [0, min(cap, base * 2^attempt)]."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
 
 class LLMClient:
-    def __init__(self, provider="openai", api_key=None, model=None):
+    def __init__(
+        self,
+        provider="openai",
+        api_key=None,
+        model=None,
+        hedge_provider=None,
+        hedge_model=None,
+        hedge_after=None,
+        timeout=None,
+        max_retries=None,
+        priority=None,
+    ):
         self.provider = (provider or "openai").lower()
         self.api_key = api_key
         self.model = model
+        hedge = hedge_provider if hedge_provider is not None else os.environ.get("UPSKILL_HEDGE_PROVIDER")
+        self.hedge_provider = (hedge or "").lower() or None
+        self.hedge_model = hedge_model
+        self.hedge_after = DEFAULT_HEDGE_AFTER if hedge_after is None else hedge_after
+        self.timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+        self.max_retries = DEFAULT_RETRIES if max_retries is None else max_retries
+        self.priority = llm_scheduler.STANDARD if priority is None else priority
+        # SDK clients per event loop (their connections belong to the loop that opened them)
+        self._clients = weakref.WeakKeyDictionary()
+        self._loop = None
+        self._loop_lock = threading.Lock()
 
     @staticmethod
     def _load_env_file():
@@ -23,77 +104,233 @@ class LLMClient:
         except Exception:
             pass
 
-    def _resolve_openai_key(self):
+    def _resolve_openai_key(self, provider_is_primary=True):
         self._load_env_file()
-        return self.api_key or os.environ.get("OPENAI_API_KEY")
+        return (self.api_key if provider_is_primary else None) or os.environ.get("OPENAI_API_KEY")
 
-    def _resolve_gemini_key(self):
+    def _resolve_gemini_key(self, provider_is_primary=True):
         self._load_env_file()
         return (
-            self.api_key
+            (self.api_key if provider_is_primary else None)
             or os.environ.get("GEMINI_API_KEY")
             or os.environ.get("GOOGLE_API_KEY")
         )
 
-    def _generate_with_gemini(self, prompt: str):
+    def _client(self, kind, api_key, factory):
+        clients = self._clients.setdefault(asyncio.get_running_loop(), {})
+        key = (kind, api_key)
+        if key not in clients:
+            clients[key] = factory()
+        return clients[key]
+
+    # --- provider streams (one request, no retries) ---
+    async def _gemini_stream(self, model, prompt, system, temperature, primary):
         try:
             from google import genai
+            from google.genai import types
         except ImportError as e:
             raise RuntimeError(
                 "Gemini provider requested but `google-genai` is not installed."
             ) from e
 
-        api_key = self._resolve_gemini_key()
+        api_key = self._resolve_gemini_key(primary)
         if not api_key:
             raise RuntimeError("Missing GEMINI_API_KEY/GOOGLE_API_KEY for upskill agent.")
 
-        model = self.model or "gemini-2.0-flash"
-        client = genai.Client(api_key=api_key)
-        response = client.models.generate_content(
-            model=model,
-            contents=[{"parts": [{"text": prompt}]}],
-        )
-        return response.text if response and getattr(response, "text", None) else ""
+        client = self._client("gemini", api_key, lambda: genai.Client(api_key=api_key))
+        config = types.GenerateContentConfig(system_instruction=system or None, temperature=temperature)
+        stream = await client.aio.models.generate_content_stream(model=model, contents=prompt, config=config)
+        async for chunk in stream:
+            if getattr(chunk, "text", None):
+                yield chunk.text
 
-    def _generate_with_openai(self, prompt: str, system=None, temperature=0.2):
-        api_key = self._resolve_openai_key()
+    async def _openai_stream(self, model, prompt, system, temperature, primary):
+        api_key = self._resolve_openai_key(primary)
         if not api_key:
             raise RuntimeError("Missing OPENAI_API_KEY for upskill agent.")
 
-        model = self.model or "gpt-4o-mini"
-
         # Try official OpenAI SDK first.
         try:
-            from openai import OpenAI
-
-            client = OpenAI(api_key=api_key)
+            from openai import AsyncOpenAI
+        except ImportError:
+            AsyncOpenAI = None
+        if AsyncOpenAI is not None:
             messages = []
             if system:
                 messages.append({"role": "system", "content": system})
             messages.append({"role": "user", "content": prompt})
-            response = client.chat.completions.create(
-                model=model,
-                temperature=temperature,
-                messages=messages,
+            # Retries and deadlines are handled here, not by the SDK.
+            client = self._client(
+                "openai", api_key, lambda: AsyncOpenAI(api_key=api_key, max_retries=0, timeout=self.timeout)
             )
-            return (response.choices[0].message.content or "").strip()
-        except ImportError:
-            pass
+            stream = await client.chat.completions.create(
+                model=model, temperature=temperature, messages=messages, stream=True,
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+            return
 
         # Fallback to langchain-openai if available.
         try:
             from langchain_openai import ChatOpenAI
-
-            llm = ChatOpenAI(model=model, temperature=temperature, api_key=api_key)
-            full_prompt = f"{system}\n\n{prompt}" if system else prompt
-            response = llm.invoke(full_prompt)
-            return getattr(response, "content", "") or ""
         except ImportError as e:
             raise RuntimeError(
                 "Neither `openai` nor `langchain-openai` is installed."
             ) from e
+        llm = self._client(
+            f"langchain:{model}:{temperature}", api_key,
+            lambda: ChatOpenAI(model=model, temperature=temperature, api_key=api_key, max_retries=0),
+        )
+        full_prompt = f"{system}\n\n{prompt}" if system else prompt
+        async for chunk in llm.astream(full_prompt):
+            if getattr(chunk, "content", None):
+                yield chunk.content
+
+    async def _acquire(self, tokens, timeout):
+        """
+        scheduler.acquire() on a worker thread. If the awaiting task is cancelled while it waits, the
+        slot is given back as soon as it is granted instead of leaking.
+        """
+        granted = asyncio.get_running_loop().run_in_executor(
+            None, llm_scheduler.scheduler.acquire, self.priority, tokens, timeout
+        )
+        try:
+            return await asyncio.shield(granted)
+        except asyncio.CancelledError:
+            granted.add_done_callback(lambda f: f.cancelled() or f.exception() or f.result().release())
+            raise
+
+    async def _provider_stream(self, provider, prompt, system, temperature, deadline):
+        """One provider, retried with jittered backoff until its first token (then never again)."""
+        primary = provider == self.provider
+        model = (self.model if primary else self.hedge_model) or DEFAULT_MODELS.get(provider, DEFAULT_MODELS["openai"])
+        source = self._gemini_stream if provider == "gemini" else self._openai_stream
+        loop = asyncio.get_running_loop()
+        prompt_tokens = llm_scheduler.estimate_tokens((system or "") + prompt, max_output=0)
+        attempt = 0
+        while True:
+            remaining = deadline - loop.time()
+            ticket = await self._acquire(prompt_tokens + 1000, max(0.0, remaining))
+            started = False
+            produced = 0
+            try:
+                async for chunk in source(model, prompt, system, temperature, primary):
+                    started = True
+                    produced += len(chunk)
+                    yield chunk
+                return
+            except Exception as e:
+                llm_scheduler.note_provider_error(e)
+                delay = _backoff(attempt)
+                if started or attempt >= self.max_retries or not _is_transient(e) or loop.time() + delay >= deadline:
+                    raise
+                print(f"Upskill LLM ({provider}) attempt {attempt + 1} failed, retrying in {delay:.1f}s: {e}")
+            finally:
+                # Also on failure, cancellation (hedge loser, deadline) and early close by the caller.
+                ticket.settle(prompt_tokens + produced // 4)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    async def _first_chunk(stream):
+        return await stream.__anext__(), stream
+
+    # --- public API ---
+    async def astream(self, prompt, system=None, temperature=0.2, timeout=None):
+        """Yield the reply as it streams. Raises TimeoutError if the deadline passes."""
+        loop = asyncio.get_running_loop()
+        budget = self.timeout if timeout is None else timeout
+        deadline = loop.time() + budget
+        hedge = self.hedge_provider if self.hedge_provider and self.hedge_provider != self.provider else None
+
+        def start(provider):
+            stream = self._provider_stream(provider, prompt, system, temperature, deadline)
+            return asyncio.ensure_future(self._first_chunk(stream))
+
+        racing = {start(self.provider)}
+        hedged = hedge is None
+        winner, error = None, None
+        try:
+            while winner is None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"No response from the LLM within {budget:g}s.")
+                wait = remaining if hedged else min(remaining, max(0.0, self.hedge_after))
+                done, _ = await asyncio.wait(racing, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    racing.discard(task)
+                    if task.exception() is None:
+                        winner = task.result()
+                        break
+                    error = task.exception()
+                    # StopAsyncIteration: the provider returned an empty reply.
+                    if isinstance(error, StopAsyncIteration):
+                        winner = ("", None)
+                        break
+                if winner is None and not hedged and (not done or not racing):
+                    # Primary is slow to produce a first token (or has failed): race the other provider.
+                    racing.add(start(hedge))
+                    hedged = True
+                elif winner is None and not racing:
+                    raise error
+        finally:
+            for task in racing:
+                task.cancel()
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+        first, stream = winner
+        if first:
+            yield first
+        if stream is None:
+            return
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"LLM response exceeded the {budget:g}s deadline.")
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), remaining)
+                except StopAsyncIteration:
+                    return
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    async def agenerate(self, prompt, system=None, temperature=0.2, timeout=None):
+        chunks = [chunk async for chunk in self.astream(prompt, system=system, temperature=temperature, timeout=timeout)]
+        return "".join(chunks).strip()
+
+    def _event_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="upskill-llm", daemon=True).start()
+            return self._loop
+
+    def stream(self, prompt, system=None, temperature=0.2, timeout=None):
+        """Blocking iterator over astream(), run on this client's event loop thread."""
+        items = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for chunk in self.astream(prompt, system=system, temperature=temperature, timeout=timeout):
+                    items.put(chunk)
+            except Exception as e:
+                items.put(e)
+            finally:
+                items.put(done)
+
+        running = asyncio.run_coroutine_threadsafe(pump(), self._event_loop())
+        try:
+            while (item := items.get()) is not done:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            running.cancel()  # the caller stopped early: close the provider stream (and settle its slot)
 
-    def generate(self, prompt, system=None, temperature=0.2):
-        if self.provider == "gemini":
-            return self._generate_with_gemini(prompt)
-        return self._generate_with_openai(prompt, system=system, temperature=temperature)
+    def generate(self, prompt, system=None, temperature=0.2, timeout=None):
+        return "".join(self.stream(prompt, system=system, temperature=temperature, timeout=timeout)).strip()
@@ -0,0 +1,306 @@
+# app/upskill_service.py
+"""
+Upskill-planning sessions served by the API instead of living in the Streamlit process.
+
+A session is keyed by (email, target job). Its row holds only what the agent cannot rebuild: the
+conversation, the plan, the user's answers and the job description. The profile is read from
+candidate_profiles on every turn. Any worker can therefore pick a session up, and it survives
+restarts of both the UI and the API: starting a session for a job that already has one resumes it
+(unless restart is requested).
+
+A turn loads the row, rebuilds the agent with UpskillAgent.from_context, runs one step and writes
+the state back. Turns on one session are serialized within a worker by a lock stripe and across
+workers by the same Postgres advisory lock the interview uses. stream_reply() starts a turn and
+returns NDJSON frames: {"delta": text} as the agent's reply is generated, or {"error", "status"}
+if the turn fails after streaming began. Errors before that (unknown session, busy session) are
+raised to the caller, so the endpoint can still answer 404 / 409.
+
+Speculative planning: while the user reads and answers the follow-up questions, a baseline plan is
+drafted in the background from the profile and job alone (BATCH priority, so it yields to
+interview turns). When the answers arrive, one short call rewrites only the sections of the draft
+the answers change, instead of a full generation. Drafts live in this worker's memory only. A draft
+that is not finished when the answers arrive is stopped and the plan is generated from scratch
+(waiting for it would be a full generation anyway), as it is when the draft failed or another
+worker holds it.
+
+    UPSKILL_SPECULATIVE_PLAN   1 (default) to draft plans ahead of the answers, 0 to disable
+    UPSKILL_DRAFT_WORKERS      concurrent drafts per worker (default 4)
+"""
+import hashlib
+import json
+import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from sqlalchemy.orm import Session
+
+from app import llm_scheduler, models
+from app.database import SessionLocal
+from app.profile_cache import get_profile_summary
+from app.single_flight import ThreadBusy, advisory_lock
+from app.upskill_agent import UpskillAgent
+from app.upskill_llm import LLMClient
+
+# Context keys rebuilt from elsewhere on load, so never stored in upskill_sessions.state
+DERIVED_KEYS = ("profile", "target_jd")
+SPECULATIVE_PLAN = os.getenv("UPSKILL_SPECULATIVE_PLAN", "1").lower() not in ("0", "false", "no")
+DRAFT_WORKERS = int(os.getenv("UPSKILL_DRAFT_WORKERS", "4"))
+MAX_PENDING_DRAFTS = 256
+# Query parameters that only track where a click came from; everything else may identify the job
+# (Greenhouse gh_jid, LinkedIn currentJobId, ...).
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "_hsenc", "_hsmi", "ref", "refid", "trk", "trackingid", "src", "source"}
+_turn_locks = [threading.Lock() for _ in range(64)]
+_llm = None
+_draft_llm = None
+_draft_pool = ThreadPoolExecutor(max_workers=DRAFT_WORKERS, thread_name_prefix="upskill-draft")
+_drafts: OrderedDict[int, tuple[Future, threading.Event]] = OrderedDict()
+_drafts_lock = threading.Lock()
+
+
+def llm_client() -> LLMClient:
+    global _llm
+    if _llm is None:
+        _llm = LLMClient(provider=os.getenv("UPSKILL_LLM_PROVIDER", "openai"))
+    return _llm
+
+
+def draft_llm_client() -> LLMClient:
+    global _draft_llm
+    if _draft_llm is None:
+        _draft_llm = LLMClient(provider=os.getenv("UPSKILL_LLM_PROVIDER", "openai"), priority=llm_scheduler.BATCH)
+    return _draft_llm
+
+
+def speculate(session_id: int, context: dict) -> None:
+    """Start drafting the session's plan in the background, unless a draft is already pending."""
+    if not SPECULATIVE_PLAN:
+        return
+    with _drafts_lock:
+        if session_id in _drafts:
+            return
+        agent = UpskillAgent.from_context(draft_llm_client(), dict(context))
+        stop = threading.Event()
+        _drafts[session_id] = (_draft_pool.submit(agent.draft_plan, stop), stop)
+        while len(_drafts) > MAX_PENDING_DRAFTS:
+            _stop(*_drafts.popitem(last=False)[1])
+
+
+def _stop(future: Future, stop: threading.Event) -> None:
+    stop.set()
+    future.cancel()
+
+
+def discard_draft(session_id: int) -> None:
+    with _drafts_lock:
+        pending = _drafts.pop(session_id, None)
+    if pending is not None:
+        _stop(*pending)
+
+
+def take_draft(session_id: int) -> str | None:
+    """The session's draft if it is finished; an unfinished one is stopped (never waited for)."""
+    with _drafts_lock:
+        pending = _drafts.pop(session_id, None)
+    if pending is None:
+        return None
+    future, stop = pending
+    if not future.done():
+        _stop(future, stop)
+        return None
+    try:
+        return future.result() or None
+    except Exception as e:
+        print(f"Plan draft for upskill session {session_id} failed, generating from scratch: {e}")
+        return None
+
+
+def normalize_job_url(job_url: str) -> str:
+    """Drop tracking parameters (utm_*, gclid, ...) from http(s) URLs; other input is only trimmed."""
+    url = (job_url or "").strip()
+    parts = urlsplit(url)
+    if parts.scheme in {"http", "https"} and parts.netloc:
+        query = sorted(
+            (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+            if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+        )
+        return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), parts.fragment))
+    return url
+
+
+def job_key(job_url: str | None, job_description: str | None) -> str:
+    source = normalize_job_url(job_url) if job_url else " ".join((job_description or "").split())
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def session_view(row: models.UpskillSession) -> dict:
+    state = row.state or {}
+    return {
+        "session_id": row.id,
+        "email": row.email,
+        "job_url": row.job_url,
+        "stage": row.stage,
+        "conversation": state.get("conversation", []),
+        "plan": state.get("plan", ""),
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+    }
+
+
+def list_sessions(db: Session, email: str) -> list[dict]:
+    S = models.UpskillSession
+    rows = db.query(S.id, S.job_url, S.stage, S.updated_at).filter(S.email == email).order_by(S.updated_at.desc()).all()
+    return [
+        {"session_id": r.id, "job_url": r.job_url, "stage": r.stage, "updated_at": r.updated_at.isoformat() if r.updated_at else None}
+        for r in rows
+    ]
+
+
+def _profile(db: Session, email: str) -> dict | None:
+    summary = get_profile_summary(db, email)  # cached: read on every turn
+    return summary["parsed_data"] if summary and summary["has_saved_master"] else None
+
+
+def _agent(db: Session, row: models.UpskillSession) -> UpskillAgent:
+    context = dict(row.state or {})
+    context["profile"] = _profile(db, row.email) or {}
+    context["target_jd"] = row.job_description or ""
+    return UpskillAgent.from_context(llm_client(), context)
+
+
+def _save(db: Session, row: models.UpskillSession, agent: UpskillAgent) -> None:
+    row.state = {k: v for k, v in agent.context.items() if k not in DERIVED_KEYS}
+    row.stage = agent.context.get("current_stage", row.stage)
+    db.commit()
+    db.refresh(row)
+
+
+def start_session(
+    db: Session, email: str, job_url: str | None = None, job_description: str | None = None, restart: bool = False
+) -> tuple[models.UpskillSession, bool]:
+    """Resume the session for (email, job), or start one. Returns (row, resumed)."""
+    job_description = (job_description or "").strip()
+    job_url = (job_url or "").strip() or None
+    if not job_url and not job_description:
+        raise ValueError("Provide job_url or job_description.")
+    key = job_key(job_url, job_description)
+
+    S = models.UpskillSession
+    row = db.query(S).filter(S.email == email, S.job_key == key).first()
+    if row is not None and not restart:
+        if row.stage == "follow_ups":
+            speculate(row.id, _agent(db, row).context)  # e.g. after a worker restart
+        return row, True
+
+    profile = _profile(db, email)
+    if profile is None:
+        raise LookupError("No saved master profile for this user; finish the interview first.")
+    if not job_description:
+        if job_url.startswith("http"):
+            from app.resume_builder import fetch_job_description
+            job_description = fetch_job_description(job_url)
+        else:
+            job_description = job_url
+
+    agent = UpskillAgent(llm_client())
+    agent.start(profile, job_description)
+    if row is None:
+        row = S(email=email, job_key=key)
+        db.add(row)
+    row.job_url = job_url
+    row.job_description = job_description
+    _save(db, row, agent)
+    discard_draft(row.id)  # restart: a draft of the previous conversation no longer applies
+    speculate(row.id, agent.context)
+    return row, False
+
+
+def get_session(db: Session, session_id: int) -> models.UpskillSession | None:
+    return db.get(models.UpskillSession, session_id)
+
+
+def reply(db: Session, session_id: int, message: str, on_chunk=None, on_start=None) -> models.UpskillSession:
+    """
+    Run one turn of the session with the user's message; on_chunk gets streamed plan text.
+    on_start is called once the session is locked and loaded, before any LLM call.
+    """
+    if not (message or "").strip():
+        raise ValueError("Message is empty.")
+    lock = _turn_locks[session_id % len(_turn_locks)]
+    with lock, advisory_lock(db, f"upskill:{session_id}"):
+        row = get_session(db, session_id)
+        if row is None:
+            raise LookupError("No such upskill session.")
+        db.refresh(row)  # another worker may have saved a turn while we waited for the lock
+        if on_start is not None:
+            on_start()
+        agent = _agent(db, row)
+        stage = agent.context.get("current_stage", "")
+        if stage == "target_job_confirmation":
+            agent.handle_user_response(message)
+        elif stage == "follow_ups":
+            agent.handle_followup_response(message, on_chunk=on_chunk, draft=take_draft(session_id))
+        else:
+            agent.refine_plan(message, on_chunk=on_chunk)
+        _save(db, row, agent)
+        if row.stage == "follow_ups":
+            speculate(row.id, agent.context)
+        return row
+
+
+def error_status(exc: Exception) -> int:
+    if isinstance(exc, ValueError):
+        return 400
+    if isinstance(exc, LookupError):
+        return 404
+    if isinstance(exc, ThreadBusy):
+        return 409
+    if isinstance(exc, llm_scheduler.SchedulerSaturated):
+        return 429
+    return 500
+
+
+def stream_reply(session_id: int, message: str):
+    """
+    Start a turn and return an iterator of NDJSON frames with the reply as it streams; the turn is
+    saved once it completes. Raises (ValueError, LookupError, ThreadBusy) if it cannot start.
+    """
+    events = queue.Queue()
+
+    def work():
+        db = SessionLocal()
+        try:
+            reply(
+                db, session_id, message,
+                on_chunk=lambda text: events.put(("text", text)),
+                on_start=lambda: events.put(("started", None)),
+            )
+        except Exception as e:
+            events.put(("error", e))
+        finally:
+            db.close()
+            events.put(("done", None))
+
+    threading.Thread(target=work, name=f"upskill-{session_id}", daemon=True).start()
+    kind, value = events.get()
+    if kind == "error":
+        raise value
+    return _frames(session_id, events)
+
+
+def _frames(session_id: int, events: queue.Queue):
+    sent = 0
+    while True:
+        kind, value = events.get()
+        if kind == "done":
+            return
+        if kind == "text":
+            yield json.dumps({"delta": value[sent:]}) + "\n"
+            sent = len(value)
+        elif kind == "error":
+            print(f"Upskill turn for session {session_id} failed: {value}")
+            frame = {"error": str(value), "status": error_status(value)}
+            if isinstance(value, llm_scheduler.SchedulerSaturated):
+                frame["retry_after"] = value.retry_after
+            yield json.dumps(frame) + "\n"
@@ -1,8 +1,11 @@
 # app/utils.py
-import fitz  # PyMuPDF
-import docx
+# PyMuPDF (fitz) and python-docx are imported inside the functions that parse files: together they
+# take a large share of the API's import time and only the upload endpoint needs them.
+import hashlib
 import io
 import re
+import unicodedata
+from collections import Counter
 
 
 URL_PATTERN = re.compile(r"(https?://[^\s<>\]\)\"']+|www\.[^\s<>\]\)\"']+)", re.IGNORECASE)
@@ -17,7 +20,28 @@ def _normalize_url(url: str) -> str:
     return u
 
 
+def _dedupe_links(links: list[str]) -> list[str]:
+    """Normalize, de-duplicate (case-insensitively) and order links with LinkedIn/GitHub first."""
+    normalized = []
+    seen = set()
+    for link in links:
+        url = _normalize_url(link)
+        if not url:
+            continue
+        low = url.lower()
+        if low in seen:
+            continue
+        seen.add(low)
+        normalized.append(url)
+    return sorted(
+        normalized,
+        key=lambda u: (0 if ("linkedin.com" in u.lower() or "github.com" in u.lower()) else 1, u.lower()),
+    )
+
+
 def _extract_pdf_links(file_bytes: bytes) -> list[str]:
+    import fitz  # PyMuPDF
+
     links: list[str] = []
     with fitz.open(stream=file_bytes, filetype="pdf") as doc:
         for page in doc:
@@ -28,13 +52,64 @@ def _extract_pdf_links(file_bytes: bytes) -> list[str]:
     return links
 
 
-def _extract_docx_links(doc: docx.Document) -> list[str]:
+def _extract_docx_links(doc) -> list[str]:
     links: list[str] = []
     for rel in doc.part.rels.values():
         if "hyperlink" in rel.reltype and rel.target_ref:
             links.append(rel.target_ref)
     return links
 
+def _pdf_heading_lines(file_bytes: bytes) -> set[str]:
+    """Short lines set noticeably larger than the body text, or bold and upper-case."""
+    import fitz  # PyMuPDF
+
+    lines = []
+    size_weights = Counter()
+    with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+        for page in doc:
+            for block in page.get_text("dict").get("blocks", []):
+                for line in block.get("lines", []):
+                    spans = [s for s in line.get("spans", []) if s.get("text", "").strip()]
+                    if not spans:
+                        continue
+                    text = " ".join(s["text"].strip() for s in spans)
+                    size = max(s.get("size", 0) for s in spans)
+                    bold = all(s.get("flags", 0) & 16 for s in spans)
+                    lines.append((text, size, bold))
+                    for s in spans:
+                        size_weights[round(s.get("size", 0), 1)] += len(s["text"])
+    if not size_weights:
+        return set()
+    body_size = size_weights.most_common(1)[0][0]
+    return {
+        text
+        for text, size, bold in lines
+        if len(text.split()) <= 6 and (size >= body_size * 1.15 or (bold and text.isupper()))
+    }
+
+
+def extract_heading_lines(file_bytes: bytes, filename: str) -> set[str]:
+    """
+    Lines the document itself marks as headings (PDF font size/weight, DOCX heading styles).
+    Used as a hint by resume_sections; an empty set just means text heuristics only.
+    """
+    filename_lower = (filename or "").lower()
+    try:
+        if filename_lower.endswith(".pdf"):
+            return _pdf_heading_lines(file_bytes)
+        if filename_lower.endswith(".docx"):
+            import docx
+
+            doc = docx.Document(io.BytesIO(file_bytes))
+            return {
+                p.text.strip()
+                for p in doc.paragraphs
+                if p.text.strip() and (p.style is not None and (p.style.name or "").lower().startswith(("heading", "title")))
+            }
+    except Exception:
+        pass
+    return set()
+
 def extract_text_from_file(file_bytes: bytes, filename: str) -> str:
     """
     Extracts text from a PDF or DOCX file stored in memory.
@@ -45,6 +120,8 @@ def extract_text_from_file(file_bytes: bytes, filename: str) -> str:
     
     try:
         if filename_lower.endswith('.pdf'):
+            import fitz  # PyMuPDF
+
             # Open the PDF directly from the byte stream
             with fitz.open(stream=file_bytes, filetype="pdf") as doc:
                 for page in doc:
@@ -52,6 +129,8 @@ def extract_text_from_file(file_bytes: bytes, filename: str) -> str:
             links.extend(_extract_pdf_links(file_bytes))
                     
         elif filename_lower.endswith('.docx'):
+            import docx
+
             # Open the DOCX directly from the byte stream
             doc = docx.Document(io.BytesIO(file_bytes))
             for para in doc.paragraphs:
@@ -66,23 +145,31 @@ def extract_text_from_file(file_bytes: bytes, filename: str) -> str:
 
     # Catch visible URL strings as fallback for non-embedded links.
     links.extend(URL_PATTERN.findall(text))
-    normalized = []
-    seen = set()
-    for link in links:
-        url = _normalize_url(link)
-        if not url:
-            continue
-        low = url.lower()
-        if low in seen:
-            continue
-        seen.add(low)
-        normalized.append(url)
-
-    if normalized:
-        preferred = sorted(
-            normalized,
-            key=lambda u: (0 if ("linkedin.com" in u.lower() or "github.com" in u.lower()) else 1, u.lower()),
-        )
+    preferred = _dedupe_links(links)
+    if preferred:
         text += "\n\nExtracted Links:\n" + "\n".join(f"- {u}" for u in preferred)
 
     return text.strip()
+
+
+def normalize_resume_text(text: str) -> str:
+    """Lowercased alphanumeric tokens only, so re-exports that differ only in whitespace/punctuation match."""
+    folded = unicodedata.normalize("NFKC", text or "").lower()
+    return " ".join(re.findall(r"[^\W_]+", folded))
+
+
+def fingerprint_text(text: str) -> str:
+    """sha256 of normalize_resume_text(text): an exact match, so any edit to the wording is a new resume."""
+    return hashlib.sha256(normalize_resume_text(text).encode("utf-8")).hexdigest()
+
+
+def fingerprint_upload(file_bytes: bytes, text: str | None = None) -> dict:
+    """Hashes used to recognise a re-uploaded resume: exact file bytes and exact normalized extracted text.
+
+    Both are exact-match checks, deliberately: a resume with edited content must be re-parsed, never
+    answered from the profile built from its previous version.
+    """
+    fingerprint = {"file_sha256": hashlib.sha256(file_bytes or b"").hexdigest()}
+    if text is not None:
+        fingerprint["text_sha256"] = fingerprint_text(text)
+    return fingerprint